@@ -0,0 +1,162 @@
+"""Benchmark do parsing do csv (`parser.converte_para_json`)
+
+Compara o `converte_para_json` atual com a versão anterior à conversão por colunas
+(`converte_anterior`, copiada abaixo sem alterações), em um csv sintético:
+
+    python benchmarks/bench_parser.py --linhas 200000 --repeticoes 5
+"""
+
+import argparse
+import gc
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import warnings
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from microhorario_dl import parser  # noqa: E402
+from microhorario_dl.models import RawDisciplina  # noqa: E402
+
+
+def converte_anterior(texto_csv: str) -> dict:
+    """O `converte_para_json` antes da conversão por colunas, como referência"""
+    ret: dict = {}
+    # le as linhas do csv
+    linhas = texto_csv.splitlines()
+    # salva as informacoes na linha inicial do arquivo
+    ret.update(
+        parser.get_informacoes_csv(linhas[0])
+    )
+
+    # regex para o codigo, que é o primeiro texto na linha
+    re_disciplina = re.compile('^[A-Z]{3}[0-9]{4}')
+
+    lista_disciplinas: List[RawDisciplina] = list()
+
+    for linha in linhas:
+        if re_disciplina.match(linha) is None:
+            continue     # pula a linha que nao tem informacao
+
+        # splitando em brancos e retirando tambem o ';' final se tiver
+        linha_split = linha.strip(' \n\r;').split(';')
+
+        if len(linha_split) == 11:
+            # caso especifico quando cai no Horarios e Salas (microhorario desligado)
+            # nao existe a linha de 'créditos', 'destino' e 'vaga'
+            linha_split.insert(3, '-1')     # creditos
+            linha_split.insert(5, '--')     # destino
+            linha_split.insert(6, '--')     # vaga
+
+        if len(linha_split) == 14:
+            # removendo horas de extensao (atualização nova do microhorario)
+            linha_split.pop(11)
+
+        if len(linha_split) != 13:
+            warnings.warn(f"Linha iniciada em {linha_split[0]} está inválida: contém {len(linha_split)} elementos,"
+                          f"esperado: 14, 13 ou 11")
+            continue     # pula a linha que a informacao esta corrompida
+
+        codigo = linha_split[0].strip()
+        nome = linha_split[1].strip()
+        professor = linha_split[2].strip()
+        creditos = linha_split[3].strip()
+        turma = linha_split[4].strip()
+        destino = linha_split[5].strip()
+        vaga = linha_split[6].strip()
+        turno = linha_split[7].strip()
+        horario_local = linha_split[8].strip()
+        horas_distancia = linha_split[9].strip()
+        shf = linha_split[10].strip()
+        pre_req = linha_split[11].strip()
+        depto = linha_split[12].strip()
+
+        # fazendo parsing dos valores numericos
+        creditos = int(creditos) if creditos.isnumeric() else -1
+        vaga = int(vaga) if vaga.isnumeric() else -1
+        horas_distancia = int(horas_distancia) if horas_distancia.isnumeric() else -1
+        shf = int(shf) if shf.isnumeric() else -1
+
+        # fazendo parsing dos valores booleanos
+        pre_req = pre_req == "SIM"
+        lista_disciplinas.append(RawDisciplina(
+            nome=nome,
+            codigo=codigo,
+            professor=professor,
+            creditos=creditos,
+            turma=turma,
+            destino=destino,
+            vaga=vaga,
+            turno=turno,
+            horario_local=horario_local,
+            horas_distancia=horas_distancia,
+            shf=shf,
+            pre_req=pre_req,
+            depto=depto
+        ))
+
+    ret['disciplinas'] = lista_disciplinas
+
+    return ret
+
+
+def gera_csv(quantidade: int, colunas: int = 13, semente: int = 1) -> str:
+    aleatorio = random.Random(semente)
+    linhas = [
+        "Período: 20231;Emitido em: 05/04/2023 16:24 h; Data da última atualização: 05/04/2023 13:50h;",
+        "Código;Nome;Professor;Créditos;Turma;Destino;Vagas;Turno;Horário;Distância;SHF;Pré;Depto;",
+    ]
+    for i in range(quantidade):
+        depto = aleatorio.choice(("INF", "MAT", "FIS", "ADM", "ENG"))
+        dia = aleatorio.choice(("SEG", "TER", "QUA", "QUI", "SEX"))
+        hora = aleatorio.randint(7, 19)
+        campos = [
+            f"{depto}{1000 + i // 6:04d}", f"NOME DA DISCIPLINA {i // 6}", f"PROFESSOR {aleatorio.randint(1, 500)}",
+            "4", f"3{chr(65 + i % 6)}A", aleatorio.choice(("QQC", "CIC", "ENG")), str(aleatorio.randint(0, 60)),
+            "M", f"{dia} {hora:02d}-{hora + 2:02d} L{aleatorio.randint(100, 999)}", "0", "0",
+            aleatorio.choice(("SIM", "NÃO")), depto,
+        ]
+        if colunas == 14:
+            campos.insert(11, "0")
+        elif colunas == 11:
+            campos.insert(11, "0")
+            del campos[5:7]
+            del campos[3]
+        linhas.append(" ; ".join(campos) + " ;")
+    return "\r\n".join(linhas)
+
+
+def mede(funcao, repeticoes: int) -> float:
+    """Mediana, em segundos, de `repeticoes` execuções"""
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+        del resultado
+    return statistics.median(tempos)
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument('--linhas', type=int, default=200000)
+    args.add_argument('--repeticoes', type=int, default=5)
+    args = args.parse_args()
+
+    for colunas in (13, 14, 11):
+        texto = gera_csv(args.linhas, colunas)
+        assert parser.converte_para_json(texto) == converte_anterior(texto)
+
+        atual = mede(lambda: parser.converte_para_json(texto), args.repeticoes)
+        anterior = mede(lambda: converte_anterior(texto), args.repeticoes)
+        print(f"{colunas} colunas, {args.linhas} linhas: atual {atual:.3f}s, "
+              f"anterior {anterior:.3f}s ({anterior / atual:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -26,7 +26,15 @@ setup(
         "beautifulsoup4>=4",
         "requests>=2"
     ],
+    extras_require={
+        "parquet": ["pyarrow>=8"],
+    },
     python_requires=">3.7",
+    entry_points={
+        "console_scripts": [
+            "microhorario-dl=microhorario_dl.cli:main",
+        ],
+    },
     project_urls={
         "Bug Reports": "https://github.com/Leinadium/microhorario-dl/issues",
         "Source": "https://github.com/Leinadium/microhorario-dl/"
@@ -16,13 +16,25 @@ __license__ = "MIT"
 from time import sleep
 from warnings import warn
 
-from .consultas import consulta_inicial, consulta_intermediaria, consulta_final
+from . import exceptions, models
 from .parser import converte_para_json
 from .models import RawDisciplina, Disciplina, Turma, Alocacao, Departamento, Destino
-from .ementa import consulta_extra
-from .payloads import PayloadMicrohorario, PayloadModo
 
-from typing import Dict, List, Optional
+# os modulos `consultas` e `ementa` dependem de `requests` e `bs4`, que são pesados para importar.
+# por isso, eles só são importados quando um download ou uma coleta de ementas é realizada.
+# os demais (perfil, busca, cache, plano...) também só são importados pelos métodos que os usam,
+# para que `import microhorario_dl` carregue somente o parser, os modelos e as exceções.
+
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from .busca import IndiceBusca
+    from .cache import CacheEmentas
+    from .contexto import ContextoDownload
+    from .latencia import MetricasLatencia
+    from .payloads import FiltrosConsulta
+    from .perfil import PerfilMemoria
+    from .plano import PlanoColeta
 
 __all__ = [
     "Microhorario",
@@ -36,37 +48,165 @@ class Microhorario:
     """
 
     @staticmethod
-    def download():
+    def download(contexto: Optional["ContextoDownload"] = None,
+                 manter_crus: bool = True,
+                 perfil: Optional["PerfilMemoria"] = None,
+                 reaproveitar_sessao: bool = True,
+                 prazo: Optional[float] = None,
+                 filtros: Optional["FiltrosConsulta"] = None):
         """Faz o download do microhorario, criando o objeto
 
+        Todo o estado do download (modo, cookies, sessão e variáveis do ASP.NET) fica no
+        `contexto`, então vários downloads podem ser feitos ao mesmo tempo. Reutilizando o
+        mesmo contexto em downloads seguidos, a sessão anterior é reaproveitada e somente a
+        consulta final é feita (ver `consultas.consulta_csv`).
+
+        :param contexto: contexto do download, permitindo por exemplo usar uma sessão do
+        `requests` própria. Se None, é criado um novo contexto
+
+        :param manter_crus: se False, as `RawDisciplina`s são descartadas depois de montar as
+        disciplinas, e `raw` passa a ser gerado a partir delas (ver `raw`)
+
+        :param perfil: mede a memória das consultas, do parsing e da montagem das disciplinas.
+        Se None, usa o perfil da variável de ambiente `MICROHORARIO_PERFIL`, se definida
+
+        :param reaproveitar_sessao: se False, sempre faz as três consultas, mesmo que o
+        `contexto` já tenha uma sessão
+
+        :param prazo: tempo, em segundos, a partir de agora, depois do qual nenhuma consulta
+        começa. Não é um limite rígido: os tempos limite de cada consulta (ver `ContextoDownload`)
+        são reduzidos ao que resta do prazo, mas o tempo de leitura do `requests` vale para cada
+        leitura do socket, e não para a resposta inteira, então uma consulta em andamento pode
+        terminar depois do prazo. A latência de cada consulta fica em `contexto.metricas`
+
+        :raise DeadlineExceededError: se o prazo terminar antes da última consulta começar
+
+        :param filtros: filtros do formulário (departamento, professor, dia...) aplicados pelo
+        servidor, que retorna um CSV somente com essas turmas. Substituem os filtros do
+        `contexto`. No modo fallback, os filtros que não existem no Horarios e Salas são
+        ignorados, com um aviso
+
         :rtype: Microhorario
         """
-        inicio = consulta_inicial()
-        inter = consulta_intermediaria(inicio)
-        fim = consulta_final(inter)
+        from .consultas import consulta_csv
+        from .contexto import ContextoDownload
+        from .perfil import etapa, perfil_do_ambiente
+
+        perfil = perfil if perfil is not None else perfil_do_ambiente()
+        contexto = contexto if contexto is not None else ContextoDownload()
+        if filtros is not None:
+            contexto.filtros = filtros
+        contexto.inicia_prazo(prazo)
+        with etapa(perfil, 'download'):
+            with etapa(perfil, 'consultas'):
+                fim = consulta_csv(contexto, reaproveitar_sessao)
+
+            with etapa(perfil, 'converte_para_json'):
+                dados_crus: dict = converte_para_json(fim)
+            del fim     # o texto do csv não é mais necessário
+
+            instance: Microhorario = Microhorario(
+                periodo=dados_crus['periodo'],
+                emissao=dados_crus['emissao'],
+                atualizacao=dados_crus['atualizacao'],
+                dados_crus=dados_crus,
+                departamentos=contexto.departamentos,
+                destinos=contexto.destinos
+            )
+            instance._modo_fallback = contexto.is_modo_fallback
+
+            with etapa(perfil, '_add_raw_disciplina'):
+                for rd in dados_crus['disciplinas']:    # type: RawDisciplina
+                    instance._add_raw_disciplina(rd)
+
+            if not manter_crus:
+                instance._dados_crus = None
+        return instance
+
+    @staticmethod
+    def from_json(dados: dict, manter_crus: bool = True):
+        """
+        Cria o microhorario a partir de um dicionario no formato retornado por `as_json`.
+
+        As turmas são convertidas de volta para `RawDisciplina`s, e as ementas e pré-requisitos,
+        se existirem, são preenchidos depois de todas as disciplinas serem adicionadas.
 
-        dados_crus: dict = converte_para_json(fim)
+        :param dados: dicionario no formato de `as_json`
+
+        :param manter_crus: se False, as `RawDisciplina`s são descartadas depois de montar as disciplinas
+
+        :rtype: Microhorario
+        """
+        disciplinas = dados.get('disciplinas', [])
+        crus = [
+            RawDisciplina(
+                codigo=d['codigo'],
+                nome=d['nome'],
+                professor=t['professor'],
+                creditos=d['creditos'],
+                turma=t['codigo'],
+                destino=a['destino'],
+                vaga=a['vagas'],
+                turno=t['turno'],
+                horario_local=t['horario_local'],
+                horas_distancia=t['horario_distancia'],
+                shf=t['shf'],
+                pre_req=d['pre_req'],
+                depto=d['departamento']
+            )
+            for d in disciplinas for t in d['turmas'] for a in t['alocacoes']
+        ]
 
         instance: Microhorario = Microhorario(
-            periodo=dados_crus['periodo'],
-            emissao=dados_crus['emissao'],
-            atualizacao=dados_crus['atualizacao'],
-            dados_crus=dados_crus,
-            departamentos=inicio.get('departamentos'),
-            destinos=inicio.get('destinos')
+            periodo=dados['periodo'],
+            emissao=dados['emissao'],
+            atualizacao=dados['atualizacao'],
+            dados_crus={
+                'periodo': dados['periodo'],
+                'emissao': dados['emissao'],
+                'atualizacao': dados['atualizacao'],
+                'disciplinas': crus
+            },
+            departamentos={x['codigo']: x['nome'] for x in dados.get('departamentos', [])},
+            destinos={x['codigo']: x['nome'] for x in dados.get('destinos', [])} or None
         )
-        instance._modo_fallback = PayloadMicrohorario.get_modo() == PayloadModo.HORARIO
+        instance._modo_fallback = dados.get('modo_fallback', False)
 
-        for rd in dados_crus['disciplinas']:    # type: RawDisciplina
+        for rd in crus:
             instance._add_raw_disciplina(rd)
 
+        # preenchendo as ementas e pre-requisitos já coletados
+        for d in disciplinas:
+            if d.get('ementa') is not None:
+                instance._aplica_extra(
+                    instance._disciplinas[d['codigo']], d['ementa'], d.get('prerequisitos') or [], None
+                )
+
+        if not manter_crus:
+            instance._dados_crus = None
         return instance
 
+    @staticmethod
+    def from_sqlite(caminho: str, periodo: Optional[str] = None, manter_crus: bool = True):
+        """
+        Cria o microhorario a partir de um banco SQLite gerado por `exportar_sqlite`.
+
+        :param caminho: caminho do arquivo do banco
+
+        :param periodo: o período a ser carregado. Se None, carrega o período mais recente.
+
+        :param manter_crus: se False, as `RawDisciplina`s são descartadas depois de montar as disciplinas
+
+        :rtype: Microhorario
+        """
+        from .sqlite import carrega_sqlite
+        return Microhorario.from_json(carrega_sqlite(caminho, periodo), manter_crus=manter_crus)
+
     def __init__(self,
                  periodo: str,
                  emissao: str,
                  atualizacao: str,
-                 dados_crus: dict,
+                 dados_crus: Optional[dict],
                  departamentos: Optional[dict] = None,
                  destinos: Optional[dict] = None):
         """
@@ -83,6 +223,7 @@ class Microhorario:
         :param atualizacao: string represetando a data da ultima atualização do microhorario
 
         :param dados_crus: o dicionario contendo as `RawDisciplina`s e as informações originais.
+        Se None, `raw` é gerado a partir das disciplinas.
 
         :param departamentos: Caso seja um dicionario, cada chave e valor serão respectivamentes
         o código e o nome do departamento, para ser pré-adicionado.
@@ -94,11 +235,14 @@ class Microhorario:
         self._periodo: str = periodo
         self._emissao: str = emissao
         self._atualizacao: str = atualizacao
-        self._dados_crus: dict = dados_crus
+        self._dados_crus: Optional[dict] = dados_crus
         self._disciplinas: Dict[str, Disciplina] = dict()
         self._departamentos: Dict[str, Departamento] = dict()
         self._alocacoes: Dict[str, Alocacao] = dict()
         self._modo_fallback: bool = False
+        self._indice: Optional["IndiceBusca"] = None
+        self._ocupacao = None
+        self._estatisticas = None
 
         # adicionando departamentos
         if isinstance(departamentos, dict):
@@ -143,9 +287,56 @@ class Microhorario:
         return list(self._departamentos.values())
 
     @property
-    def raw(self):
-        """Dicionario dos dados baixados, sem processamento"""
-        return self._dados_crus
+    def destinos(self) -> Dict[str, str]:
+        """Dicionario com o código e o nome de cada destino conhecido"""
+        return dict(self._destinos or {})
+
+    @property
+    def raw(self) -> dict:
+        """Dicionario dos dados baixados, sem processamento
+
+        Se as `RawDisciplina`s foram descartadas (`manter_crus=False`), elas são geradas
+        novamente a partir das disciplinas a cada acesso, sem serem guardadas. Nesse caso,
+        os créditos refletem os valores atuais das disciplinas, incluindo os coletados
+        junto com as ementas.
+        """
+        if self._dados_crus is not None:
+            return self._dados_crus
+        return {
+            'periodo': self._periodo,
+            'emissao': self._emissao,
+            'atualizacao': self._atualizacao,
+            'disciplinas': list(self._gera_crus())
+        }
+
+    def _gera_crus(self) -> Iterator[RawDisciplina]:
+        """Gera as `RawDisciplina`s a partir das disciplinas, turmas e alocações"""
+        for d in self._disciplinas.values():
+            for t in d.turmas:
+                for a in t.alocacoes:
+                    yield RawDisciplina(
+                        codigo=d.codigo,
+                        nome=d.nome,
+                        professor=t.professor,
+                        creditos=d.creditos,
+                        turma=t.codigo,
+                        destino=a.destino.codigo,
+                        vaga=a.vagas,
+                        turno=t.turno,
+                        horario_local=t.horario_local,
+                        horas_distancia=t.horario_distancia,
+                        shf=t.shf,
+                        pre_req=d.pre_req,
+                        depto=d.departamento.codigo
+                    )
+
+    def descartar_crus(self):
+        """
+        Descarta as `RawDisciplina`s guardadas, mantendo somente as disciplinas montadas.
+
+        Depois disso, `raw` passa a ser gerado a partir das disciplinas.
+        """
+        self._dados_crus = None
 
     def _add_raw_disciplina(self, raw: RawDisciplina):
         """Adiciona uma disciplina utilizando uma `RawDisciplina`
@@ -202,15 +393,101 @@ class Microhorario:
 
             self._disciplinas[raw.codigo] = disciplina
 
+        if self._indice is not None:
+            self._indice.atualiza(self._disciplinas[raw.codigo])
+        if self._estatisticas is not None:
+            self._estatisticas.atualiza(self._disciplinas[raw.codigo])
+        self._ocupacao = None
         return
 
+    def indice_busca(self) -> "IndiceBusca":
+        """
+        Retorna o índice de busca das disciplinas, criando-o no primeiro acesso.
+
+        Depois de criado, o índice é atualizado sempre que uma ementa é coletada.
+        """
+        if self._indice is None:
+            from .busca import IndiceBusca
+            self._indice = IndiceBusca(self._disciplinas.values())
+        return self._indice
+
+    def definir_indice_busca(self, indice: "IndiceBusca"):
+        """Usa um índice já construído, por exemplo carregado de um `ArquivoSnapshots`"""
+        self._indice = indice
+
+    def buscar(self, consulta: str, limite: Optional[int] = 20) -> List[Disciplina]:
+        """
+        Busca disciplinas pelo código, nome, professores e ementa, sem diferenciar acentos.
+
+        :param consulta: texto da busca. Todos os termos precisam ser encontrados, mas podem
+        ser somente o começo ou um trecho de uma palavra
+
+        :param limite: quantidade máxima de disciplinas. Se None, retorna todas
+
+        :return: as disciplinas encontradas, da mais para a menos relevante
+        """
+        resultado = self.indice_busca().busca(consulta, limite)
+        return [self._disciplinas[x] for x, _ in resultado if x in self._disciplinas]
+
+    def ocupacao_salas(self):
+        """
+        Retorna a ocupação das salas na semana, montando-a no primeiro acesso.
+
+        :rtype: ocupacao.OcupacaoSalas
+        """
+        if self._ocupacao is None:
+            from .ocupacao import OcupacaoSalas
+            self._ocupacao = OcupacaoSalas(self)
+        return self._ocupacao
+
+    def auditar_conflitos(self):
+        """
+        Encontra as salas e os professores com aulas sobrepostas (ver `auditoria.audita_conflitos`).
+
+        :rtype: List[auditoria.GrupoConflito]
+        """
+        from .auditoria import audita_conflitos
+        return audita_conflitos(self)
+
+    def validar_matriculas(self, planos, processos: int = 0, disputar_vagas: bool = False):
+        """
+        Valida muitos planos de matrícula de uma vez (ver `matricula.ValidadorMatriculas`).
+
+        :param planos: lista de `matricula.PlanoMatricula`
+
+        :param processos: quantidade de processos para a validação. Com 0, valida neste processo
+
+        :param disputar_vagas: se True, os planos disputam as vagas na ordem da lista
+
+        :rtype: List[matricula.RelatorioMatricula]
+        """
+        from .matricula import ValidadorMatriculas
+        return ValidadorMatriculas(self).valida_lote(planos, processos=processos, disputar_vagas=disputar_vagas)
+
+    def estatisticas(self):
+        """
+        Retorna as estatísticas agregadas (vagas, turmas, créditos e horas), calculando-as
+        no primeiro acesso. Depois disso, elas são atualizadas a cada disciplina alterada.
+
+        :rtype: estatisticas.EstatisticasMicrohorario
+        """
+        if self._estatisticas is None:
+            from .estatisticas import EstatisticasMicrohorario
+            self._estatisticas = EstatisticasMicrohorario(self._disciplinas.values())
+        return self._estatisticas
+
     def as_json(self) -> dict:
         """
         Transforma o objeto em um dicionário, que é um json válido.
 
         :return: um dicionario contendo todas as informações do json
         """
+        dados = self._cabecalho_json()
+        dados['disciplinas'] = [d.as_dict() for d in self.disciplinas]
+        return dados
 
+    def _cabecalho_json(self) -> dict:
+        """Todas as chaves de `as_json`, menos as disciplinas. Usado também pela linha de comando"""
         return {
             'periodo': self.periodo,
             'emissao': self.emissao,
@@ -222,50 +499,351 @@ class Microhorario:
                 }
                 for x in self.departamentos
             ],
-            'disciplinas': [
+            'destinos': [
                 {
-                    'nome': d.nome,
-                    'codigo': d.codigo,
-                    'pre_req': d.pre_req,
-                    'creditos': d.creditos,
-                    'departamento': d.departamento.codigo,
-                    'turmas': [t.as_dict() for t in d.turmas]
+                    'nome': v,
+                    'codigo': k
                 }
-                for d in self.disciplinas
-            ]
+                for k, v in (self._destinos or {}).items()
+            ],
+            'modo_fallback': self.is_modo_fallback,
         }
 
-    def coletar_extra(self, verbose=True):
+    def exportar_sqlite(self, caminho: str):
         """
-        Coleta as ementas e pre-requisitos de todas as disciplinas cadastradas.
+        Exporta o microhorario para um banco SQLite normalizado, com uma tabela para
+        disciplinas, turmas, horarios, alocacoes, departamentos, destinos e pré-requisitos.
 
-        Essa função irá fazer uma chamada ao site da PUC para cada ementa e prerequisito, por isso
-        o tempo de execução é longo.
+        Se o período já existir no banco, ele é substituído.
 
-        :param verbose: imprime o status atual no stdout
+        :param caminho: caminho do arquivo do banco. Será criado se não existir.
         """
+        from .sqlite import exporta_sqlite
+        exporta_sqlite(self, caminho)
 
-        total = len(self._disciplinas)
-        for i, (cod, disc) in enumerate(self._disciplinas.items()):       # type: int, (str, Disciplina)
-            if verbose:
-                print(f"\r[{i}/{total}] Coletando ementa de [{cod}]", end='')
+    def exportar_parquet(self, caminho_turmas: str, caminho_alocacoes: str, formato: str = 'parquet', **kwargs):
+        """
+        Exporta as turmas e as alocações para duas tabelas colunares, em Parquet ou Arrow IPC.
+
+        Requer o `pyarrow`. Ver `parquet.exporta_parquet` para as outras opções.
+
+        :param caminho_turmas: arquivo da tabela de turmas
+
+        :param caminho_alocacoes: arquivo da tabela de alocações
+
+        :param formato: 'parquet' ou 'arrow'
+        """
+        from .parquet import exporta_parquet
+        exporta_parquet(self, caminho_turmas, caminho_alocacoes, formato=formato, **kwargs)
+
+    def publicar_compartilhado(self, caminho: str):
+        """
+        Publica o microhorario em um arquivo somente leitura, que pode ser mapeado em memória
+        por vários processos com `Microhorario.abrir_compartilhado`.
+
+        :param caminho: caminho do arquivo, de preferência em `/dev/shm`
+        """
+        from .compartilhado import publica_snapshot
+        publica_snapshot(self, caminho)
+
+    @staticmethod
+    def abrir_compartilhado(caminho: str):
+        """
+        Abre um microhorario publicado com `publicar_compartilhado`, sem carregá-lo inteiro.
+
+        :param caminho: caminho do arquivo publicado
+
+        :rtype: compartilhado.MicrohorarioCompartilhado
+        """
+        from .compartilhado import MicrohorarioCompartilhado
+        return MicrohorarioCompartilhado(caminho)
+
+    def _aplica_extra(self, disc: Disciplina, em: str, pr: List[List[str]], cred: Optional[int]):
+        """Preenche a ementa, pre-requisitos e creditos coletados de uma disciplina"""
+        # convertendo para disciplinas
+        disc.prerequisitos = [
+            # se a disciplina nao existir, nao coloca na lista
+            # afinal, tornaria impossivel de ser cumprido
+            [self._disciplinas.get(x) for x in grupo if x in self._disciplinas]
+            for grupo in pr
+        ]
+        disc.ementa = em
+
+        if cred is not None and cred > 0:
+            disc.creditos = cred
+
+        if self._indice is not None:
+            self._indice.atualiza(disc)
+        if self._estatisticas is not None:
+            self._estatisticas.atualiza(disc)
+
+    def iter_coletar_extra(self,
+                           codigos: Optional[Iterable[str]] = None,
+                           concorrencia: int = 1,
+                           cache: Optional["CacheEmentas"] = None,
+                           processos: int = 0,
+                           tamanho_fila: int = 64,
+                           cliente=None,
+                           espera: float = 0.2,
+                           atraso_hedge: Optional[float] = None,
+                           metricas: Optional["MetricasLatencia"] = None) -> Iterator[Disciplina]:
+        """
+        Coleta as ementas e pre-requisitos das disciplinas, retornando cada disciplina
+        assim que seus dados forem coletados.
+
+        Com `concorrencia` maior que 1, as consultas são feitas em paralelo, e as disciplinas
+        são retornadas na ordem em que as consultas terminam. Os dados são sempre aplicados
+        às disciplinas na thread que consome o gerador.
+
+        Com `processos` maior que 0, as páginas são baixadas em threads e o parsing é feito
+        em um pool de processos (ver `pipeline.coleta_em_pipeline`). Nesse caso, as disciplinas
+        são retornadas na ordem de `codigos`.
+
+        :param codigos: códigos das disciplinas a serem coletadas. Se None, coleta todas.
+
+        :param concorrencia: quantidade máxima de consultas simultâneas ao site da PUC
+
+        :param cache: cache opcional das ementas. Disciplinas presentes no cache não são consultadas,
+        e as consultadas com sucesso são salvas nele.
+
+        :param processos: quantidade de processos para o parsing das páginas. Com 0, o parsing
+        é feito nas mesmas threads que baixam as páginas.
+
+        :param tamanho_fila: com `processos`, a quantidade máxima de disciplinas em andamento
+
+        :param cliente: sessão do `requests` (ou outro cliente, como um `transporte.ClienteReprodutor`)
+        usada nas consultas. Se None, usa o próprio `requests`
+
+        :param espera: tempo, em segundos, que cada consulta espera depois de terminar, para não
+        sobrecarregar o site da PUC. Pode ser 0 ao reproduzir uma gravação
+
+        :param atraso_hedge: se não for None, uma ementa que demorar mais que esse tempo (em
+        segundos) é pedida de novo, e a primeira resposta é usada (ver `ementa.baixa_pagina_ementa`)
+
+        :param metricas: se não for None, registra a latência de cada consulta na etapa 'ementa'.
+        Pode ser o `metricas` do `ContextoDownload`, juntando todas as etapas
+
+        :return: um gerador das `Disciplina`s com os dados preenchidos
+        """
+        from .ementa import consulta_extra
+
+        if codigos is None:
+            codigos = list(self._disciplinas.keys())
+        else:
+            codigos = [x for x in codigos if x in self._disciplinas]
+
+        def coleta(cod: str):
+            if cache is not None:
+                salvo = cache.get(cod)
+                if salvo is not None:
+                    return cod, salvo
 
-            em, pr, cred = "Disciplina sem ementa cadastrada.", [], None
             try:
-                em, pr, cred = consulta_extra(cod)
+                em, pr, cred = consulta_extra(cod, cliente, atraso_hedge, metricas)
             except Exception as e:
                 warn(f"Erro ao coletar ementa da disciplina {cod}: {e}")
+                em, pr, cred = "Disciplina sem ementa cadastrada.", [], None
+            else:
+                if cache is not None:
+                    cache.set(cod, em, pr, cred)
+
+            # a espera também acontece depois de um erro, para não repetir as requisições sem pausa
+            if espera > 0:
+                sleep(espera)
+            return cod, (em, pr, cred)
+
+        if processos > 0:
+            from .pipeline import coleta_em_pipeline
+
+            a_baixar = []
+            for cod in codigos:
+                salvo = cache.get(cod) if cache is not None else None
+                if salvo is None:
+                    a_baixar.append(cod)
+                    continue
+                disc = self._disciplinas[cod]
+                self._aplica_extra(disc, *salvo)
+                yield disc
+
+            coletadas = coleta_em_pipeline(
+                a_baixar, concorrencia=concorrencia, processos=processos, tamanho_fila=tamanho_fila,
+                cliente=cliente, espera=espera, atraso_hedge=atraso_hedge, metricas=metricas
+            )
+            for cod, extra in coletadas:
+                if extra is None:
+                    extra = ("Disciplina sem ementa cadastrada.", [], None)
+                elif cache is not None:
+                    cache.set(cod, *extra)
+                disc = self._disciplinas[cod]
+                self._aplica_extra(disc, *extra)
+                yield disc
+            return
+
+        if concorrencia <= 1:
+            for cod, (em, pr, cred) in map(coleta, codigos):
+                disc = self._disciplinas[cod]
+                self._aplica_extra(disc, em, pr, cred)
+                yield disc
+            return
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        executor = ThreadPoolExecutor(max_workers=concorrencia)
+        futuros = [executor.submit(coleta, x) for x in codigos]
+        try:
+            for futuro in as_completed(futuros):
+                cod, (em, pr, cred) = futuro.result()
+                disc = self._disciplinas[cod]
+                self._aplica_extra(disc, em, pr, cred)
+                yield disc
+        finally:
+            # caso o gerador seja interrompido, cancela as consultas que ainda não começaram
+            for futuro in futuros:
+                futuro.cancel()
+            executor.shutdown(wait=False)
+
+    def planejar_coleta(self,
+                        campos: Optional[Iterable[str]] = None,
+                        codigos: Optional[Iterable[str]] = None,
+                        departamentos: Optional[Iterable[str]] = None,
+                        cache: Optional["CacheEmentas"] = None) -> "PlanoColeta":
+        """
+        Calcula quais páginas de ementa precisam ser baixadas para preencher somente os campos
+        pedidos, sem fazer nenhuma requisição (ver `plano.planeja_coleta`).
+
+        :param campos: campos necessários, entre 'ementa', 'prerequisitos' e 'creditos'. Se None,
+        todos (`plano.CAMPOS`)
 
-            # convertendo para disciplinas
-            disc.prerequisitos = [
-                # se a disciplina nao existir, nao coloca na lista
-                # afinal, tornaria impossivel de ser cumprido
-                [self._disciplinas.get(x) for x in grupo if x in self._disciplinas]
-                for grupo in pr
-            ]
-            disc.ementa = em
+        :param codigos: se não for None, considera somente essas disciplinas
 
-            if cred is not None and cred > 0:
-                disc.creditos = cred
+        :param departamentos: se não for None, considera somente as disciplinas desses departamentos
 
-            sleep(0.2)
+        :param cache: cache das ementas, que deve ser o mesmo passado para `executar_plano`
+        """
+        from .plano import CAMPOS, planeja_coleta
+
+        campos = campos if campos is not None else CAMPOS
+        return planeja_coleta(self, campos=campos, codigos=codigos, departamentos=departamentos, cache=cache)
+
+    def executar_plano(self,
+                       plano: "PlanoColeta",
+                       concorrencia: int = 1,
+                       cache: Optional["CacheEmentas"] = None,
+                       cliente=None,
+                       espera: float = 0.2,
+                       atraso_hedge: Optional[float] = None) -> "PlanoColeta":
+        """
+        Executa um plano de `planejar_coleta`: preenche os pré-requisitos vazios, e baixa somente
+        as páginas do plano. As páginas baixadas preenchem todos os campos, mesmo os não pedidos.
+
+        :param plano: o plano a ser executado
+
+        :param concorrencia: quantidade máxima de consultas simultâneas ao site da PUC
+
+        :param cache: cache das ementas, ver `iter_coletar_extra`
+
+        :param cliente: cliente HTTP usado nas consultas, ver `iter_coletar_extra`
+
+        :param espera: ver `iter_coletar_extra`
+
+        :param atraso_hedge: ver `iter_coletar_extra`
+
+        :return: o mesmo plano, com `requisicoes` preenchido
+        """
+        for cod in plano.sem_prerequisitos:
+            disc = self._disciplinas[cod]
+            disc.prerequisitos = []
+            if self._indice is not None:
+                self._indice.atualiza(disc)
+
+        from .latencia import MetricasLatencia
+
+        metricas = MetricasLatencia()
+        coletadas = self.iter_coletar_extra(
+            codigos=plano.do_cache + plano.codigos, concorrencia=concorrencia, cache=cache,
+            cliente=cliente, espera=espera, atraso_hedge=atraso_hedge, metricas=metricas
+        )
+        for _ in coletadas:
+            pass
+
+        resumo = metricas.resumo()
+        plano.requisicoes = sum(resumo[x]['quantidade'] for x in ('ementa', 'ementa_hedge') if x in resumo)
+        return plano
+
+    def coletar_sob_demanda(self,
+                            cache: Optional["CacheEmentas"] = None,
+                            concorrencia: int = 4,
+                            cliente=None,
+                            espera_erro: float = 60):
+        """
+        Ativa a coleta sob demanda: a ementa e os pré-requisitos de cada disciplina são
+        baixados no primeiro acesso a `Disciplina.ementa` ou `Disciplina.prerequisitos`.
+
+        `as_json`, as exportações e o índice de busca nunca disparam coletas, e usam somente
+        o que já foi coletado. Para coletar várias disciplinas de uma vez, use `pre_carrega`
+        no coletor retornado.
+
+        :param cache: cache opcional das ementas
+
+        :param concorrencia: quantidade de downloads simultâneos em `pre_carrega`
+
+        :param cliente: sessão do `requests` usada para os downloads
+
+        :param espera_erro: tempo, em segundos, antes de tentar de novo uma disciplina cujo
+        download teve erro. Os erros ficam em `falhas` no coletor retornado
+
+        :rtype: sob_demanda.ColetorSobDemanda
+        """
+        from .sob_demanda import ColetorSobDemanda
+
+        coletor = ColetorSobDemanda(
+            self, cache=cache, concorrencia=concorrencia, cliente=cliente, espera_erro=espera_erro
+        )
+        for d in self._disciplinas.values():
+            d.definir_coletor(coletor)
+        return coletor
+
+    def coletar_extra(self,
+                      verbose=True,
+                      concorrencia: int = 1,
+                      cache: Optional["CacheEmentas"] = None,
+                      processos: int = 0,
+                      perfil: Optional["PerfilMemoria"] = None,
+                      cliente=None,
+                      atraso_hedge: Optional[float] = None,
+                      metricas: Optional["MetricasLatencia"] = None):
+        """
+        Coleta as ementas e pre-requisitos de todas as disciplinas cadastradas.
+
+        Essa função irá fazer uma chamada ao site da PUC para cada ementa e prerequisito, por isso
+        o tempo de execução é longo.
+
+        :param verbose: imprime o status atual no stdout
+
+        :param concorrencia: quantidade máxima de consultas simultâneas ao site da PUC
+
+        :param cache: cache opcional das ementas, ver `iter_coletar_extra`
+
+        :param processos: quantidade de processos para o parsing, ver `iter_coletar_extra`
+
+        :param perfil: mede a memória da coleta. Se None, usa o perfil da variável de
+        ambiente `MICROHORARIO_PERFIL`, se definida
+
+        :param cliente: cliente HTTP usado nas consultas, ver `iter_coletar_extra`
+
+        :param atraso_hedge: ver `iter_coletar_extra`
+
+        :param metricas: ver `iter_coletar_extra`
+        """
+        from .perfil import etapa, perfil_do_ambiente
+
+        perfil = perfil if perfil is not None else perfil_do_ambiente()
+        total = len(self._disciplinas)
+        with etapa(perfil, 'coletar_extra'):
+            coletadas = self.iter_coletar_extra(
+                concorrencia=concorrencia, cache=cache, processos=processos, cliente=cliente,
+                atraso_hedge=atraso_hedge, metricas=metricas
+            )
+            for i, disc in enumerate(coletadas):
+                if verbose:
+                    print(f"\r[{i + 1}/{total}] Coletada ementa de [{disc.codigo}]", end='')
@@ -0,0 +1,202 @@
+"""Arquivo de snapshots do microhorario, com deduplicação
+
+Cada disciplina de um snapshot é guardada como um objeto comprimido, endereçado pelo hash
+do seu conteúdo. Como a maioria das disciplinas não muda entre dois downloads, snapshots
+seguidos compartilham quase todos os objetos, e só as disciplinas alteradas ocupam espaço novo.
+
+Estrutura do diretório:
+
+    objetos/<xx>/<hash>     disciplina no formato de `Disciplina.as_dict` (ou índice de busca), comprimido
+    snapshots/<id>          manifesto do snapshot: informações gerais e o hash de cada disciplina
+    historico/<codigo>      uma linha por snapshot com o hash da disciplina naquele snapshot
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# typing stuff
+from typing import TYPE_CHECKING, List, Optional
+
+# local imports
+from .busca import IndiceBusca
+from .cache import RE_CODIGO
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+def _serializa(dados) -> bytes:
+    """Serializa de forma canônica, para que o mesmo conteúdo sempre gere o mesmo hash"""
+    return json.dumps(dados, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _escreve_atomico(caminho: str, conteudo: bytes):
+    """Escreve o arquivo por completo antes de torná-lo visível"""
+    diretorio = os.path.dirname(caminho)
+    os.makedirs(diretorio, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+
+class ArquivoSnapshots:
+    """Guarda e reconstrói snapshots do microhorario de vários períodos"""
+
+    def __init__(self, diretorio: str, nivel_compressao: int = 6):
+        """
+        Abre (ou cria) o arquivo de snapshots
+
+        :param diretorio: diretório do arquivo
+
+        :param nivel_compressao: nível de compressão do zlib (1 a 9)
+        """
+        self._diretorio = diretorio
+        self._nivel = nivel_compressao
+        for sub in ('objetos', 'snapshots', 'historico'):
+            os.makedirs(os.path.join(diretorio, sub), exist_ok=True)
+
+        # os objetos são imutáveis, então podem ser reaproveitados entre snapshots
+        self._le_objeto = lru_cache(maxsize=16384)(self._le_objeto_disco)
+
+    def __repr__(self):
+        return f'<ArquivoSnapshots [{self._diretorio}]>'
+
+    def _caminho_objeto(self, chave: str) -> str:
+        return os.path.join(self._diretorio, 'objetos', chave[:2], chave)
+
+    def _caminho_snapshot(self, ident: str) -> str:
+        return os.path.join(self._diretorio, 'snapshots', ident)
+
+    def _caminho_historico(self, codigo: str) -> str:
+        if RE_CODIGO.match(codigo) is None:
+            raise ValueError(f"Código de disciplina inválido: {codigo}")
+        return os.path.join(self._diretorio, 'historico', codigo)
+
+    def _salva_objeto(self, conteudo: bytes) -> str:
+        """Salva um objeto se ele ainda não existir, e retorna o seu hash"""
+        chave = hashlib.sha256(conteudo).hexdigest()
+        caminho = self._caminho_objeto(chave)
+        if not os.path.exists(caminho):
+            _escreve_atomico(caminho, zlib.compress(conteudo, self._nivel))
+        return chave
+
+    def _le_objeto_disco(self, chave: str) -> bytes:
+        with open(self._caminho_objeto(chave), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def salva(self, micro: "Microhorario", salvar_indice: bool = False) -> str:
+        """
+        Salva um snapshot do microhorario.
+
+        :param micro: o microhorario a ser salvo
+
+        :param salvar_indice: salva também o índice de busca (`Microhorario.indice_busca`),
+        para que ele não precise ser reconstruído ao carregar o snapshot
+
+        :return: o identificador do snapshot, no formato `<periodo>-<data em UTC>`
+        """
+        ident = f"{micro.periodo}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}"
+
+        dados = micro.as_json()
+        # lista de pares (codigo, hash), para manter a ordem original
+        disciplinas = [(d['codigo'], self._salva_objeto(_serializa(d))) for d in dados['disciplinas']]
+        dados['disciplinas'] = disciplinas
+        dados['id'] = ident
+        if salvar_indice:
+            dados['indice'] = self._salva_objeto(_serializa(micro.indice_busca().como_dados()))
+        _escreve_atomico(self._caminho_snapshot(ident), zlib.compress(_serializa(dados), self._nivel))
+
+        # o manifesto já foi salvo, então o historico nunca aponta para um snapshot inexistente
+        for codigo, chave in disciplinas:
+            linha = json.dumps({'snapshot': ident, 'periodo': micro.periodo, 'objeto': chave})
+            with open(self._caminho_historico(codigo), 'a', encoding='utf-8') as f:
+                f.write(linha + '\n')
+
+        return ident
+
+    def snapshots(self, periodo: Optional[str] = None) -> List[str]:
+        """
+        Lista os identificadores dos snapshots salvos, do mais antigo para o mais recente
+
+        :param periodo: se informado, lista somente os snapshots desse período
+        """
+        idents = [x for x in os.listdir(os.path.join(self._diretorio, 'snapshots')) if not x.endswith('.tmp')]
+        if periodo is not None:
+            idents = [x for x in idents if x.rsplit('-', 1)[0] == periodo]
+        return sorted(idents, key=lambda x: x.rsplit('-', 1)[1])
+
+    def _le_manifesto(self, ident: str) -> dict:
+        with open(self._caminho_snapshot(ident), 'rb') as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def _json_do_manifesto(self, manifesto: dict) -> dict:
+        dados = {k: v for k, v in manifesto.items() if k not in ('id', 'indice')}
+        dados['disciplinas'] = [json.loads(self._le_objeto(x)) for _, x in manifesto['disciplinas']]
+        return dados
+
+    def _indice_do_manifesto(self, manifesto: dict) -> Optional[IndiceBusca]:
+        chave = manifesto.get('indice')
+        if chave is None:
+            return None
+        return IndiceBusca.de_dados(json.loads(self._le_objeto_disco(chave)))
+
+    def carrega_json(self, ident: str) -> dict:
+        """Reconstrói o snapshot no formato de `Microhorario.as_json`"""
+        return self._json_do_manifesto(self._le_manifesto(ident))
+
+    def carrega_indice(self, ident: str) -> Optional[IndiceBusca]:
+        """Carrega o índice de busca de um snapshot, ou None se ele foi salvo sem o índice"""
+        return self._indice_do_manifesto(self._le_manifesto(ident))
+
+    def carrega(self, ident: str) -> "Microhorario":
+        """
+        Reconstrói o `Microhorario` de um snapshot, junto com o seu índice de busca, se existir.
+        O manifesto é lido uma única vez para os dois
+        """
+        from . import Microhorario
+        manifesto = self._le_manifesto(ident)
+        micro = Microhorario.from_json(self._json_do_manifesto(manifesto))
+        indice = self._indice_do_manifesto(manifesto)
+        if indice is not None:
+            micro.definir_indice_busca(indice)
+        return micro
+
+    def historico(self, codigo: str, somente_alteracoes: bool = True) -> List[dict]:
+        """
+        Lista o histórico de uma disciplina, sem carregar nenhum snapshot.
+
+        :param codigo: código da disciplina
+
+        :param somente_alteracoes: se True, só retorna os snapshots onde a disciplina mudou
+
+        :return: lista de dicionarios com as chaves 'snapshot', 'periodo' e 'objeto'
+        """
+        try:
+            with open(self._caminho_historico(codigo), encoding='utf-8') as f:
+                entradas = [json.loads(x) for x in f if x.strip()]
+        except FileNotFoundError:
+            return []
+
+        if not somente_alteracoes:
+            return entradas
+
+        ret, ultimo = [], None
+        for entrada in entradas:
+            if entrada['objeto'] != ultimo:
+                ret.append(entrada)
+            ultimo = entrada['objeto']
+        return ret
+
+    def versao(self, objeto: str) -> dict:
+        """Retorna a disciplina guardada em um objeto, no formato de `Disciplina.as_dict`"""
+        return json.loads(self._le_objeto(objeto))
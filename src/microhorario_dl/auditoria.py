@@ -0,0 +1,116 @@
+"""Auditoria de conflitos: salas e professores com aulas sobrepostas
+
+Os horários de todas as turmas são agrupados por (sala, dia) e por (professor, dia), e cada
+grupo é ordenado pelo início e percorrido uma única vez (sweep line), guardando o maior fim
+visto até agora. Uma aula que começa antes desse fim se sobrepõe ao conjunto atual. Assim,
+a auditoria é O(n log n), sem comparar todos os pares de aulas.
+
+Aulas sobrepostas em cadeia (A com B, e B com C) formam um único grupo de conflito.
+"""
+
+from dataclasses import dataclass
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+# local imports
+from .ocupacao import DIAS
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+@dataclass
+class GrupoConflito:
+    # noinspection PyUnresolvedReferences
+    """Aulas sobrepostas na mesma sala, ou do mesmo professor, no mesmo dia
+
+    :arg tipo: 'sala' ou 'professor'
+    :type: str
+
+    :arg chave: código da sala ou nome do professor
+    :type: str
+
+    :arg dia: SEG, TER, QUA, QUI, SEX, SAB ou DOM
+    :type: str
+
+    :arg inicio: hora de inicio da primeira aula do grupo
+    :type: int
+
+    :arg fim: hora de fim da última aula do grupo
+    :type: int
+
+    :arg turmas: pares (código da disciplina, código da turma) envolvidos, sem repetições
+    :type: List[Tuple[str, str]]
+    """
+    tipo: str
+    chave: str
+    dia: str
+    inicio: int
+    fim: int
+    turmas: List[Tuple[str, str]]
+
+    def __repr__(self):
+        return f'<GrupoConflito [{self.tipo} {self.chave} {self.dia} {self.inicio}-{self.fim}: {len(self.turmas)} turmas]>'
+
+
+# (inicio, fim, disciplina, turma)
+_Intervalo = Tuple[int, int, str, str]
+
+
+def _varre(tipo: str, chave: str, dia: str, intervalos: List[_Intervalo]) -> List[GrupoConflito]:
+    """Encontra os grupos de intervalos sobrepostos de uma mesma chave e dia"""
+    intervalos.sort()
+    grupos = []
+
+    atual: List[_Intervalo] = []
+    fim_atual = -1
+    for intervalo in intervalos + [(25, 25, '', '')]:  # sentinela que fecha o último grupo
+        if intervalo[0] < fim_atual:
+            atual.append(intervalo)
+            fim_atual = max(fim_atual, intervalo[1])
+            continue
+
+        # a mesma turma pode repetir o horário (ex. uma linha por destino), o que não é conflito
+        turmas = list(dict.fromkeys((x[2], x[3]) for x in atual))
+        if len(turmas) > 1:
+            grupos.append(GrupoConflito(tipo, chave, dia, atual[0][0], fim_atual, turmas))
+        atual = [intervalo]
+        fim_atual = intervalo[1]
+    return grupos
+
+
+def audita_conflitos(micro: "Microhorario") -> List[GrupoConflito]:
+    """
+    Encontra todas as salas com aulas sobrepostas e todos os professores com turmas sobrepostas.
+
+    Horários sem sala não entram na auditoria das salas, e turmas sem professor não entram
+    na dos professores.
+
+    :param micro: o microhorario
+
+    :return: os grupos de conflito, primeiro os de salas e depois os de professores, ordenados
+    pela chave, dia e hora
+    """
+    por_sala: Dict[Tuple[str, str], List[_Intervalo]] = {}
+    por_professor: Dict[Tuple[str, str], List[_Intervalo]] = {}
+
+    for d in micro.disciplinas:
+        for t in d.turmas:
+            professor = t.professor.strip().upper()
+            for h in t.horarios:
+                if h is None or h.dia not in DIAS:
+                    continue
+                intervalo = (int(h.inicio), int(h.fim), d.codigo, t.codigo)
+                if intervalo[0] >= intervalo[1]:
+                    continue
+                if h.local:
+                    por_sala.setdefault((h.local, h.dia), []).append(intervalo)
+                if professor:
+                    por_professor.setdefault((professor, h.dia), []).append(intervalo)
+
+    grupos = []
+    for tipo, indice in (('sala', por_sala), ('professor', por_professor)):
+        for chave, dia in sorted(indice, key=lambda x: (x[0], DIAS.index(x[1]))):
+            grupos.extend(_varre(tipo, chave, dia, indice[(chave, dia)]))
+    return grupos
@@ -0,0 +1,201 @@
+"""Busca textual nas disciplinas, sem diferenciar acentos e maiúsculas
+
+O índice é invertido: cada palavra normalizada aponta para as disciplinas onde aparece, com um
+peso que depende do campo (código, nome, professor ou ementa). Para permitir buscas por partes
+de palavras, o vocabulário também é indexado por trigramas. Uma disciplina pode ser reindexada
+a qualquer momento, por exemplo quando a sua ementa é coletada.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from .models import Disciplina
+
+
+PESO_CODIGO = 8.0
+PESO_NOME = 4.0
+PESO_PROFESSOR = 2.0
+PESO_EMENTA = 1.0
+
+# mesmo com muitas repetições na ementa, uma palavra conta no máximo essa quantidade de vezes
+MAX_REPETICOES_EMENTA = 3
+
+# quanto vale um termo encontrado no começo ou no meio de uma palavra, em vez da palavra inteira
+FATOR_PREFIXO = 0.7
+FATOR_TRECHO = 0.4
+
+RE_NAO_PALAVRA = re.compile(r'[^a-z0-9]+')
+
+
+def normaliza(texto: str) -> List[str]:
+    """Separa o texto em palavras minúsculas, sem acentos e sem pontuação"""
+    sem_acento = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return [x for x in RE_NAO_PALAVRA.split(sem_acento.lower()) if x]
+
+
+def _trigramas(palavra: str) -> Set[str]:
+    return {palavra[i:i + 3] for i in range(len(palavra) - 2)}
+
+
+class IndiceBusca:
+    """Índice invertido das disciplinas, por código, nome, professores e ementa"""
+
+    def __init__(self, disciplinas: Optional[Iterable["Disciplina"]] = None):
+        """
+        Cria o índice
+
+        :param disciplinas: disciplinas a serem indexadas. Se None, o índice começa vazio
+        """
+        # codigo -> {palavra: peso}, usado para remover uma disciplina ao reindexar
+        self._documentos: Dict[str, Dict[str, float]] = {}
+        # palavra -> {codigo: peso}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        # trigrama -> palavras do vocabulário que o contém
+        self._trigramas: Dict[str, Set[str]] = {}
+        self._trava = threading.RLock()
+
+        for d in disciplinas or []:
+            self.atualiza(d)
+
+    def __repr__(self):
+        return f'<IndiceBusca [{len(self._documentos)} disciplinas]>'
+
+    def __len__(self):
+        return len(self._documentos)
+
+    @staticmethod
+    def pesos_disciplina(disciplina: "Disciplina") -> Dict[str, float]:
+        """Calcula o peso de cada palavra da disciplina, somando os campos onde ela aparece"""
+        pesos: Dict[str, float] = {}
+
+        def soma(palavras: Iterable[str], peso: float):
+            for p in palavras:
+                pesos[p] = pesos.get(p, 0.0) + peso
+
+        soma(normaliza(disciplina.codigo), PESO_CODIGO)
+        soma(set(normaliza(disciplina.nome)), PESO_NOME)
+        soma({p for t in disciplina.turmas for p in normaliza(t.professor)}, PESO_PROFESSOR)
+
+        if disciplina.extra_coletado:
+            contagem: Dict[str, int] = {}
+            for p in normaliza(disciplina.ementa):
+                contagem[p] = contagem.get(p, 0) + 1
+            for p, n in contagem.items():
+                pesos[p] = pesos.get(p, 0.0) + PESO_EMENTA * min(n, MAX_REPETICOES_EMENTA)
+
+        return pesos
+
+    def _insere(self, codigo: str, pesos: Dict[str, float]):
+        self._documentos[codigo] = pesos
+        for palavra, peso in pesos.items():
+            postings = self._postings.get(palavra)
+            if postings is None:
+                postings = self._postings[palavra] = {}
+                for tri in _trigramas(palavra):
+                    self._trigramas.setdefault(tri, set()).add(palavra)
+            postings[codigo] = peso
+
+    def remove(self, codigo: str):
+        """Remove uma disciplina do índice, se ela estiver indexada"""
+        with self._trava:
+            pesos = self._documentos.pop(codigo, None)
+            if pesos is None:
+                return
+            for palavra in pesos:
+                postings = self._postings[palavra]
+                del postings[codigo]
+                if postings:
+                    continue
+                # a palavra não aparece em mais nenhuma disciplina
+                del self._postings[palavra]
+                for tri in _trigramas(palavra):
+                    palavras = self._trigramas[tri]
+                    palavras.discard(palavra)
+                    if not palavras:
+                        del self._trigramas[tri]
+
+    def atualiza(self, disciplina: "Disciplina"):
+        """Indexa uma disciplina, substituindo a versão anterior dela, se existir"""
+        pesos = self.pesos_disciplina(disciplina)
+        with self._trava:
+            self.remove(disciplina.codigo)
+            self._insere(disciplina.codigo, pesos)
+
+    def _palavras_do_termo(self, termo: str) -> List[Tuple[str, float]]:
+        """Palavras do vocabulário que contém o termo, com o fator de cada uma"""
+        if len(termo) < 3:
+            candidatas: Iterable[str] = (x for x in self._postings if x.startswith(termo))
+        else:
+            conjuntos = [self._trigramas.get(x, set()) for x in _trigramas(termo)]
+            candidatas = set.intersection(*conjuntos) if all(conjuntos) else set()
+
+        ret = []
+        for palavra in candidatas:
+            if palavra == termo:
+                ret.append((palavra, 1.0))
+            elif palavra.startswith(termo):
+                ret.append((palavra, FATOR_PREFIXO))
+            elif termo in palavra:
+                ret.append((palavra, FATOR_TRECHO))
+        return ret
+
+    def busca(self, consulta: str, limite: Optional[int] = 20) -> List[Tuple[str, float]]:
+        """
+        Busca as disciplinas que contém todos os termos da consulta.
+
+        Cada termo pode ser uma palavra inteira, o começo ou um trecho de uma palavra. A
+        pontuação de cada termo é o maior peso das palavras encontradas, multiplicado pela
+        raridade da palavra (idf), e a pontuação final é a soma dos termos.
+
+        :param consulta: texto da busca, por exemplo "calculo integral" ou "INF1"
+
+        :param limite: quantidade máxima de resultados. Se None, retorna todos
+
+        :return: lista de pares (codigo, pontuacao), da maior para a menor pontuação
+        """
+        termos = list(dict.fromkeys(normaliza(consulta)))
+        if not termos:
+            return []
+
+        with self._trava:
+            total = len(self._documentos)
+            pontuacao: Optional[Dict[str, float]] = None
+            for termo in termos:
+                do_termo: Dict[str, float] = {}
+                for palavra, fator in self._palavras_do_termo(termo):
+                    postings = self._postings[palavra]
+                    idf = math.log(1 + total / len(postings))
+                    for codigo, peso in postings.items():
+                        valor = fator * peso * idf
+                        if valor > do_termo.get(codigo, 0.0):
+                            do_termo[codigo] = valor
+
+                # todos os termos precisam ser encontrados
+                if pontuacao is None:
+                    pontuacao = do_termo
+                else:
+                    pontuacao = {k: v + do_termo[k] for k, v in pontuacao.items() if k in do_termo}
+                if not pontuacao:
+                    return []
+
+        resultado = sorted(pontuacao.items(), key=lambda x: (-x[1], x[0]))
+        return resultado if limite is None else resultado[:limite]
+
+    def como_dados(self) -> dict:
+        """Retorna o índice em um dicionario serializável em JSON"""
+        with self._trava:
+            return {'documentos': {k: dict(v) for k, v in self._documentos.items()}}
+
+    @staticmethod
+    def de_dados(dados: dict) -> "IndiceBusca":
+        """Reconstrói o índice a partir do dicionario de `como_dados`, sem recalcular os pesos"""
+        indice = IndiceBusca()
+        for codigo, pesos in dados.get('documentos', {}).items():
+            indice._insere(codigo, pesos)
+        return indice
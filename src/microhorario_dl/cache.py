@@ -0,0 +1,77 @@
+import json
+import os
+import re
+import tempfile
+
+# typing stuff
+from typing import List, Optional, Tuple
+
+
+RE_CODIGO = re.compile(r'^[A-Z]{3}[0-9]{4}$')
+
+
+class CacheEmentas:
+    """Cache em disco das ementas, pré-requisitos e créditos coletados
+
+    Cada disciplina é salva em um arquivo `<codigo>.json` dentro do diretório do cache,
+    permitindo que coletas seguidas não precisem consultar novamente o site da PUC.
+    """
+
+    def __init__(self, diretorio: str):
+        """
+        Cria o cache, criando também o diretório se ele não existir
+
+        :param diretorio: caminho do diretório onde as ementas serão salvas
+        """
+        self._diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+    def __repr__(self):
+        return f'<CacheEmentas [{self._diretorio}]>'
+
+    @property
+    def diretorio(self) -> str:
+        """Diretório onde as ementas são salvas"""
+        return self._diretorio
+
+    def _caminho(self, codigo: str) -> str:
+        if RE_CODIGO.match(codigo) is None:
+            raise ValueError(f"Código de disciplina inválido: {codigo}")
+        return os.path.join(self._diretorio, f'{codigo}.json')
+
+    def get(self, codigo: str) -> Optional[Tuple[str, List[List[str]], Optional[int]]]:
+        """
+        Retorna os dados salvos de uma disciplina, no mesmo formato de `consulta_extra`
+
+        :param codigo: código da disciplina no formato XXX0000
+
+        :return: a tupla (ementa, prerequisitos, creditos), ou None se não estiver no cache
+        """
+        try:
+            with open(self._caminho(codigo), encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return dados.get('ementa'), dados.get('prerequisitos', []), dados.get('creditos')
+
+    def set(self, codigo: str, ementa: str, prerequisitos: List[List[str]], creditos: Optional[int]):
+        """
+        Salva os dados de uma disciplina no cache.
+
+        O arquivo é escrito por completo antes de substituir o anterior, para que
+        leituras concorrentes nunca encontrem um arquivo pela metade.
+        """
+        caminho = self._caminho(codigo)
+        fd, temporario = tempfile.mkstemp(dir=self._diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'ementa': ementa,
+                    'prerequisitos': prerequisitos,
+                    'creditos': creditos
+                }, f, ensure_ascii=False)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.remove(temporario)
+            raise
@@ -0,0 +1,191 @@
+"""Interface de linha de comando do microhorario-dl
+
+Baixa o microhorario e escreve as disciplinas à medida que ficam prontas, em NDJSON
+(uma disciplina por linha) ou em um único json no mesmo formato de `Microhorario.as_json`.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# typing stuff
+from typing import List, Optional, TextIO
+
+# local imports
+from . import Microhorario, __version__
+from .cache import CacheEmentas
+from .contexto import ContextoDownload
+from .models import Disciplina
+from .payloads import FiltrosConsulta
+from .perfil import PerfilMemoria, etapa, perfil_do_ambiente
+
+
+FORMATOS = ('ndjson', 'json')
+
+
+def _cria_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='microhorario-dl',
+        description='Baixa as disciplinas do Microhorario da PUC-Rio.'
+    )
+    parser.add_argument('-o', '--saida', default='-',
+                        help="arquivo de saída. '-' para a saída padrão (padrão: %(default)s)")
+    parser.add_argument('-f', '--formato', choices=FORMATOS, default='ndjson',
+                        help='formato da saída (padrão: %(default)s)')
+    parser.add_argument('-d', '--departamento', action='append', default=None, metavar='CODIGO',
+                        help='escreve somente as disciplinas do departamento. Pode ser repetido.')
+    parser.add_argument('-e', '--ementas', action='store_true',
+                        help='coleta também as ementas, pré-requisitos e créditos de cada disciplina')
+    parser.add_argument('-j', '--concorrencia', type=int, default=4,
+                        help='quantidade de consultas simultâneas das ementas (padrão: %(default)s)')
+    parser.add_argument('-p', '--processos', type=int, default=0,
+                        help='processos para o parsing das ementas. 0 faz o parsing nas threads (padrão: %(default)s)')
+    parser.add_argument('--cache-ementas', default=None, metavar='DIRETORIO',
+                        help='diretório usado como cache das ementas coletadas')
+    gravacao = parser.add_mutually_exclusive_group()
+    gravacao.add_argument('--gravar', default=None, metavar='ARQUIVO',
+                          help='grava todas as requisições HTTP no arquivo, para serem reproduzidas depois')
+    gravacao.add_argument('--reproduzir', default=None, metavar='ARQUIVO',
+                          help='responde as requisições com uma gravação, sem acessar a rede')
+    parser.add_argument('--perfil-memoria', default=None, metavar='ARQUIVO',
+                        help='mede a memória de cada etapa e escreve o relatório em json no arquivo')
+    parser.add_argument('--prazo', type=float, default=None, metavar='SEGUNDOS',
+                        help='prazo para começar as consultas do microhorario (sem as ementas)')
+    parser.add_argument('--hedge', type=float, default=None, metavar='SEGUNDOS',
+                        help='pede de novo as ementas que demorarem mais que esse tempo, usando a primeira resposta')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='imprime o progresso na saída de erro')
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    return parser
+
+
+class _Escritor:
+    """Escreve as disciplinas na saída, uma de cada vez"""
+
+    def __init__(self, saida: TextIO, formato: str, micro: Microhorario):
+        self._saida = saida
+        self._formato = formato
+        self._primeira = True
+
+        if formato == 'json':
+            # escreve o cabeçalho, com as mesmas chaves de `as_json`, deixando a lista de disciplinas aberta
+            cabecalho = json.dumps(micro._cabecalho_json(), ensure_ascii=False)
+            saida.write(cabecalho[:-1] + ', "disciplinas": [')
+
+    def escreve(self, disciplina: Disciplina):
+        texto = json.dumps(disciplina.as_dict(), ensure_ascii=False)
+        if self._formato == 'ndjson':
+            self._saida.write(texto + '\n')
+        else:
+            self._saida.write(texto if self._primeira else ', ' + texto)
+        self._primeira = False
+        self._saida.flush()
+
+    def finaliza(self):
+        if self._formato == 'json':
+            self._saida.write(']}\n')
+        self._saida.flush()
+
+
+def executa(args: argparse.Namespace, saida: TextIO):
+    """Executa o download e escreve o resultado na saída, seguindo os argumentos"""
+    def progresso(mensagem: str):
+        if args.verbose:
+            print(mensagem, file=sys.stderr)
+
+    perfil = PerfilMemoria(args.perfil_memoria) if args.perfil_memoria else perfil_do_ambiente()
+
+    cliente = None
+    if args.gravar:
+        from .transporte import ClienteGravador
+        cliente = ClienteGravador()
+    elif args.reproduzir:
+        from .transporte import ClienteReprodutor
+        cliente = ClienteReprodutor(args.reproduzir)
+
+    try:
+        _executa(args, saida, progresso, perfil, cliente)
+    finally:
+        if args.gravar:
+            cliente.salva(args.gravar)
+
+
+def _executa(args: argparse.Namespace, saida: TextIO, progresso, perfil: Optional[PerfilMemoria], cliente):
+    """Faz o download e escreve as disciplinas, usando o cliente HTTP informado"""
+    progresso("Baixando o microhorario...")
+    # com um único departamento, o próprio servidor filtra, e o csv baixado é bem menor.
+    # Com as ementas, o csv precisa ser completo: os pré-requisitos de outros departamentos
+    # só entram nos grupos se as disciplinas deles estiverem no microhorario
+    filtros = None
+    if args.departamento and len(args.departamento) == 1 and not args.ementas:
+        filtros = FiltrosConsulta(departamento=args.departamento[0].upper())
+    contexto = ContextoDownload(cliente=cliente, filtros=filtros)
+    micro = Microhorario.download(contexto, manter_crus=False, perfil=perfil, prazo=args.prazo)
+
+    disciplinas = micro.disciplinas
+    if args.departamento:
+        departamentos = {x.upper() for x in args.departamento}
+        disciplinas = [x for x in disciplinas if x.departamento.codigo in departamentos]
+    progresso(f"{len(disciplinas)} disciplinas encontradas")
+
+    escritor = _Escritor(saida, args.formato, micro)
+
+    if args.ementas:
+        cache = CacheEmentas(args.cache_ementas) if args.cache_ementas else None
+        coletadas = micro.iter_coletar_extra(
+            codigos=[x.codigo for x in disciplinas],
+            concorrencia=args.concorrencia,
+            cache=cache,
+            processos=args.processos,
+            cliente=cliente,
+            espera=0 if args.reproduzir else 0.2,
+            atraso_hedge=args.hedge,
+            metricas=contexto.metricas
+        )
+        with etapa(perfil, 'coletar_extra'):
+            for i, disciplina in enumerate(coletadas):
+                progresso(f"[{i + 1}/{len(disciplinas)}] Coletada ementa de [{disciplina.codigo}]")
+                escritor.escreve(disciplina)
+    else:
+        for disciplina in disciplinas:
+            escritor.escreve(disciplina)
+
+    escritor.finaliza()
+
+    for nome, valores in contexto.metricas.resumo().items():
+        progresso(
+            f"{nome}: {valores['quantidade']} requisições, p50 {valores['p50']:.3f}s, "
+            f"p99 {valores['p99']:.3f}s, máximo {valores['maximo']:.3f}s"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada do comando `microhorario-dl`"""
+    args = _cria_parser().parse_args(argv)
+
+    if args.concorrencia < 1:
+        print("microhorario-dl: a concorrência deve ser pelo menos 1", file=sys.stderr)
+        return 2
+    if args.hedge is not None and args.hedge <= 0:
+        print("microhorario-dl: o tempo do hedge deve ser positivo", file=sys.stderr)
+        return 2
+    if args.processos < 0:
+        print("microhorario-dl: a quantidade de processos não pode ser negativa", file=sys.stderr)
+        return 2
+
+    try:
+        if args.saida == '-':
+            executa(args, sys.stdout)
+        else:
+            with open(args.saida, 'w', encoding='utf-8') as saida:
+                executa(args, saida)
+    except BrokenPipeError:
+        # a saída foi fechada antes do fim (ex. `microhorario-dl | head`).
+        # redireciona o restante para o devnull, evitando outro erro ao fechar o python
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+    return 0
@@ -0,0 +1,376 @@
+"""Snapshot do microhorario em um arquivo mapeado em memória, para vários processos
+
+Objetos Python não podem ser compartilhados entre processos, então o snapshot é publicado
+uma única vez em um arquivo binário somente leitura. Cada processo mapeia o arquivo com
+`mmap`, e as páginas ficam uma única vez no cache do sistema operacional, independente da
+quantidade de processos. Usando um caminho em `/dev/shm`, o arquivo nem chega ao disco.
+
+Cada processo guarda somente o cabeçalho e a tabela de posições das disciplinas. Uma
+disciplina só é convertida em objeto quando é acessada, junto com os pré-requisitos que
+ainda não foram convertidos.
+
+Formato do arquivo:
+
+    MAGICO (4 bytes) | versão (uint32) | tamanho do cabeçalho (uint32) | cabeçalho (JSON) | disciplinas (JSON)
+
+O cabeçalho guarda as informações gerais e, para cada disciplina, o código, a posição e o
+tamanho do seu JSON (no formato de `Disciplina.as_dict`) dentro da área das disciplinas.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+# local imports
+from .models import Alocacao, Departamento, Destino, Disciplina, RawDisciplina, Turma
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+MAGICO = b'MHDL'
+VERSAO = 1
+PREFIXO = struct.Struct('<4sII')
+
+
+def publica_snapshot(micro: "Microhorario", caminho: str):
+    """
+    Escreve o snapshot do microhorario no arquivo. O arquivo só fica visível depois de
+    completamente escrito, então processos podem abrir o caminho a qualquer momento.
+
+    :param micro: o microhorario publicado
+
+    :param caminho: caminho do arquivo, de preferência em `/dev/shm`
+    """
+    corpo, posicoes = bytearray(), []
+    for d in micro.disciplinas:
+        dados = json.dumps(d.as_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        posicoes.append((d.codigo, len(corpo), len(dados)))
+        corpo += dados
+
+    cabecalho = json.dumps({
+        'periodo': micro.periodo,
+        'emissao': micro.emissao,
+        'atualizacao': micro.atualizacao,
+        'modo_fallback': micro.is_modo_fallback,
+        'departamentos': [{'codigo': x.codigo, 'nome': x.nome} for x in micro.departamentos],
+        'destinos': [{'codigo': k, 'nome': v} for k, v in micro.destinos.items()],
+        'disciplinas': posicoes,
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(PREFIXO.pack(MAGICO, VERSAO, len(cabecalho)))
+            f.write(cabecalho)
+            f.write(corpo)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+
+class MicrohorarioCompartilhado:
+    """Visão somente leitura de um snapshot publicado com `publica_snapshot`
+
+    Possui as mesmas consultas do `Microhorario` (`disciplinas`, `departamentos`, `destinos`,
+    `raw`, `as_json`, `buscar`, `ocupacao_salas`, `estatisticas`, `auditar_conflitos`,
+    `validar_matriculas`, `exportar_sqlite` e `exportar_parquet`), além de `disciplina` para
+    acessar uma única disciplina sem converter as outras.
+
+    Por ser somente leitura, a visão não coleta ementas nem pré-requisitos: `iter_coletar_extra`,
+    `coletar_extra`, `coletar_sob_demanda`, `planejar_coleta` e `executar_plano` não existem
+    aqui. Colete antes de publicar o snapshot.
+    """
+
+    def __init__(self, caminho: str, tamanho_cache: int = 2048):
+        """
+        Mapeia o arquivo do snapshot em memória.
+
+        O arquivo pode ser substituído por uma nova publicação enquanto estiver aberto: a
+        visão continua usando a versão antiga até ser fechada e aberta novamente.
+
+        :param caminho: caminho do arquivo publicado
+
+        :param tamanho_cache: quantidade máxima de disciplinas convertidas guardadas
+        """
+        with open(caminho, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magico, versao, tamanho = PREFIXO.unpack_from(self._mapa, 0)
+        if magico != MAGICO or versao != VERSAO:
+            self._mapa.close()
+            raise ValueError(f"{caminho} não é um snapshot compartilhado (versão {VERSAO})")
+
+        inicio = PREFIXO.size
+        cabecalho = json.loads(self._mapa[inicio:inicio + tamanho])
+        self._base = inicio + tamanho
+
+        self._periodo: str = cabecalho['periodo']
+        self._emissao: str = cabecalho['emissao']
+        self._atualizacao: str = cabecalho['atualizacao']
+        self._modo_fallback: bool = cabecalho['modo_fallback']
+        self._departamentos: Dict[str, Departamento] = {
+            x['codigo']: Departamento(codigo=x['codigo'], nome=x['nome']) for x in cabecalho['departamentos']
+        }
+        self._destinos: Dict[str, str] = {x['codigo']: x['nome'] for x in cabecalho['destinos']}
+        self._posicoes: Dict[str, Tuple[int, int]] = {
+            codigo: (posicao, tamanho) for codigo, posicao, tamanho in cabecalho['disciplinas']
+        }
+
+        self._tamanho_cache = tamanho_cache
+        self._cache: "OrderedDict[str, Disciplina]" = OrderedDict()
+        # todas as disciplinas convertidas ainda em uso, no cache ou como pré-requisito de outra
+        self._vivas: "weakref.WeakValueDictionary[str, Disciplina]" = weakref.WeakValueDictionary()
+        self._trava = threading.Lock()
+        self._indice = None
+        self._ocupacao = None
+        self._estatisticas = None
+
+    def __repr__(self):
+        return f'<MicrohorarioCompartilhado [{self._periodo} {len(self._posicoes)} disciplinas]>'
+
+    def __len__(self):
+        return len(self._posicoes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fecha()
+
+    def fecha(self):
+        """Desfaz o mapeamento do arquivo. Depois disso, as disciplinas não podem ser acessadas"""
+        self._mapa.close()
+
+    @property
+    def is_modo_fallback(self):
+        """Retorna se o microhorario está em modo fallback"""
+        return self._modo_fallback
+
+    @property
+    def periodo(self):
+        """O perído atual do microhorario"""
+        return self._periodo
+
+    @property
+    def emissao(self):
+        """A data de emissão do download do microhorario"""
+        return self._emissao
+
+    @property
+    def atualizacao(self):
+        """A última atualização do microhorario"""
+        return self._atualizacao
+
+    @property
+    def codigos(self) -> List[str]:
+        """Códigos de todas as disciplinas, sem converter nenhuma"""
+        return list(self._posicoes)
+
+    @property
+    def disciplinas(self) -> List[Disciplina]:
+        """Lista de todas as disciplinas. Converte as que ainda não foram acessadas"""
+        return [self.disciplina(x) for x in self._posicoes]
+
+    @property
+    def departamentos(self) -> List[Departamento]:
+        """Lista dos departamentos encontrados."""
+        return list(self._departamentos.values())
+
+    @property
+    def destinos(self) -> Dict[str, str]:
+        """Dicionário com o código e o nome de cada destino"""
+        return dict(self._destinos)
+
+    def _le_dict(self, codigo: str) -> dict:
+        """Lê o JSON de uma disciplina direto do arquivo mapeado"""
+        posicao, tamanho = self._posicoes[codigo]
+        inicio = self._base + posicao
+        return json.loads(self._mapa[inicio:inicio + tamanho])
+
+    def disciplina(self, codigo: str) -> Optional[Disciplina]:
+        """
+        Retorna uma disciplina, convertendo-a somente se ela ainda não existir nesta visão.
+
+        Todas as disciplinas de uma visão formam um único grafo: os pré-requisitos são os
+        mesmos objetos retornados por `disciplina`, mesmo depois de saírem do cache.
+
+        :param codigo: código da disciplina
+
+        :return: a disciplina, ou None se ela não existir no snapshot
+        """
+        if codigo not in self._posicoes:
+            return None
+        with self._trava:
+            disc = self._cache.get(codigo)
+            if disc is not None:
+                self._cache.move_to_end(codigo)
+                return disc
+
+            disc = self._vivas.get(codigo)
+            if disc is None:
+                disc = self._converte(codigo)
+
+            self._cache[codigo] = disc
+            if len(self._cache) > self._tamanho_cache:
+                self._cache.popitem(last=False)
+            return disc
+
+    def _cria(self, codigo: str) -> Tuple[Disciplina, dict]:
+        """Cria a disciplina, sem os pré-requisitos, e a registra entre as disciplinas vivas"""
+        dados = self._le_dict(codigo)
+        departamento = self._departamentos.get(dados['departamento'])
+        if departamento is None:
+            departamento = Departamento(codigo=dados['departamento'], nome=dados['departamento'])
+        disc = Disciplina(
+            codigo=dados['codigo'],
+            nome=dados['nome'],
+            creditos=dados['creditos'],
+            pre_req=dados['pre_req'],
+            departamento=departamento
+        )
+        for t in dados['turmas']:
+            disc.add_turma(Turma(
+                professor=t['professor'],
+                codigo=t['codigo'],
+                turno=t['turno'],
+                horario_distancia=t['horario_distancia'],
+                shf=t['shf'],
+                horario_e_localizacao=t['horario_local'],
+                alocacoes=[
+                    Alocacao(Destino(a['destino'], self._destinos.get(a['destino'], a['destino'])), a['vagas'])
+                    for a in t['alocacoes']
+                ]
+            ))
+        self._vivas[codigo] = disc
+        return disc, dados
+
+    def _converte(self, codigo: str) -> Disciplina:
+        """
+        Converte a disciplina e os pré-requisitos que ainda não existem nesta visão, usando uma
+        fila em vez de recursão. Deve ser chamada com `_trava`.
+
+        Somente a disciplina pedida entra no cache. Os pré-requisitos continuam vivos enquanto
+        alguma disciplina apontar para eles, e são reaproveitados por `disciplina`.
+        """
+        disc, dados = self._cria(codigo)
+        pendentes = [(disc, dados)]
+        while pendentes:
+            atual, dados = pendentes.pop()
+            if dados['ementa'] is None:
+                continue
+
+            grupos = []
+            for grupo in dados.get('prerequisitos') or []:
+                requisitos = []
+                for x in grupo:
+                    if x not in self._posicoes:
+                        continue
+                    requisito = self._vivas.get(x)
+                    if requisito is None:
+                        requisito, dados_requisito = self._cria(x)
+                        pendentes.append((requisito, dados_requisito))
+                    requisitos.append(requisito)
+                grupos.append(requisitos)
+
+            atual.ementa = dados['ementa']
+            atual.prerequisitos = grupos
+        return disc
+
+    @property
+    def raw(self) -> dict:
+        """Dicionario no formato dos dados baixados, gerado a partir do snapshot"""
+        disciplinas = []
+        for codigo in self._posicoes:
+            d = self._le_dict(codigo)
+            disciplinas.extend(
+                RawDisciplina(
+                    codigo=d['codigo'],
+                    nome=d['nome'],
+                    professor=t['professor'],
+                    creditos=d['creditos'],
+                    turma=t['codigo'],
+                    destino=a['destino'],
+                    vaga=a['vagas'],
+                    turno=t['turno'],
+                    horario_local=t['horario_local'],
+                    horas_distancia=t['horario_distancia'],
+                    shf=t['shf'],
+                    pre_req=d['pre_req'],
+                    depto=d['departamento']
+                )
+                for t in d['turmas'] for a in t['alocacoes']
+            )
+        return {
+            'periodo': self._periodo,
+            'emissao': self._emissao,
+            'atualizacao': self._atualizacao,
+            'disciplinas': disciplinas
+        }
+
+    def as_json(self) -> dict:
+        """Retorna o snapshot no mesmo formato de `Microhorario.as_json`, sem converter as disciplinas"""
+        return {
+            'periodo': self._periodo,
+            'emissao': self._emissao,
+            'atualizacao': self._atualizacao,
+            'departamentos': [{'nome': x.nome, 'codigo': x.codigo} for x in self._departamentos.values()],
+            'destinos': [{'nome': v, 'codigo': k} for k, v in self._destinos.items()],
+            'modo_fallback': self._modo_fallback,
+            'disciplinas': [self._le_dict(x) for x in self._posicoes]
+        }
+
+    def indice_busca(self):
+        """Índice de busca das disciplinas, criado no primeiro acesso (ver `Microhorario.indice_busca`)"""
+        if self._indice is None:
+            from .busca import IndiceBusca
+            self._indice = IndiceBusca(self.disciplinas)
+        return self._indice
+
+    def buscar(self, consulta: str, limite: Optional[int] = 20) -> List[Disciplina]:
+        """Busca disciplinas pelo código, nome, professores e ementa (ver `Microhorario.buscar`)"""
+        return [self.disciplina(x) for x, _ in self.indice_busca().busca(consulta, limite)]
+
+    def ocupacao_salas(self):
+        """Ocupação das salas na semana, montada no primeiro acesso (ver `Microhorario.ocupacao_salas`)"""
+        if self._ocupacao is None:
+            from .ocupacao import OcupacaoSalas
+            self._ocupacao = OcupacaoSalas(self)
+        return self._ocupacao
+
+    def estatisticas(self):
+        """Estatísticas agregadas, calculadas no primeiro acesso (ver `Microhorario.estatisticas`)"""
+        if self._estatisticas is None:
+            from .estatisticas import EstatisticasMicrohorario
+            self._estatisticas = EstatisticasMicrohorario(self.disciplinas)
+        return self._estatisticas
+
+    def auditar_conflitos(self):
+        """Salas e professores com aulas sobrepostas (ver `Microhorario.auditar_conflitos`)"""
+        from .auditoria import audita_conflitos
+        return audita_conflitos(self)
+
+    def validar_matriculas(self, planos, processos: int = 0, disputar_vagas: bool = False):
+        """Valida muitos planos de matrícula de uma vez (ver `Microhorario.validar_matriculas`)"""
+        from .matricula import ValidadorMatriculas
+        return ValidadorMatriculas(self).valida_lote(planos, processos=processos, disputar_vagas=disputar_vagas)
+
+    def exportar_sqlite(self, caminho: str):
+        """Exporta o snapshot para um banco SQLite (ver `Microhorario.exportar_sqlite`)"""
+        from .sqlite import exporta_sqlite
+        exporta_sqlite(self, caminho)
+
+    def exportar_parquet(self, caminho_turmas: str, caminho_alocacoes: str, formato: str = 'parquet', **kwargs):
+        """Exporta as turmas e as alocações em Parquet ou Arrow IPC (ver `Microhorario.exportar_parquet`)"""
+        from .parquet import exporta_parquet
+        exporta_parquet(self, caminho_turmas, caminho_alocacoes, formato=formato, **kwargs)
@@ -1,5 +1,4 @@
 import re
-import requests
 from warnings import warn
 from bs4 import BeautifulSoup
 
@@ -9,7 +8,8 @@ from bs4.element import Tag
 from requests import Response
 
 # local modules
-from .payloads import PayloadMicrohorario
+from .contexto import ContextoDownload
+from .payloads import PayloadMicrohorario, PayloadModo
 from .utils import URL_CONSULTA, URL_INICIAL, USER_AGENT, pegar_sessao_da_url
 from .exceptions import EmptyTagValueError, TagNotFoundError, NotCSVError, PatternNotFoundError, WebExceptionError
 
@@ -30,11 +30,16 @@ def de_opcoes_para_dicionario(t: Tag) -> Dict[str, str]:
     return ret
 
 
-def consulta_excecao(conteudo: str) -> Response:
+def consulta_excecao(conteudo: str, contexto: ContextoDownload) -> Response:
     """
     Caso a primeira consulta foi redirecionada para a página de erro.
     Caso isso tenha acontecido, tenta ver se o "Horários e Salas" está disponível.
     Nesse caso, retorna a requisição para a página de consulta.
+
+    O modo do `contexto` é alterado para o "Horários e Salas".
+
+    :param conteudo: html da página de erro
+    :param contexto: contexto do download atual
     """
     # faz o parsing do conteudo
     soup = BeautifulSoup(conteudo, features='html.parser')
@@ -54,19 +59,22 @@ def consulta_excecao(conteudo: str) -> Response:
     if link_correto is None or "WebMicroHorarioConsulta" not in link_correto:
         raise WebExceptionError("Link de redirecionamento não é o esperado")
 
-    # altera o modo e avisa
-    PayloadMicrohorario.altera_modo()
+    # altera o modo (somente deste download) e avisa
+    contexto.modo = PayloadModo.HORARIO
     warn("Microhorário indisponível, utilizando 'Horarios e Salas' como alternativa. "
          "A quantidade de créditos e as alocações (vagas por turma) estarão indisponíveis.")
 
-    # faz a requisição para o link correto
-    return requests.get(
-        url=link_correto,
-        headers={"User-Agent": USER_AGENT}
-    )
+    # faz a requisição para o link correto. A consulta inicial já foi medida,
+    # então a do 'Horarios e Salas' fica em uma etapa separada
+    with contexto.mede('excecao'):
+        return contexto.http.get(
+            url=link_correto,
+            headers={"User-Agent": USER_AGENT},
+            timeout=contexto.timeout('inicial')
+        )
 
 
-def consulta_inicial() -> Dict[str, Any]:
+def consulta_inicial(contexto: Optional[ContextoDownload] = None) -> Dict[str, Any]:
     """
     Faz a primeira consulta no site do microhorario
 
@@ -74,6 +82,9 @@ def consulta_inicial() -> Dict[str, Any]:
     as variáveis para o ASP.NET, a sessão do usuário,
     e também o nome dos departamentos e destinos.
 
+    :param contexto: contexto do download, que guarda o modo, o cliente HTTP e o estado
+    de cada consulta. Se None, é criado um novo contexto
+
     :return: dicionario contendo os cookies e os dados necessários
     """
 
@@ -96,11 +107,14 @@ def consulta_inicial() -> Dict[str, Any]:
                 else:
                     return valor
 
-    r = requests.get(
-        url=URL_INICIAL,
-        headers={"User-Agent": USER_AGENT},
-        allow_redirects=True
-    )
+    contexto = contexto if contexto is not None else ContextoDownload()
+    with contexto.mede('inicial'):
+        r = contexto.http.get(
+            url=URL_INICIAL,
+            headers={"User-Agent": USER_AGENT},
+            allow_redirects=True,
+            timeout=contexto.timeout('inicial')
+        )
 
     # pegando os cookies (juntando com os redirects)
     cookies: dict = r.cookies.get_dict()
@@ -109,7 +123,7 @@ def consulta_inicial() -> Dict[str, Any]:
 
     # se foi redirecionado para uma excecao, tenta acessar o link correto
     if "WebExcecao" in r.url:
-        r = consulta_excecao(r.text)
+        r = consulta_excecao(r.text, contexto)
 
     # pegando propriedades do ASP.NET
     soup = BeautifulSoup(r.text, features='html.parser')
@@ -128,9 +142,10 @@ def consulta_inicial() -> Dict[str, Any]:
     # pegando a sessao
     sessao = pegar_sessao_da_url(r.url)
 
-    return {
+    ret = {
         'cookies': cookies,
         'sessao': sessao,
+        'modo': contexto.modo,
         'departamentos': departamentos,
         'destinos': destinos,
         'dados': {
@@ -148,9 +163,12 @@ def consulta_inicial() -> Dict[str, Any]:
             )
         }
     }
+    contexto.atualiza(ret)
+    contexto.filtros_da_sessao = contexto.filtros
+    return ret
 
 
-def consulta_intermediaria(dados_iniciais: Dict[str, Any]):
+def consulta_intermediaria(dados_iniciais: Dict[str, Any], contexto: Optional[ContextoDownload] = None):
     """
     Usando os dados iniciais da primeira consulta, é realiada um segunda consulta simulando
     uma pesquisa sem filtro, para atualizar as variáveis do ASP.NET necessárias para fazer
@@ -160,6 +178,7 @@ def consulta_intermediaria(dados_iniciais: Dict[str, Any]):
     utilizar. Por isso, para atualizar as variáveis, são utilizados regex
 
     :param dados_iniciais: dicionario retornada pela `consulta_inicial`
+    :param contexto: contexto do download. Se None, é criado a partir de `dados_iniciais`
     :return: dicionario com os novos dados da consulta
     """
     def regex_ou_aborta(nome: str, pattern: str, string: str) -> str:
@@ -168,29 +187,34 @@ def consulta_intermediaria(dados_iniciais: Dict[str, Any]):
             raise PatternNotFoundError(nome=nome, regex=pattern)
         return m.group(1)
 
-    payload: dict = PayloadMicrohorario.intermediario()
+    contexto = contexto if contexto is not None else ContextoDownload.de_dados(dados_iniciais)
+
+    payload: dict = PayloadMicrohorario.intermediario(contexto.modo, contexto.filtros)
     payload.update(dados_iniciais['dados'])     # adiciona as variaveis coletadas no dados iniciais
 
     cookies = dados_iniciais.get('cookies')
     sessao = dados_iniciais.get('sessao')
 
-    r = requests.post(
-        url=URL_CONSULTA,
-        cookies=cookies,
-        params={'sessao': sessao},
-        headers={
-            'User-Agent': USER_AGENT,
-            'Accept': 'text/plain',
-            'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8',
-            'Origin': "http://microhorario.rdc.puc-rio.br",     # noqa
-        },
-        data=payload
-    )
+    with contexto.mede('intermediaria'):
+        r = contexto.http.post(
+            url=URL_CONSULTA,
+            cookies=cookies,
+            params={'sessao': sessao},
+            headers={
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/plain',
+                'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8',
+                'Origin': "http://microhorario.rdc.puc-rio.br",     # noqa
+            },
+            data=payload,
+            timeout=contexto.timeout('intermediaria')
+        )
 
     # pegando as novas informacoes
-    return {
+    ret = {
         'cookies': cookies,
         'sessao': sessao,
+        'modo': contexto.modo,
         'dados': {
             '__VIEWSTATEGENERATOR': regex_ou_aborta(
                 nome='VIEWSTATEGENERATOR',
@@ -209,9 +233,13 @@ def consulta_intermediaria(dados_iniciais: Dict[str, Any]):
             )
         }
     }
+    contexto.atualiza(ret)
+    contexto.filtros_da_sessao = contexto.filtros
+    return ret
 
 
-def consulta_final(dados_intermediarios: Dict[str, Union[Tag, str, dict]]) -> str:
+def consulta_final(dados_intermediarios: Dict[str, Union[Tag, str, dict]],
+                   contexto: Optional[ContextoDownload] = None) -> str:
     """
     Faz a consulta final, para obter o CSV com todas as disciplinas no microhorario.
 
@@ -220,33 +248,39 @@ def consulta_final(dados_intermediarios: Dict[str, Union[Tag, str, dict]]) -> st
 
     :param dados_intermediarios: dados da consulta intermediaria
 
+    :param contexto: contexto do download. Se None, é criado a partir de `dados_intermediarios`
+
     :return: o texto do csv baixado
     """
     # preparando os dados
-    payload: dict = PayloadMicrohorario.final()
+    contexto = contexto if contexto is not None else ContextoDownload.de_dados(dados_intermediarios)
+
+    payload: dict = PayloadMicrohorario.final(contexto.modo, contexto.filtros)
     payload.update(dados_intermediarios.get('dados'))     # adiciona as variaveis coletadas no dados iniciais
 
     cookies = dados_intermediarios.get('cookies')
     sessao = dados_intermediarios.get('sessao')
 
     # preparando a consulta
-    r = requests.post(
-        url=URL_CONSULTA,
-        cookies=cookies,
-        headers={
-            'Host': "microhorario.rdc.puc-rio.br",
-            'User-Agent': USER_AGENT,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': "en-US,en;q=0.5",
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Origin': "http://microhorario.rdc.puc-rio.br",  # noqa
-            'Connection': 'keep-alive',
-            'Referer': f"{URL_CONSULTA}?sessao={sessao}",
-            'Upgrade-Insecure-Requests': '1',
-        },
-        params={'sessao': sessao},
-        data=payload
-    )
+    with contexto.mede('final'):
+        r = contexto.http.post(
+            url=URL_CONSULTA,
+            cookies=cookies,
+            headers={
+                'Host': "microhorario.rdc.puc-rio.br",
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+                'Accept-Language': "en-US,en;q=0.5",
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'Origin': "http://microhorario.rdc.puc-rio.br",  # noqa
+                'Connection': 'keep-alive',
+                'Referer': f"{URL_CONSULTA}?sessao={sessao}",
+                'Upgrade-Insecure-Requests': '1',
+            },
+            params={'sessao': sessao},
+            data=payload,
+            timeout=contexto.timeout('final')
+        )
 
     if 'text/csv' not in r.headers.get('Content-Type'):
         raise NotCSVError
@@ -254,3 +288,43 @@ def consulta_final(dados_intermediarios: Dict[str, Union[Tag, str, dict]]) -> st
     # pega o texto usando o encoding correto
     r.encoding = 'utf-16'
     return r.text
+
+
+def consulta_csv(contexto: Optional[ContextoDownload] = None, reaproveitar_sessao: bool = True) -> str:
+    """
+    Baixa o CSV do microhorario, fazendo somente as consultas necessárias.
+
+    Se o `contexto` já tiver uma sessão de um download anterior (cookies, sessão e variáveis
+    do ASP.NET) criada com os mesmos filtros, a consulta final é feita diretamente,
+    economizando as duas primeiras consultas. Se o servidor recusar a sessão (`NotCSVError`),
+    a sequência completa é refeita, e o `contexto` fica com a nova sessão.
+
+    No modo fallback, os filtros que não existem no Horarios e Salas são ignorados, com um
+    único aviso por download.
+
+    :param contexto: contexto do download. Se None, é criado um novo contexto
+
+    :param reaproveitar_sessao: se False, sempre faz a sequência completa
+
+    :return: o texto do csv baixado
+    """
+    contexto = contexto if contexto is not None else ContextoDownload()
+    texto = None
+
+    if reaproveitar_sessao and contexto.tem_sessao:
+        try:
+            texto = consulta_final(contexto.como_dados(), contexto)
+        except NotCSVError:
+            # a sessão expirou. o modo volta ao inicial, e o fallback é detectado novamente
+            contexto.limpa_sessao()
+
+    if texto is None:
+        inicio = consulta_inicial(contexto)
+        inter = consulta_intermediaria(inicio, contexto)
+        texto = consulta_final(inter, contexto)
+
+    if contexto.is_modo_fallback and contexto.filtros is not None:
+        ignorados = contexto.filtros.ignorados_no_fallback()
+        if ignorados:
+            warn(f"Filtros não suportados pelo 'Horarios e Salas' foram ignorados: {', '.join(ignorados)}")
+    return texto
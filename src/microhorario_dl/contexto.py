@@ -0,0 +1,149 @@
+__all__ = ["ContextoDownload"]
+
+import time
+
+# typing stuff
+from typing import Any, ContextManager, Dict, Optional, Tuple
+
+# local imports
+from .exceptions import DeadlineExceededError
+from .latencia import MetricasLatencia
+from .payloads import FiltrosConsulta, PayloadModo
+from .utils import TEMPO_CONEXAO, TEMPOS_LEITURA
+
+
+class ContextoDownload:
+    """Estado de um único download do microhorario
+
+    Guarda o modo dos payloads, o cliente HTTP, os cookies, a sessão e as variáveis do ASP.NET
+    obtidas em cada consulta. Como nada disso é global, vários downloads podem ser feitos ao
+    mesmo tempo, em threads ou tarefas diferentes, cada um com o seu próprio contexto.
+    """
+
+    def __init__(self,
+                 cliente=None,
+                 modo: PayloadModo = PayloadModo.MICROHORARIO,
+                 tempos_leitura: Optional[Dict[str, float]] = None,
+                 tempo_conexao: float = TEMPO_CONEXAO,
+                 filtros: Optional[FiltrosConsulta] = None):
+        """
+        Cria um contexto vazio
+
+        :param cliente: sessão do `requests` usada nas consultas. Se None, usa o próprio `requests`
+
+        :param modo: modo inicial dos payloads
+
+        :param tempos_leitura: tempo limite de leitura, em segundos, de cada consulta ('inicial',
+        'intermediaria' e 'final'). As consultas não informadas usam `utils.TEMPOS_LEITURA`
+
+        :param tempo_conexao: tempo limite, em segundos, para abrir cada conexão
+
+        :param filtros: filtros do formulário enviados nas consultas, para o servidor retornar
+        somente parte do microhorario. Se None, o microhorario completo é baixado
+        """
+        self.cliente = cliente
+        self.tempos_leitura: Dict[str, float] = dict(TEMPOS_LEITURA, **(tempos_leitura or {}))
+        self.tempo_conexao = tempo_conexao
+        self.metricas = MetricasLatencia()
+        self._prazo: Optional[float] = None
+        self._fim_prazo: Optional[float] = None
+        self.filtros: Optional[FiltrosConsulta] = filtros
+        self.filtros_da_sessao: Optional[FiltrosConsulta] = None    # filtros da consulta intermediaria
+        self.modo: PayloadModo = modo
+        self.modo_inicial: PayloadModo = modo
+        self.cookies: Dict[str, str] = {}
+        self.sessao: str = ''
+        self.dados: Dict[str, str] = {}
+        self.departamentos: Dict[str, str] = {}
+        self.destinos: Dict[str, str] = {}
+
+    def __repr__(self):
+        return f'<ContextoDownload [{self.modo.name} {self.sessao}]>'
+
+    @staticmethod
+    def de_dados(dados: Dict[str, Any]) -> "ContextoDownload":
+        """Cria um contexto a partir do dicionario retornado por uma das consultas"""
+        contexto = ContextoDownload(modo=dados.get('modo', PayloadModo.MICROHORARIO))
+        contexto.atualiza(dados)
+        return contexto
+
+    @property
+    def http(self):
+        """Cliente usado para as requisições: a sessão configurada, ou o modulo `requests`"""
+        if self.cliente is not None:
+            return self.cliente
+        import requests
+        return requests
+
+    @property
+    def is_modo_fallback(self) -> bool:
+        """Retorna se o download está usando o 'Horarios e Salas'"""
+        return self.modo == PayloadModo.HORARIO
+
+    def inicia_prazo(self, segundos: Optional[float]):
+        """
+        Define o prazo das próximas consultas, a partir de agora. Com None, não há prazo.
+
+        Nenhuma consulta começa depois do prazo terminar, e cada consulta usa como tempos limite
+        de conexão e de leitura o menor entre o seu tempo e o que resta do prazo. O tempo de
+        leitura do `requests` vale para cada leitura do socket, então uma consulta que recebe a
+        resposta aos poucos ainda pode terminar depois do prazo.
+        """
+        self._prazo = segundos
+        self._fim_prazo = time.monotonic() + segundos if segundos is not None else None
+
+    def timeout(self, etapa: str) -> Tuple[float, float]:
+        """
+        Retorna o `timeout` (conexão, leitura) do `requests` para uma consulta
+
+        :raise DeadlineExceededError: se o prazo total já terminou
+        """
+        leitura = self.tempos_leitura.get(etapa, TEMPOS_LEITURA['final'])
+        if self._fim_prazo is None:
+            return self.tempo_conexao, leitura
+
+        restante = self._fim_prazo - time.monotonic()
+        if restante <= 0:
+            raise DeadlineExceededError(etapa, self._prazo)
+        return min(self.tempo_conexao, restante), min(leitura, restante)
+
+    def mede(self, etapa: str) -> ContextManager:
+        """Mede a latência de uma consulta em `metricas`"""
+        return self.metricas.mede(etapa)
+
+    @property
+    def tem_sessao(self) -> bool:
+        """
+        Se o contexto guarda uma sessão completa, que pode ser usada direto na consulta final.
+        A sessão só é reaproveitada com os mesmos filtros da consulta intermediaria que a criou.
+        """
+        return bool(self.sessao) and self.filtros_da_sessao == self.filtros and all(
+            self.dados.get(x) for x in ('__VIEWSTATEGENERATOR', '__EVENTVALIDATION', '__VIEWSTATE')
+        )
+
+    def limpa_sessao(self):
+        """Descarta a sessão guardada e volta ao modo inicial, mantendo o cliente"""
+        self.modo = self.modo_inicial
+        self.cookies = {}
+        self.sessao = ''
+        self.dados = {}
+        self.filtros_da_sessao = None
+
+    def atualiza(self, dados: Dict[str, Any]):
+        """Guarda o estado retornado por uma das consultas"""
+        self.cookies = dados.get('cookies') or {}
+        self.sessao = dados.get('sessao') or ''
+        self.dados = dados.get('dados') or {}
+        if 'departamentos' in dados:
+            self.departamentos = dados['departamentos']
+        if 'destinos' in dados:
+            self.destinos = dados['destinos']
+
+    def como_dados(self) -> Dict[str, Any]:
+        """Retorna o estado atual no formato dos dicionarios das consultas"""
+        return {
+            'cookies': self.cookies,
+            'sessao': self.sessao,
+            'modo': self.modo,
+            'dados': self.dados
+        }
@@ -1,11 +1,18 @@
 import requests
+import threading
 import warnings
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from bs4 import BeautifulSoup
 
 # typing
 from typing import Optional, List, Tuple
 from bs4.element import Tag
 
+# local imports
+from .latencia import MetricasLatencia
+from .utils import TEMPO_CONEXAO, TEMPOS_LEITURA
+
 
 URL_EMENTA = "https://www.puc-rio.br/ferramentas/ementas/ementa.aspx?cd={codigo}"
 
@@ -71,36 +78,129 @@ def encontra_credito(soup: BeautifulSoup) -> Optional[int]:
         return None
 
 
-def consulta_extra(codigo: str) -> Tuple[str, List[List[str]], Optional[int]]:
-    """
-    Faz uma consulta para a página da ementa, e retorna a ementa e prerequisitos.
+EMENTA_ERRO = "Disciplina sem ementa cadastrada"
 
-    Há um sleep de 0.3 segundos para evitar muitas consultas em pouco tempo ao site.
 
-    Se não encontrar ou houver algum erro, a ementa será "Disciplina sem ementa cadastrada."
+_executor_hedge: Optional[ThreadPoolExecutor] = None
+_trava_hedge = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    """Pool compartilhado pelas requisições com hedge, criado no primeiro uso"""
+    global _executor_hedge
+    with _trava_hedge:
+        if _executor_hedge is None:
+            _executor_hedge = ThreadPoolExecutor(max_workers=32, thread_name_prefix='hedge')
+        return _executor_hedge
+
+
+def _get_com_hedge(get, atraso: float, metricas: Optional[MetricasLatencia]):
+    """
+    Faz a requisição, e se ela não terminar em `atraso` segundos, faz uma segunda igual.
+    Retorna a primeira que terminar com sucesso. A outra não é cancelada (o `requests` não
+    permite), mas o resultado dela é descartado.
+    """
+    primeira = _executor().submit(get)
+    feitas, _ = wait([primeira], timeout=atraso)
+    if feitas:
+        return primeira.result()
+
+    def get_hedge():
+        # a latência das requisições extras fica em uma etapa separada
+        with metricas.mede('ementa_hedge') if metricas is not None else nullcontext():
+            return get()
+
+    pendentes = {primeira, _executor().submit(get_hedge)}
+    erro = None
+    while pendentes:
+        feitas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+        for f in feitas:
+            if f.exception() is None:
+                return f.result()
+            erro = erro or f.exception()
+    raise erro
+
+
+def baixa_pagina_ementa(codigo: str,
+                        cliente=None,
+                        timeout: Tuple[float, float] = (TEMPO_CONEXAO, TEMPOS_LEITURA['ementa']),
+                        atraso_hedge: Optional[float] = None,
+                        metricas: Optional[MetricasLatencia] = None) -> Optional[str]:
+    """
+    Baixa o html da página da ementa de uma disciplina, sem fazer o parsing.
 
     :param codigo: código da disciplina no formato XXX0000
 
-    :return: o texto da ementa
+    :param cliente: sessão do `requests` usada para a requisição. Se None, usa o próprio `requests`
+
+    :param timeout: tempos limite (conexão, leitura) da requisição, em segundos
+
+    :param atraso_hedge: se não for None, e a requisição não terminar nesse tempo (em segundos),
+    uma segunda requisição igual é feita, e a primeira resposta é usada. Um bom valor é o p95
+    das requisições anteriores, assim no máximo ~5% das ementas são baixadas duas vezes
+
+    :param metricas: se não for None, registra a latência na etapa 'ementa'
+
+    :return: o conteudo da página, ou None se a consulta não retornou 200
     """
+    http = cliente if cliente is not None else requests
+    url = URL_EMENTA.format(codigo=codigo)
 
-    ementa_erro = "Disciplina sem ementa cadastrada"
-    prereq_erro = []
-    creditos_erro = None
+    def get():
+        return http.get(url, timeout=timeout)
 
-    r = requests.get(URL_EMENTA.format(codigo=codigo))
+    medicao = metricas.mede('ementa') if metricas is not None else nullcontext()
+    with medicao:
+        r = get() if atraso_hedge is None else _get_com_hedge(get, atraso_hedge, metricas)
     if r.status_code != 200:
         warnings.warn(f"Consulta da ementa da disciplina {codigo} retornou codigo {r.status_code}")
-        return ementa_erro, prereq_erro, creditos_erro
+        return None
+    return r.text
+
+
+def processa_pagina_ementa(html: Optional[str]) -> Tuple[str, List[List[str]], Optional[int]]:
+    """
+    Faz o parsing do html da página da ementa, retornando a ementa, prerequisitos e créditos.
+
+    Não depende de nenhum estado, então pode ser executada em outro processo.
 
-    soup = BeautifulSoup(r.text, features='html.parser')
+    :param html: conteudo da página, ou None se a página não foi baixada
+    """
+    if html is None:
+        return EMENTA_ERRO, [], None
+
+    soup = BeautifulSoup(html, features='html.parser')
 
     ementa = encontra_ementa(soup)
     prereqs = encontra_prerequisitos(soup)
     creditos = encontra_credito(soup)
 
     return (
-        ementa.strip() if ementa is not None else ementa_erro,
+        ementa.strip() if ementa is not None else EMENTA_ERRO,
         prereqs,
         creditos
     )
+
+
+def consulta_extra(codigo: str,
+                   cliente=None,
+                   atraso_hedge: Optional[float] = None,
+                   metricas: Optional[MetricasLatencia] = None) -> Tuple[str, List[List[str]], Optional[int]]:
+    """
+    Faz uma consulta para a página da ementa, e retorna a ementa e prerequisitos.
+
+    Se não encontrar ou houver algum erro, a ementa será "Disciplina sem ementa cadastrada."
+
+    :param codigo: código da disciplina no formato XXX0000
+
+    :param cliente: sessão do `requests` usada para a requisição. Se None, usa o próprio `requests`
+
+    :param atraso_hedge: ver `baixa_pagina_ementa`
+
+    :param metricas: ver `baixa_pagina_ementa`
+
+    :return: o texto da ementa
+    """
+    return processa_pagina_ementa(
+        baixa_pagina_ementa(codigo, cliente, atraso_hedge=atraso_hedge, metricas=metricas)
+    )
@@ -0,0 +1,110 @@
+"""Estatísticas agregadas de um microhorario
+
+Todas as agregações são calculadas em uma única passada pelas disciplinas. A contribuição de
+cada disciplina também é guardada, então quando uma disciplina muda (uma nova turma ou
+alocação, ou os créditos coletados junto com a ementa) somente ela é recalculada.
+
+Valores desconhecidos (-1, por exemplo as vagas no modo fallback) não entram nas somas.
+"""
+
+from collections import Counter
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .models import Disciplina
+
+
+METRICAS = (
+    'totais',                           # disciplinas, turmas, alocacoes e vagas
+    'vagas_por_departamento',
+    'vagas_por_destino',
+    'turmas_por_turno',
+    'disciplinas_por_creditos',         # créditos desconhecidos ficam em -1
+    'horas_distancia_por_departamento',
+    'shf_por_departamento',
+)
+
+
+def _contribuicao(disciplina: "Disciplina") -> Dict[str, Counter]:
+    """Calcula a contribuição de uma disciplina para cada métrica"""
+    c = {x: Counter() for x in METRICAS}
+    depto = disciplina.departamento.codigo
+
+    c['totais']['disciplinas'] += 1
+    c['disciplinas_por_creditos'][disciplina.creditos] += 1
+    for t in disciplina.turmas:
+        c['totais']['turmas'] += 1
+        c['turmas_por_turno'][t.turno] += 1
+        if t.horario_distancia > 0:
+            c['horas_distancia_por_departamento'][depto] += t.horario_distancia
+        if t.shf > 0:
+            c['shf_por_departamento'][depto] += t.shf
+
+        for a in t.alocacoes:
+            c['totais']['alocacoes'] += 1
+            if a.vagas > 0:
+                c['totais']['vagas'] += a.vagas
+                c['vagas_por_departamento'][depto] += a.vagas
+                c['vagas_por_destino'][a.destino.codigo] += a.vagas
+    return c
+
+
+class EstatisticasMicrohorario:
+    """Agregações de vagas, turmas, créditos e horas de um microhorario"""
+
+    def __init__(self, disciplinas: Optional[Iterable["Disciplina"]] = None):
+        """
+        Calcula as agregações em uma única passada.
+
+        :param disciplinas: disciplinas agregadas. Se None, as agregações começam vazias
+        """
+        self._agregados: Dict[str, Counter] = {x: Counter() for x in METRICAS}
+        self._contribuicoes: Dict[str, Dict[str, Counter]] = {}
+        for d in disciplinas or []:
+            self.atualiza(d)
+
+    def __repr__(self):
+        return f'<EstatisticasMicrohorario [{len(self._contribuicoes)} disciplinas]>'
+
+    def remove(self, codigo: str):
+        """Remove a contribuição de uma disciplina, se ela tiver sido agregada"""
+        anterior = self._contribuicoes.pop(codigo, None)
+        if anterior is None:
+            return
+        for metrica, valores in anterior.items():
+            # o operador -= também remove as chaves que chegam a zero
+            self._agregados[metrica] -= valores
+
+    def atualiza(self, disciplina: "Disciplina"):
+        """Agrega uma disciplina, substituindo a contribuição anterior dela, se existir"""
+        self.remove(disciplina.codigo)
+        contribuicao = _contribuicao(disciplina)
+        self._contribuicoes[disciplina.codigo] = contribuicao
+        for metrica, valores in contribuicao.items():
+            self._agregados[metrica] += valores
+
+    def metrica(self, nome: str) -> Dict:
+        """
+        Retorna uma das métricas de `METRICAS`, como um dicionario ordenado pela chave
+
+        :param nome: nome da métrica, por exemplo 'vagas_por_departamento'
+        """
+        if nome not in self._agregados:
+            raise KeyError(f"Métrica desconhecida: {nome}")
+        return dict(sorted(self._agregados[nome].items()))
+
+    def tabela(self, nome: str) -> Tuple[List, List[int]]:
+        """
+        Retorna uma das métricas como duas listas paralelas, de chaves e de valores,
+        prontas para gráficos ou para arrays do numpy.
+
+        :param nome: nome da métrica
+        """
+        metrica = self.metrica(nome)
+        return list(metrica.keys()), list(metrica.values())
+
+    def como_dict(self) -> Dict[str, Dict]:
+        """Retorna todas as métricas em um dicionario serializável em JSON"""
+        return {x: self.metrica(x) for x in METRICAS}
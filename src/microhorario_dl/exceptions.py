@@ -74,3 +74,33 @@ class WebExceptionError(BaseParsingError):
         if not mensagem:
             mensagem = "Primeira consulta retornou uma página de erro"
         super().__init__(mensagem)
+
+
+class RecordingNotFoundError(Exception):
+    """Exceção levantada quando o `ClienteReprodutor` recebe uma requisição
+    que não existe na gravação.
+
+    Attributes:
+        metodo -- método HTTP da requisição
+        url -- url da requisição
+    """
+
+    def __init__(self, metodo: str, url: str):
+        self.metodo = metodo
+        self.url = url
+        super().__init__(f"Requisição {metodo} {url} não encontrada na gravação")
+
+
+class DeadlineExceededError(Exception):
+    """Exceção levantada quando o prazo total do download termina
+    antes de todas as consultas serem feitas.
+
+    Attributes:
+        etapa -- consulta que seria feita quando o prazo terminou
+        prazo -- prazo total, em segundos
+    """
+
+    def __init__(self, etapa: str, prazo: float):
+        self.etapa = etapa
+        self.prazo = prazo
+        super().__init__(f"Prazo de {prazo}s terminou antes da consulta {etapa}")
@@ -0,0 +1,58 @@
+"""Métricas de latência das requisições de cada etapa do download"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# typing stuff
+from typing import Dict, Iterator, List
+
+
+class MetricasLatencia:
+    """Guarda a duração de cada requisição, por etapa, e calcula os percentis"""
+
+    def __init__(self):
+        self._duracoes: Dict[str, List[float]] = {}
+        self._trava = threading.Lock()
+
+    def __repr__(self):
+        return f'<MetricasLatencia [{", ".join(self._duracoes)}]>'
+
+    def registra(self, etapa: str, segundos: float):
+        """Registra a duração de uma requisição da etapa"""
+        with self._trava:
+            self._duracoes.setdefault(etapa, []).append(segundos)
+
+    @contextmanager
+    def mede(self, etapa: str) -> Iterator[None]:
+        """Mede a duração do bloco, mesmo se ele terminar com um erro"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registra(etapa, time.perf_counter() - inicio)
+
+    def percentil(self, etapa: str, p: float) -> float:
+        """
+        Retorna o percentil `p` (0 a 100) das durações da etapa, pelo método do posto mais próximo
+
+        :raise KeyError: se nenhuma requisição da etapa foi registrada
+        """
+        with self._trava:
+            duracoes = sorted(self._duracoes[etapa])
+        indice = max(0, min(len(duracoes) - 1, int(-(-p * len(duracoes) // 100)) - 1))
+        return duracoes[indice]
+
+    def resumo(self) -> Dict[str, Dict[str, float]]:
+        """Retorna, para cada etapa, a quantidade de requisições, p50, p99 e o máximo, em segundos"""
+        with self._trava:
+            etapas = list(self._duracoes)
+        return {
+            x: {
+                'quantidade': len(self._duracoes[x]),
+                'p50': self.percentil(x, 50),
+                'p99': self.percentil(x, 99),
+                'maximo': self.percentil(x, 100),
+            }
+            for x in etapas
+        }
@@ -0,0 +1,299 @@
+"""Validação de muitos planos de matrícula de uma vez
+
+O microhorario é compilado uma única vez em estruturas simples: cada turma recebe um número,
+com a máscara de bits das horas da semana (a mesma de `ocupacao`) e as vagas por destino, e
+cada disciplina recebe um bit, então os grupos de pré-requisitos viram inteiros. Validar um
+plano passa a ser somente operações de bits e consultas em dicionários.
+
+Um plano é válido quando:
+
+    - todas as turmas existem, e não há duas turmas da mesma disciplina;
+    - os horários das turmas não se sobrepõem;
+    - cada turma tem alocação para o destino do aluno, ou para QQC (qualquer curso), com vagas;
+    - para cada disciplina, todas as disciplinas de algum grupo de pré-requisitos foram concluídas.
+
+As turmas sem alocações (modo fallback) e as vagas desconhecidas (-1) não são verificadas.
+Os pré-requisitos só são verificados nas disciplinas com a ementa coletada (ver
+`Microhorario.coletar_extra`). As disciplinas que não existem no microhorario são removidas
+dos grupos ao coletar, então não são exigidas. Um grupo que fica vazio não pode ser
+verificado: se nenhum outro grupo foi cumprido, o relatório recebe um aviso no lugar da violação.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+# local imports
+from .ocupacao import _mascara
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+DESTINO_QUALQUER = 'QQC'
+
+
+@dataclass
+class PlanoMatricula:
+    # noinspection PyUnresolvedReferences
+    """Plano de matrícula de um aluno
+
+    :arg destino: código do destino do aluno (ex. CIC)
+    :type: str
+
+    :arg turmas: pares (código da disciplina, código da turma) escolhidos
+    :type: List[Tuple[str, str]]
+
+    :arg concluidas: códigos das disciplinas já concluídas pelo aluno
+    :type: List[str]
+
+    :arg identificador: identificador opcional do plano, repetido no relatório
+    :type: Optional[str]
+    """
+    destino: str
+    turmas: List[Tuple[str, str]]
+    concluidas: List[str] = field(default_factory=list)
+    identificador: Optional[str] = None
+
+
+@dataclass
+class Violacao:
+    # noinspection PyUnresolvedReferences
+    """Problema encontrado em um plano
+
+    :arg tipo: 'turma_inexistente', 'disciplina_repetida', 'conflito_horario', 'destino',
+    'sem_vagas', 'vagas_esgotadas' ou 'prerequisito'
+    :type: str
+
+    :arg disciplina: código da disciplina
+    :type: str
+
+    :arg turma: código da turma
+    :type: str
+
+    :arg detalhe: descrição do problema (por exemplo, a outra turma do conflito)
+    :type: str
+    """
+    tipo: str
+    disciplina: str
+    turma: str
+    detalhe: str = ''
+
+    def __repr__(self):
+        return f'<Violacao [{self.tipo} {self.disciplina}-{self.turma}]>'
+
+
+@dataclass
+class RelatorioMatricula:
+    # noinspection PyUnresolvedReferences
+    """Resultado da validação de um plano
+
+    :arg identificador: identificador do plano
+    :type: Optional[str]
+
+    :arg violacoes: problemas encontrados. Vazia se o plano é válido
+    :type: List[Violacao]
+
+    :arg avisos: verificações que não puderam ser feitas (ex. pré-requisitos não coletados)
+    :type: List[str]
+    """
+    identificador: Optional[str]
+    violacoes: List[Violacao] = field(default_factory=list)
+    avisos: List[str] = field(default_factory=list)
+
+    @property
+    def valido(self) -> bool:
+        """Se o plano não tem nenhuma violação"""
+        return not self.violacoes
+
+
+class _Compilado:
+    """Dados do microhorario usados na validação. Somente tipos simples, para ser enviado a outros processos"""
+
+    def __init__(self, micro: "Microhorario"):
+        self.turmas: Dict[Tuple[str, str], int] = {}
+        self.chaves: List[Tuple[str, str]] = []         # id da turma -> (disciplina, turma)
+        self.mascaras: List[int] = []
+        self.vagas: List[Dict[str, int]] = []           # destino -> vagas, vazio no modo fallback
+        self.disciplina_da_turma: List[int] = []
+        self.bits: Dict[str, int] = {}                  # disciplina -> posição do bit
+        self.codigos: List[str] = []
+        self.prerequisitos: List[Optional[List[int]]] = []     # None se não coletados
+
+        for i, d in enumerate(micro.disciplinas):
+            self.bits[d.codigo] = i
+            self.codigos.append(d.codigo)
+
+        for i, d in enumerate(micro.disciplinas):
+            # os pré-requisitos são lidos sem disparar uma coleta sob demanda
+            coletados = d.prerequisitos_coletados
+            if not d.pre_req:
+                self.prerequisitos.append([])
+            elif coletados is None:
+                self.prerequisitos.append(None)
+            else:
+                grupos = []
+                for grupo in coletados:
+                    bits = 0
+                    for x in grupo:
+                        bits |= 1 << self.bits[x.codigo]
+                    # um grupo vazio (0) só tinha disciplinas de fora do microhorario
+                    grupos.append(bits)
+                self.prerequisitos.append(grupos)
+
+            for t in d.turmas:
+                mascara = 0
+                for h in t.horarios:
+                    if h is None:
+                        continue
+                    try:
+                        mascara |= _mascara(h.dia, int(h.inicio), int(h.fim))
+                    except ValueError:
+                        continue
+                self.turmas[(d.codigo, t.codigo)] = len(self.mascaras)
+                self.chaves.append((d.codigo, t.codigo))
+                self.mascaras.append(mascara)
+                self.vagas.append({a.destino.codigo: a.vagas for a in t.alocacoes})
+                self.disciplina_da_turma.append(i)
+
+    def valida(self, plano: PlanoMatricula) -> Tuple[RelatorioMatricula, List[Tuple[int, str]]]:
+        """
+        Valida um plano. Também retorna as alocações usadas (turma, destino), para a disputa das vagas
+        """
+        relatorio = RelatorioMatricula(plano.identificador)
+        violacoes = relatorio.violacoes
+
+        concluidas = 0
+        for cod in plano.concluidas:
+            bit = self.bits.get(cod.upper())
+            if bit is not None:
+                concluidas |= 1 << bit
+
+        ocupado = 0
+        escolhidas: List[Tuple[int, str, str]] = []     # (id da turma, disciplina, turma)
+        disciplinas_vistas = set()
+        alocacoes = []
+        for disc, turma in plano.turmas:
+            disc = disc.upper()
+            tid = self.turmas.get((disc, turma))
+            if tid is None:
+                violacoes.append(Violacao('turma_inexistente', disc, turma))
+                continue
+
+            did = self.disciplina_da_turma[tid]
+            if did in disciplinas_vistas:
+                violacoes.append(Violacao('disciplina_repetida', disc, turma))
+            disciplinas_vistas.add(did)
+
+            mascara = self.mascaras[tid]
+            if ocupado & mascara:
+                # somente as turmas já escolhidas podem ter causado o conflito
+                for outra, outra_disc, outra_turma in escolhidas:
+                    if self.mascaras[outra] & mascara:
+                        violacoes.append(Violacao('conflito_horario', disc, turma, f'{outra_disc}-{outra_turma}'))
+            ocupado |= mascara
+            escolhidas.append((tid, disc, turma))
+
+            vagas = self.vagas[tid]
+            if vagas:
+                destino = plano.destino if plano.destino in vagas else DESTINO_QUALQUER
+                if destino not in vagas:
+                    violacoes.append(Violacao('destino', disc, turma, plano.destino))
+                elif vagas[destino] == 0:
+                    violacoes.append(Violacao('sem_vagas', disc, turma, destino))
+                elif vagas[destino] > 0:
+                    alocacoes.append((tid, destino))
+
+            grupos = self.prerequisitos[did]
+            if grupos is None:
+                relatorio.avisos.append(f'Pré-requisitos de {disc} não coletados')
+            elif grupos and not any(g & concluidas == g for g in grupos if g) and 0 in grupos:
+                relatorio.avisos.append(f'Pré-requisitos de {disc} fora do microhorario não verificados')
+            elif grupos and not any(g & concluidas == g for g in grupos):
+                # o grupo mais perto de ser cumprido é o informado
+                faltando = min((g & ~concluidas for g in grupos), key=lambda g: bin(g).count('1'))
+                codigos = []
+                while faltando:
+                    bit = faltando & -faltando
+                    codigos.append(self.codigos[bit.bit_length() - 1])
+                    faltando ^= bit
+                violacoes.append(Violacao('prerequisito', disc, turma, ', '.join(codigos)))
+
+        return relatorio, alocacoes
+
+
+_compilado_processo: Optional[_Compilado] = None
+
+
+def _inicia_processo(compilado: _Compilado):
+    global _compilado_processo
+    _compilado_processo = compilado
+
+
+def _valida_no_processo(planos: List[PlanoMatricula]):
+    return [_compilado_processo.valida(x) for x in planos]
+
+
+class ValidadorMatriculas:
+    """Valida planos de matrícula contra um microhorario compilado"""
+
+    def __init__(self, micro: "Microhorario"):
+        """
+        Compila o microhorario em uma única passada. Mudanças posteriores no microhorario
+        (por exemplo, a coleta das ementas) exigem um novo validador.
+
+        :param micro: o microhorario
+        """
+        self._compilado = _Compilado(micro)
+
+    def __repr__(self):
+        return f'<ValidadorMatriculas [{len(self._compilado.mascaras)} turmas]>'
+
+    def valida(self, plano: PlanoMatricula) -> RelatorioMatricula:
+        """Valida um único plano"""
+        return self._compilado.valida(plano)[0]
+
+    def valida_lote(self,
+                    planos: Sequence[PlanoMatricula],
+                    processos: int = 0,
+                    tamanho_bloco: int = 1000,
+                    disputar_vagas: bool = False) -> List[RelatorioMatricula]:
+        """
+        Valida muitos planos, retornando um relatório por plano, na mesma ordem.
+
+        :param planos: os planos
+
+        :param processos: quantidade de processos para a validação. Com 0, valida neste processo.
+        O microhorario compilado é enviado uma única vez para cada processo, mas os planos e
+        relatórios ainda são serializados, então os processos só compensam em lotes grandes
+
+        :param tamanho_bloco: quantidade de planos enviados de cada vez para um processo
+
+        :param disputar_vagas: se True, os planos disputam as vagas na ordem de `planos`: as
+        turmas que já tiveram todas as vagas do destino ocupadas por planos anteriores geram
+        uma violação 'vagas_esgotadas'
+        """
+        if processos > 0:
+            blocos = [planos[i:i + tamanho_bloco] for i in range(0, len(planos), tamanho_bloco)]
+            with ProcessPoolExecutor(processos, initializer=_inicia_processo, initargs=(self._compilado,)) as ex:
+                resultados = [x for bloco in ex.map(_valida_no_processo, blocos) for x in bloco]
+        else:
+            resultados = [self._compilado.valida(x) for x in planos]
+
+        if disputar_vagas:
+            ocupadas: Dict[Tuple[int, str], int] = {}
+            for (relatorio, alocacoes), plano in zip(resultados, planos):
+                if not relatorio.valido:
+                    continue
+                esgotadas = [x for x in alocacoes if ocupadas.get(x, 0) >= self._compilado.vagas[x[0]][x[1]]]
+                if esgotadas:
+                    for tid, destino in esgotadas:
+                        disc, turma = self._compilado.chaves[tid]
+                        relatorio.violacoes.append(Violacao('vagas_esgotadas', disc, turma, destino))
+                    continue
+                for x in alocacoes:
+                    ocupadas[x] = ocupadas.get(x, 0) + 1
+
+        return [x[0] for x in resultados]
@@ -2,7 +2,7 @@ import re
 from dataclasses import dataclass, asdict
 
 # typing stuff
-from typing import Optional, Dict, Match, List
+from typing import Callable, Optional, Dict, Match, List
 
 
 RE_HORARIO = re.compile(
@@ -23,10 +23,14 @@ class Horario:
 
     :param fim: hora de fim da aula (0 à 24)
     :type: int
+
+    :param local: sala onde é realizada a aula nesse horário, se informada
+    :type: Optional[str]
     """
     dia: str
     inicio: int
     fim: int
+    local: Optional[str] = None
 
     def __repr__(self):
         return f'<Horario [{self.dia} {self.inicio}-{self.fim}]>'
@@ -156,10 +160,11 @@ class Turma:
             x.destino.codigo: x for x in alocacoes
         }
 
-        # fazendo parsing do horario de local
+        # fazendo parsing do horario de local, mantendo o texto original
+        self._horario_local = horario_e_localizacao.strip()
         self._lista_horarios = []
         self._localizacao = None
-        self._parse_horario_localizacao(horario_e_localizacao.strip())
+        self._parse_horario_localizacao(self._horario_local)
 
     def __repr__(self):
         return f'<Turma [{self.codigo}]>'
@@ -171,7 +176,7 @@ class Turma:
             asdict(x) for x in self._lista_horarios if x is not None
         ]
         localizacao = self.localizacao if self.localizacao is not None else ''
-        alocacoes = [{'destino': k, 'vagas': v.vagas} for k, v in self._alocacoes]
+        alocacoes = [{'destino': k, 'vagas': v.vagas} for k, v in self._alocacoes.items()]
 
         return {
             'professor': self.professor,
@@ -181,6 +186,7 @@ class Turma:
             'shf': self.shf,
             'horarios': horarios,
             'localizacao': localizacao,
+            'horario_local': self.horario_local,
             'alocacoes': alocacoes
         }
 
@@ -192,7 +198,7 @@ class Turma:
         """Faz o parsing da string contendo os horarios e a localização,
         transformando em uma lista de `Horario`, e guarda em `horarios`.
 
-        Também salva a localização do último horário encontrado.
+        Cada horário guarda a sua própria sala, e `localizacao` fica com a do último horário.
         """
         local = None
         for t in texto.split('  '):
@@ -205,11 +211,11 @@ class Turma:
             inicio = m.group('inicio')
             fim = m.group('fim')
 
-            horario = Horario(dia, inicio, fim) if None not in (dia, inicio, fim) else None
+            horario = Horario(dia, inicio, fim, local) if None not in (dia, inicio, fim) else None
             self._lista_horarios.append(horario)
 
-        # so adiciona a ultima localizacao. pode ser um problema
-        # se houver mais de uma localizaco dependendo da aula
+        # a localizacao da turma é a do ultimo horario. as salas de cada
+        # aula ficam nos proprios horarios (ver `locais`)
         self._localizacao = local
 
     @property
@@ -232,6 +238,11 @@ class Turma:
         """Lista de horários da turma"""
         return self._lista_horarios
 
+    @property
+    def horario_local(self) -> str:
+        """Texto original contendo os horários e a localização da turma"""
+        return self._horario_local
+
     @property
     def horario_distancia(self):
         """Quantidade de horas à distância"""
@@ -244,9 +255,16 @@ class Turma:
 
     @property
     def localizacao(self):
-        """Local onde é realizada a aula da turma"""
+        """Local onde é realizada a aula da turma (a sala do último horário)"""
         return self._localizacao
 
+    @property
+    def locais(self) -> List[str]:
+        """Salas de todos os horários da turma, sem repetições, na ordem em que aparecem"""
+        return list(dict.fromkeys(
+            x.local for x in self._lista_horarios if x is not None and x.local is not None
+        ))
+
     @property
     def alocacoes(self):
         """Alocacoes (vagas e destino) da turma"""
@@ -288,6 +306,7 @@ class Disciplina:
         self._prereqs: Optional[List[List["Disciplina"]]] = None
         self._departamento = departamento
         self._turmas: Dict[str, Turma] = dict()
+        self._coletor: Optional[Callable[["Disciplina"], None]] = None
 
     def __repr__(self):
         return f'<Disciplina [{self.codigo}]>'
@@ -321,8 +340,11 @@ class Disciplina:
     def ementa(self) -> Optional[str]:
         """
         Ementa da disciplina. Ela precisa ser baixada usando
-        `microhorario.coletar_disciplinas()`
+        `microhorario.coletar_extra()`, ou é baixada no primeiro acesso se
+        houver um coletor (ver `Microhorario.coletar_sob_demanda`)
         """
+        if self._ementa is None and self._coletor is not None:
+            self._coletor(self)
         return self._ementa
 
     @ementa.setter
@@ -332,7 +354,9 @@ class Disciplina:
 
     @property
     def prerequisitos(self) -> List[List["Disciplina"]]:
-        """Lista de grupos de pré-requisitos da disciplina"""
+        """Lista de grupos de pré-requisitos da disciplina. Baixada junto com a ementa"""
+        if self._prereqs is None and self._coletor is not None:
+            self._coletor(self)
         return self._prereqs
 
     @prerequisitos.setter
@@ -340,6 +364,28 @@ class Disciplina:
         if self._prereqs is None:
             self._prereqs = new_prereqs
 
+    @property
+    def ementa_coletada(self) -> Optional[str]:
+        """Ementa, se já foi coletada. Ao contrário de `ementa`, nunca dispara uma coleta"""
+        return self._ementa
+
+    @property
+    def prerequisitos_coletados(self) -> Optional[List[List["Disciplina"]]]:
+        """Pré-requisitos, se já foram coletados. Ao contrário de `prerequisitos`, nunca dispara uma coleta"""
+        return self._prereqs
+
+    @property
+    def extra_coletado(self) -> bool:
+        """Se a ementa e os pré-requisitos já foram coletados. Nunca dispara uma coleta"""
+        return self._ementa is not None
+
+    def definir_coletor(self, coletor: Optional[Callable[["Disciplina"], None]]):
+        """
+        Define a função chamada no primeiro acesso à ementa ou aos pré-requisitos, que
+        deve preenchê-los. Com None, a coleta sob demanda é desativada.
+        """
+        self._coletor = coletor
+
     @property
     def departamento(self) -> Departamento:
         """Departamento da disciplina"""
@@ -350,6 +396,28 @@ class Disciplina:
         """Lista de turmas da disciplina"""
         return list(self._turmas.values())
 
+    def as_dict(self):
+        """Converte a disciplina para um dicionario
+
+        Os pré-requisitos são representados pelos códigos das disciplinas,
+        e são None caso ainda não tenham sido coletados. A conversão nunca
+        dispara uma coleta sob demanda.
+        """
+        prerequisitos = None
+        if self._prereqs is not None:
+            prerequisitos = [[x.codigo for x in grupo] for grupo in self._prereqs]
+
+        return {
+            'nome': self.nome,
+            'codigo': self.codigo,
+            'pre_req': self.pre_req,
+            'creditos': self.creditos,
+            'departamento': self.departamento.codigo,
+            'ementa': self._ementa,
+            'prerequisitos': prerequisitos,
+            'turmas': [t.as_dict() for t in self.turmas]
+        }
+
     def add_turma(self, turma: Turma):
         """Adiciona uma turma na lista da disciplinas"""
         if turma.codigo in self._turmas:
@@ -0,0 +1,203 @@
+"""Observação periódica das vagas do microhorario
+
+Em vez de montar o `Microhorario` a cada consulta, o observador guarda somente o hash do
+último CSV e as vagas de cada alocação. Se o CSV não mudou, a consulta termina sem nenhum
+parsing. Se mudou, somente as diferenças são emitidas como eventos.
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from threading import Event
+from warnings import warn
+
+# typing stuff
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+# local imports
+from .contexto import ContextoDownload
+from .parser import converte_para_json
+
+
+TURMA_NOVA = 'turma_nova'
+TURMA_REMOVIDA = 'turma_removida'
+VAGAS = 'vagas'
+
+# (disciplina, turma) -> {destino: vagas}
+Estado = Dict[Tuple[str, str], Dict[str, int]]
+
+
+@dataclass
+class EventoVagas:
+    # noinspection PyUnresolvedReferences
+    """Uma mudança encontrada entre duas consultas
+
+    :arg tipo: `TURMA_NOVA`, `TURMA_REMOVIDA` ou `VAGAS`
+    :type: str
+
+    :arg disciplina: código da disciplina
+    :type: str
+
+    :arg turma: código da turma
+    :type: str
+
+    :arg destino: código do destino da alocação alterada. None para eventos de turma
+    :type: Optional[str]
+
+    :arg vagas_antes: vagas antes da mudança. None se a alocação não existia
+    :type: Optional[int]
+
+    :arg vagas_depois: vagas depois da mudança. None se a alocação foi removida
+    :type: Optional[int]
+    """
+    tipo: str
+    disciplina: str
+    turma: str
+    destino: Optional[str] = None
+    vagas_antes: Optional[int] = None
+    vagas_depois: Optional[int] = None
+
+    def __repr__(self):
+        return f'<EventoVagas [{self.tipo} {self.disciplina}-{self.turma}]>'
+
+
+def hash_dados(texto: str) -> str:
+    """
+    Hash das linhas de dados do CSV. A primeira linha, com o período e o horário de emissão,
+    muda a cada consulta, e por isso não faz parte do hash
+    """
+    return hashlib.sha256(texto.partition('\n')[2].encode('utf-8')).hexdigest()
+
+
+def compara_estados(antigo: Estado, novo: Estado) -> List[EventoVagas]:
+    """
+    Compara as vagas de duas consultas, retornando os eventos de mudança
+
+    :param antigo: estado da consulta anterior
+    :param novo: estado da consulta atual
+    """
+    eventos = []
+    for chave, alocacoes in novo.items():
+        anteriores = antigo.get(chave)
+        if anteriores is None:
+            eventos.append(EventoVagas(TURMA_NOVA, *chave))
+            anteriores = {}
+
+        for destino in alocacoes.keys() | anteriores.keys():
+            antes, depois = anteriores.get(destino), alocacoes.get(destino)
+            if antes != depois:
+                eventos.append(EventoVagas(VAGAS, *chave, destino, antes, depois))
+
+    for chave in antigo.keys() - novo.keys():
+        eventos.append(EventoVagas(TURMA_REMOVIDA, *chave))
+
+    return eventos
+
+
+class ObservadorVagas:
+    """Consulta o microhorario periodicamente e emite as mudanças de vagas e turmas"""
+
+    def __init__(self,
+                 intervalo: float = 60.0,
+                 callback: Optional[Callable[[EventoVagas], None]] = None,
+                 cliente=None):
+        """
+        Cria o observador. A primeira consulta só registra o estado inicial, sem emitir eventos.
+
+        :param intervalo: tempo, em segundos, entre o início de duas consultas
+
+        :param callback: função chamada para cada evento encontrado
+
+        :param cliente: cliente HTTP usado nas consultas. Se None, cria uma sessão do `requests`
+        """
+        if cliente is None:
+            import requests
+            cliente = requests.Session()    # reaproveita as conexões entre as consultas
+
+        self._intervalo = intervalo
+        self._callback = callback
+        self._cliente = cliente
+        self._contexto = ContextoDownload(cliente=cliente)
+        self._hash: Optional[str] = None
+        self._estado: Optional[Estado] = None
+
+    def __repr__(self):
+        return f'<ObservadorVagas [{self._intervalo}s]>'
+
+    def _baixa_csv(self) -> str:
+        from .consultas import consulta_csv
+
+        # o mesmo contexto é usado em todas as consultas, então depois da primeira somente a
+        # consulta final é feita, enquanto o servidor aceitar a sessão
+        return consulta_csv(self._contexto)
+
+    def verifica(self) -> List[EventoVagas]:
+        """
+        Faz uma consulta, retornando (e enviando ao callback) os eventos encontrados.
+
+        Se as linhas de dados do CSV baixado forem idênticas às anteriores (ver `hash_dados`),
+        nenhum parsing é feito.
+        """
+        texto = self._baixa_csv()
+        novo_hash = hash_dados(texto)
+        if novo_hash == self._hash:
+            return []
+
+        estado: Estado = {}
+        for rd in converte_para_json(texto)['disciplinas']:
+            estado.setdefault((rd.codigo, rd.turma), {})[rd.destino] = rd.vaga
+
+        eventos = compara_estados(self._estado, estado) if self._estado is not None else []
+        self._hash, self._estado = novo_hash, estado
+
+        if self._callback is not None:
+            for evento in eventos:
+                self._callback(evento)
+        return eventos
+
+    def executa(self, parar: Optional[Event] = None, max_consultas: Optional[int] = None):
+        """
+        Consulta o microhorario a cada `intervalo` segundos, até `parar` ser sinalizado.
+
+        Erros em uma consulta são avisados, e não interrompem as próximas.
+
+        :param parar: evento que interrompe a execução quando sinalizado
+
+        :param max_consultas: quantidade máxima de consultas. Se None, não há limite
+        """
+        parar = parar if parar is not None else Event()
+        feitas = 0
+        proxima = time.monotonic()
+        while not parar.is_set() and (max_consultas is None or feitas < max_consultas):
+            try:
+                self.verifica()
+            except Exception as e:
+                warn(f"Erro ao consultar o microhorario: {e}")
+            feitas += 1
+
+            proxima += self._intervalo
+            if max_consultas is None or feitas < max_consultas:
+                parar.wait(max(0.0, proxima - time.monotonic()))
+
+    async def eventos(self) -> AsyncIterator[EventoVagas]:
+        """
+        Iterador assíncrono infinito dos eventos. As consultas são feitas em uma thread,
+        sem bloquear o loop de eventos.
+
+            async for evento in observador.eventos():
+                ...
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            inicio = loop.time()
+            try:
+                eventos = await loop.run_in_executor(None, self.verifica)
+            except Exception as e:
+                warn(f"Erro ao consultar o microhorario: {e}")
+                eventos = []
+
+            for evento in eventos:
+                yield evento
+
+            await asyncio.sleep(max(0.0, inicio + self._intervalo - loop.time()))
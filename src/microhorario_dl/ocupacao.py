@@ -0,0 +1,146 @@
+"""Ocupação das salas ao longo da semana
+
+A ocupação é montada em uma única passada por todas as turmas. Cada sala guarda uma máscara
+de bits com uma posição por hora da semana (7 dias x 24 horas), então verificar se uma sala
+está livre em um intervalo é somente uma operação de bits. As aulas de cada sala e de cada
+hora também são guardadas, para responder o que acontece em uma sala.
+"""
+
+from dataclasses import dataclass
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+DIAS = ('SEG', 'TER', 'QUA', 'QUI', 'SEX', 'SAB', 'DOM')
+HORAS_DIA = 24
+
+
+@dataclass
+class Aula:
+    # noinspection PyUnresolvedReferences
+    """Uma aula de uma turma em uma sala
+
+    :arg sala: código da sala
+    :type: str
+
+    :arg dia: SEG, TER, QUA, QUI, SEX, SAB ou DOM
+    :type: str
+
+    :arg inicio: hora de inicio da aula (0 à 24)
+    :type: int
+
+    :arg fim: hora de fim da aula (0 à 24)
+    :type: int
+
+    :arg disciplina: código da disciplina
+    :type: str
+
+    :arg turma: código da turma
+    :type: str
+
+    :arg professor: professor(a) da turma
+    :type: str
+    """
+    sala: str
+    dia: str
+    inicio: int
+    fim: int
+    disciplina: str
+    turma: str
+    professor: str
+
+    def __repr__(self):
+        return f'<Aula [{self.sala} {self.dia} {self.inicio}-{self.fim} {self.disciplina}-{self.turma}]>'
+
+
+def _mascara(dia: str, inicio: int, fim: int) -> int:
+    """Máscara de bits das horas de `inicio` (inclusive) até `fim` (exclusive) no dia"""
+    if dia not in DIAS:
+        raise ValueError(f"Dia inválido: {dia}")
+    if not 0 <= inicio < fim <= HORAS_DIA:
+        raise ValueError(f"Intervalo de horas inválido: {inicio}-{fim}")
+    return ((1 << (fim - inicio)) - 1) << (DIAS.index(dia) * HORAS_DIA + inicio)
+
+
+class OcupacaoSalas:
+    """Grade de ocupação sala x dia x hora de um microhorario"""
+
+    def __init__(self, micro: "Microhorario"):
+        """
+        Monta a ocupação de todas as salas do microhorario.
+
+        Horários sem sala (por exemplo, aulas à distância) são ignorados.
+
+        :param micro: o microhorario
+        """
+        self._mascaras: Dict[str, int] = {}
+        self._aulas: Dict[str, List[Aula]] = {}
+        self._por_hora: Dict[Tuple[str, int], List[Aula]] = {}
+
+        for d in micro.disciplinas:
+            for t in d.turmas:
+                for h in t.horarios:
+                    if h is None or h.local is None:
+                        continue
+                    aula = Aula(h.local, h.dia, int(h.inicio), int(h.fim), d.codigo, t.codigo, t.professor)
+                    try:
+                        mascara = _mascara(aula.dia, aula.inicio, aula.fim)
+                    except ValueError:
+                        continue
+
+                    self._mascaras[aula.sala] = self._mascaras.get(aula.sala, 0) | mascara
+                    self._aulas.setdefault(aula.sala, []).append(aula)
+                    base = DIAS.index(aula.dia) * HORAS_DIA
+                    for hora in range(aula.inicio, aula.fim):
+                        self._por_hora.setdefault((aula.sala, base + hora), []).append(aula)
+
+        for aulas in self._aulas.values():
+            aulas.sort(key=lambda x: (DIAS.index(x.dia), x.inicio, x.fim, x.disciplina, x.turma))
+
+    def __repr__(self):
+        return f'<OcupacaoSalas [{len(self._mascaras)} salas]>'
+
+    @property
+    def salas(self) -> List[str]:
+        """Todas as salas com alguma aula, em ordem alfabética"""
+        return sorted(self._mascaras)
+
+    def livre(self, sala: str, dia: str, inicio: int, fim: int) -> bool:
+        """
+        Verifica se a sala não tem nenhuma aula no intervalo.
+
+        :param sala: código da sala
+        :param dia: SEG, TER, QUA, QUI, SEX, SAB ou DOM
+        :param inicio: hora de inicio (inclusive)
+        :param fim: hora de fim (exclusive)
+        """
+        return self._mascaras.get(sala, 0) & _mascara(dia, inicio, fim) == 0
+
+    def salas_livres(self, dia: str, inicio: int, fim: int) -> List[str]:
+        """
+        Lista as salas sem nenhuma aula no intervalo, por exemplo `salas_livres('QUA', 13, 15)`.
+
+        Somente as salas que aparecem em alguma turma são conhecidas.
+
+        :param dia: SEG, TER, QUA, QUI, SEX, SAB ou DOM
+        :param inicio: hora de inicio (inclusive)
+        :param fim: hora de fim (exclusive)
+
+        :return: os códigos das salas livres, em ordem alfabética
+        """
+        mascara = _mascara(dia, inicio, fim)
+        return sorted(k for k, v in self._mascaras.items() if v & mascara == 0)
+
+    def agenda(self, sala: str) -> List[Aula]:
+        """Todas as aulas da sala na semana, ordenadas por dia e hora"""
+        return list(self._aulas.get(sala, []))
+
+    def aulas_na_hora(self, sala: str, dia: str, hora: int) -> List[Aula]:
+        """Aulas da sala que ocupam a hora (de `hora` até `hora + 1`) do dia"""
+        if dia not in DIAS:
+            raise ValueError(f"Dia inválido: {dia}")
+        return list(self._por_hora.get((sala, DIAS.index(dia) * HORAS_DIA + hora), []))
@@ -0,0 +1,160 @@
+"""Exportação do microhorario para tabelas colunares (Parquet ou Arrow IPC)
+
+São geradas duas tabelas achatadas, uma linha por turma e uma linha por alocação.
+As linhas são geradas diretamente dos modelos e escritas em grupos de tamanho fixo,
+então o microhorario nunca é convertido inteiro para um dicionario.
+
+Requer o `pyarrow`, instalado com `pip install microhorario-dl[parquet]`.
+"""
+
+# typing stuff
+from typing import TYPE_CHECKING, Iterator, List, Tuple
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+FORMATOS = ('parquet', 'arrow')
+
+# (nome, tipo, dicionario). colunas marcadas como dicionario têm poucos valores distintos
+COLUNAS_TURMAS = (
+    ('periodo', 'string', True),
+    ('disciplina', 'string', False),
+    ('nome', 'string', False),
+    ('departamento', 'string', True),
+    ('creditos', 'int32', False),
+    ('pre_req', 'bool_', False),
+    ('turma', 'string', True),
+    ('professor', 'string', True),
+    ('turno', 'string', True),
+    ('horario_distancia', 'int32', False),
+    ('shf', 'int32', False),
+    ('localizacao', 'string', True),
+    ('horario_local', 'string', False),
+)
+
+COLUNAS_ALOCACOES = (
+    ('periodo', 'string', True),
+    ('disciplina', 'string', False),
+    ('turma', 'string', True),
+    ('destino', 'string', True),
+    ('vagas', 'int32', False),
+)
+
+
+def _importa_pyarrow():
+    """Importa o pyarrow, que é uma dependência opcional"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "A exportação para Parquet/Arrow requer o pyarrow: pip install microhorario-dl[parquet]"
+        ) from e
+    return pyarrow
+
+
+def _linhas(micro: "Microhorario") -> Iterator[Tuple[tuple, List[tuple]]]:
+    """Gera, para cada turma, a linha da turma e as linhas das suas alocações"""
+    periodo = micro.periodo
+    for d in micro.disciplinas:
+        for t in d.turmas:
+            turma = (
+                periodo, d.codigo, d.nome, d.departamento.codigo, d.creditos, d.pre_req,
+                t.codigo, t.professor, t.turno, t.horario_distancia, t.shf,
+                t.localizacao if t.localizacao is not None else '', t.horario_local
+            )
+            alocacoes = [(periodo, d.codigo, t.codigo, a.destino.codigo, a.vagas) for a in t.alocacoes]
+            yield turma, alocacoes
+
+
+class _EscritorTabela:
+    """Escreve uma tabela em grupos de linhas, sem guardar a tabela inteira na memória"""
+
+    def __init__(self, pa, caminho: str, colunas: tuple, formato: str, compressao: str, tamanho_grupo: int):
+        self._pa = pa
+        self._tamanho_grupo = tamanho_grupo
+        self._buffer: List[tuple] = []
+
+        self._schema = pa.schema([
+            pa.field(nome, pa.dictionary(pa.int32(), pa.string()) if dicionario else getattr(pa, tipo)())
+            for nome, tipo, dicionario in colunas
+        ])
+
+        if formato == 'parquet':
+            self._writer = pa.parquet.ParquetWriter(
+                caminho, self._schema, compression=compressao, use_dictionary=True
+            )
+        else:
+            # o formato de stream permite que cada grupo tenha o seu próprio dicionario
+            self._writer = pa.ipc.new_stream(
+                caminho, self._schema, options=pa.ipc.IpcWriteOptions(compression=compressao)
+            )
+
+    def adiciona(self, linha: tuple):
+        self._buffer.append(linha)
+        if len(self._buffer) >= self._tamanho_grupo:
+            self._escreve_grupo()
+
+    def _escreve_grupo(self):
+        if not self._buffer:
+            return
+        colunas = zip(*self._buffer)
+        arrays = [self._pa.array(valores, type=campo.type) for campo, valores in zip(self._schema, colunas)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        self._buffer = []
+
+    def fecha(self):
+        try:
+            self._escreve_grupo()
+        finally:
+            self._writer.close()
+
+
+def exporta_parquet(micro: "Microhorario",
+                    caminho_turmas: str,
+                    caminho_alocacoes: str,
+                    formato: str = 'parquet',
+                    compressao: str = 'zstd',
+                    tamanho_grupo: int = 65536):
+    """
+    Exporta as turmas e alocações do microhorario para duas tabelas colunares.
+
+    As colunas de texto com poucos valores distintos (departamento, professor, turno, destino...)
+    são codificadas como dicionario.
+
+    :param micro: o microhorario a ser exportado
+
+    :param caminho_turmas: arquivo da tabela de turmas
+
+    :param caminho_alocacoes: arquivo da tabela de alocações
+
+    :param formato: 'parquet', ou 'arrow' para o formato de stream do Arrow IPC
+
+    :param compressao: algoritmo de compressão ('zstd', 'lz4', ...). Para o Parquet
+    também são aceitos 'snappy', 'gzip' e 'none'
+
+    :param tamanho_grupo: quantidade de linhas em cada grupo (row group) escrito
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato {formato} inválido, esperado: {', '.join(FORMATOS)}")
+    if tamanho_grupo < 1:
+        raise ValueError("O tamanho do grupo deve ser pelo menos 1")
+
+    pa = _importa_pyarrow()
+    if formato == 'arrow' and compressao == 'none':
+        compressao = None
+
+    turmas = _EscritorTabela(pa, caminho_turmas, COLUNAS_TURMAS, formato, compressao, tamanho_grupo)
+    try:
+        alocacoes = _EscritorTabela(pa, caminho_alocacoes, COLUNAS_ALOCACOES, formato, compressao, tamanho_grupo)
+        try:
+            for linha_turma, linhas_alocacoes in _linhas(micro):
+                turmas.adiciona(linha_turma)
+                for linha in linhas_alocacoes:
+                    alocacoes.adiciona(linha)
+        finally:
+            alocacoes.fecha()
+    finally:
+        turmas.fecha()
@@ -1,8 +1,9 @@
 import re
 import warnings
+from itertools import repeat
 
 # typing stuff
-from typing import List, Dict
+from typing import Dict, List
 
 # local imports
 from .models import RawDisciplina
@@ -50,82 +51,131 @@ def get_informacoes_csv(info_str: str) -> Dict[str, str]:
     return res
 
 
-def converte_para_json(texto_csv: str) -> dict:
+# regex para o codigo, que é o primeiro texto na linha
+RE_DISCIPLINA = re.compile('^[A-Z]{3}[0-9]{4}')
 
-    ret: dict = {}
-    # le as linhas do csv
-    linhas = texto_csv.splitlines()
-    # salva as informacoes na linha inicial do arquivo
-    ret.update(
-        get_informacoes_csv(linhas[0])
-    )
 
-    # regex para o codigo, que é o primeiro texto na linha
-    re_disciplina = re.compile('^[A-Z]{3}[0-9]{4}')
+def _inteiros(coluna: List[str]) -> List[int]:
+    """Converte uma coluna numérica, com -1 para os valores inválidos. Cada valor distinto é convertido uma vez"""
+    valores = {x: int(x) if x.isnumeric() else -1 for x in set(coluna)}
+    return list(map(valores.__getitem__, coluna))
 
+
+def _converte_colunas(linhas: List[str], tamanho: int) -> List[RawDisciplina]:
+    """
+    Converte linhas que têm todas o mesmo número de elementos, tokenizando todas de uma vez:
+    as linhas são juntadas e separadas com um único `split`, e cada coluna é uma fatia da
+    lista de campos. As conversões são feitas por coluna, e não por linha.
+    """
+    campos = list(map(str.strip, ';'.join(linhas).split(';')))
+    colunas = [campos[i::tamanho] for i in range(tamanho)]
+    del campos
+    quantidade = len(linhas)
+
+    if tamanho == 11:
+        # Horarios e Salas: não existe a coluna de 'créditos', 'destino' e 'vaga'
+        colunas[3:3] = ([''] * quantidade,)
+        colunas[5:5] = (['--'] * quantidade, ['--'] * quantidade)
+        tamanho = 14
+
+    if tamanho == 14:
+        # removendo horas de extensao
+        del colunas[11]
+
+    (codigo, nome, professor, creditos, turma, destino, vaga,
+     turno, horario_local, horas_distancia, shf, pre_req, depto) = colunas
+
+    # os argumentos seguem a ordem das colunas do csv
+    return list(map(
+        RawDisciplina,
+        codigo, nome, professor, _inteiros(creditos), turma, destino, _inteiros(vaga),
+        turno, horario_local, _inteiros(horas_distancia), _inteiros(shf),
+        [x == "SIM" for x in pre_req], depto
+    ))
+
+
+def _converte_linhas(linhas: List[str]) -> List[RawDisciplina]:
+    """Converte as linhas uma a uma. Usada quando as linhas têm quantidades diferentes de elementos"""
     lista_disciplinas: List[RawDisciplina] = list()
+    adiciona = lista_disciplinas.append
+    strip = str.strip
 
     for linha in linhas:
-        if re_disciplina.match(linha) is None:
-            continue     # pula a linha que nao tem informacao
-
-        # splitando em brancos e retirando tambem o ';' final se tiver
-        linha_split = linha.strip(' \n\r;').split(';')
+        linha_split = linha.split(';')
+        tamanho = len(linha_split)
 
-        if len(linha_split) == 11:
+        if tamanho == 11:
             # caso especifico quando cai no Horarios e Salas (microhorario desligado)
             # nao existe a linha de 'créditos', 'destino' e 'vaga'
-            linha_split.insert(3, '-1')     # creditos
-            linha_split.insert(5, '--')     # destino
-            linha_split.insert(6, '--')     # vaga
+            linha_split[3:3] = ('-1',)          # creditos
+            linha_split[5:5] = ('--', '--')     # destino e vaga
+            tamanho = 14
 
-        if len(linha_split) == 14:
+        if tamanho == 14:
             # removendo horas de extensao (atualização nova do microhorario)
-            linha_split.pop(11)
+            del linha_split[11]
+            tamanho = 13
 
-        if len(linha_split) != 13:
-            warnings.warn(f"Linha iniciada em {linha_split[0]} está inválida: contém {len(linha_split)} elementos,"
+        if tamanho != 13:
+            warnings.warn(f"Linha iniciada em {linha_split[0]} está inválida: contém {tamanho} elementos,"
                           f"esperado: 14, 13 ou 11")
             continue     # pula a linha que a informacao esta corrompida
 
-        codigo = linha_split[0].strip()
-        nome = linha_split[1].strip()
-        professor = linha_split[2].strip()
-        creditos = linha_split[3].strip()
-        turma = linha_split[4].strip()
-        destino = linha_split[5].strip()
-        vaga = linha_split[6].strip()
-        turno = linha_split[7].strip()
-        horario_local = linha_split[8].strip()
-        horas_distancia = linha_split[9].strip()
-        shf = linha_split[10].strip()
-        pre_req = linha_split[11].strip()
-        depto = linha_split[12].strip()
-
-        # fazendo parsing dos valores numericos
-        creditos = int(creditos) if creditos.isnumeric() else -1
-        vaga = int(vaga) if vaga.isnumeric() else -1
-        horas_distancia = int(horas_distancia) if horas_distancia.isnumeric() else -1
-        shf = int(shf) if shf.isnumeric() else -1
-
-        # fazendo parsing dos valores booleanos
-        pre_req = pre_req == "SIM"
-        lista_disciplinas.append(RawDisciplina(
-            nome=nome,
-            codigo=codigo,
-            professor=professor,
-            creditos=creditos,
-            turma=turma,
-            destino=destino,
-            vaga=vaga,
-            turno=turno,
-            horario_local=horario_local,
-            horas_distancia=horas_distancia,
-            shf=shf,
-            pre_req=pre_req,
-            depto=depto
+        (codigo, nome, professor, creditos, turma, destino, vaga,
+         turno, horario_local, horas_distancia, shf, pre_req, depto) = map(strip, linha_split)
+
+        # os valores numericos invalidos viram -1, e o pre_req vira booleano
+        adiciona(RawDisciplina(
+            codigo,
+            nome,
+            professor,
+            int(creditos) if creditos.isnumeric() else -1,
+            turma,
+            destino,
+            int(vaga) if vaga.isnumeric() else -1,
+            turno,
+            horario_local,
+            int(horas_distancia) if horas_distancia.isnumeric() else -1,
+            int(shf) if shf.isnumeric() else -1,
+            pre_req == "SIM",
+            depto
         ))
 
-    ret['disciplinas'] = lista_disciplinas
+    return lista_disciplinas
+
+
+def converte_para_json(texto_csv: str) -> dict:
+    """
+    Faz o parsing do CSV baixado do microhorario.
+
+    As linhas com informação são filtradas de uma vez pelo regex compilado. Quando todas têm
+    a mesma quantidade de elementos (o caso normal), o csv inteiro é tokenizado de uma vez e
+    convertido por colunas (ver `_converte_colunas`). Senão, cada linha é convertida
+    separadamente, avisando sobre as linhas inválidas.
+
+    Linhas com 11 elementos (Horarios e Salas) e 14 elementos (horas de extensão) são
+    convertidas para o formato padrão de 13 elementos.
+
+    :param texto_csv: o texto do csv, já decodificado
+
+    :return: um dicionario com as informações do csv e a lista de `RawDisciplina` em "disciplinas"
+    """
+
+    ret: dict = {}
+    # le as linhas do csv
+    linhas = texto_csv.splitlines()
+    # salva as informacoes na linha inicial do arquivo
+    ret.update(
+        get_informacoes_csv(linhas[0])
+    )
+
+    # pula as linhas que nao tem informacao, retirando os brancos e o ';' final se tiver
+    linhas = list(map(str.rstrip, filter(RE_DISCIPLINA.match, linhas), repeat(' \n\r;')))
+    separadores = set(map(str.count, linhas, repeat(';')))
+
+    if len(separadores) == 1 and separadores <= {10, 12, 13}:
+        ret['disciplinas'] = _converte_colunas(linhas, separadores.pop() + 1)
+    else:
+        ret['disciplinas'] = _converte_linhas(linhas)
 
     return ret
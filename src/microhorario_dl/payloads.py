@@ -1,7 +1,11 @@
-__all__ = ["PayloadMicrohorario", "PayloadModo"]
+__all__ = ["FiltrosConsulta", "PayloadMicrohorario", "PayloadModo"]
 
+from dataclasses import dataclass, fields
 from enum import Enum, auto
 
+# typing stuff
+from typing import Dict, List, Optional
+
 
 class PayloadModo(Enum):
     """Modo de utilização dos Payloads"""
@@ -9,6 +13,76 @@ class PayloadModo(Enum):
     HORARIO = auto()            # utiliza a configuração alternativa
 
 
+# campo do dataclass -> campo do formulário
+_CAMPOS_FILTROS = {
+    'departamento': "txtCodigoDptDcp",
+    'nome': "txtNomeDcp",
+    'creditos': "txtQtdCreditos",
+    'professor': "txtNomeProfessor",
+    'bloqueio': "ddlBloqueio",
+    'dia': "ddlDia",
+    'hora_inicio': "txtHoraInicio",
+    'hora_fim': "txtHoraFim",
+    'turno': "ddlTurno",
+    'depto_solicitante': "ddlDeptoSolicitante",
+}
+
+# campos que não existem no formulário do Horarios e Salas
+_CAMPOS_SEM_FALLBACK = ("txtQtdCreditos", "ddlBloqueio", "ddlTurno")
+
+
+@dataclass(frozen=True)
+class FiltrosConsulta:
+    # noinspection PyUnresolvedReferences
+    """Filtros do próprio formulário do microhorario, aplicados pelo servidor
+
+    Com filtros, o servidor gera um CSV somente com as turmas encontradas, que é muito menor
+    que o completo. Os valores são os mesmos digitados ou escolhidos no formulário, e os
+    campos None ficam com o valor padrão (sem filtro).
+
+    :arg departamento: código do departamento ou da disciplina (ex. INF ou INF1007)
+    :arg nome: nome da disciplina
+    :arg creditos: quantidade de créditos. Não existe no Horarios e Salas
+    :arg professor: nome do professor
+    :arg bloqueio: valor da opção de bloqueio. Não existe no Horarios e Salas
+    :arg dia: valor da opção do dia, como no formulário
+    :arg hora_inicio: hora de início, como no formulário
+    :arg hora_fim: hora de fim, como no formulário
+    :arg turno: valor da opção do turno. Não existe no Horarios e Salas
+    :arg depto_solicitante: valor da opção do departamento solicitante
+    """
+    departamento: Optional[str] = None
+    nome: Optional[str] = None
+    creditos: Optional[int] = None
+    professor: Optional[str] = None
+    bloqueio: Optional[str] = None
+    dia: Optional[str] = None
+    hora_inicio: Optional[str] = None
+    hora_fim: Optional[str] = None
+    turno: Optional[str] = None
+    depto_solicitante: Optional[str] = None
+
+    def como_payload(self, modo: PayloadModo = PayloadModo.MICROHORARIO) -> Dict[str, str]:
+        """
+        Retorna os campos do formulário dos filtros definidos. No modo fallback, os filtros
+        que não existem no Horarios e Salas são ignorados (ver `ignorados_no_fallback`).
+        """
+        ret = {
+            _CAMPOS_FILTROS[x.name]: str(getattr(self, x.name))
+            for x in fields(self)
+            if getattr(self, x.name) is not None
+        }
+        if modo == PayloadModo.HORARIO:
+            for x in _CAMPOS_SEM_FALLBACK:
+                ret.pop(x, None)
+        return ret
+
+    def ignorados_no_fallback(self) -> List[str]:
+        """Campos do formulário dos filtros definidos que não existem no Horarios e Salas"""
+        definidos = {_CAMPOS_FILTROS[x.name] for x in fields(self) if getattr(self, x.name) is not None}
+        return [x for x in _CAMPOS_SEM_FALLBACK if x in definidos]
+
+
 class PayloadMicrohorario:
     _INTERMEDIARIO = {
         "ScriptManager1": "pnlConteudo|btnBuscar",
@@ -51,36 +125,36 @@ class PayloadMicrohorario:
         "__LASTFOCUS": ""
     }
 
-    MODO = PayloadModo.MICROHORARIO
-
-    @classmethod
-    def altera_modo(cls):
-        cls.MODO = PayloadModo.MICROHORARIO if cls.MODO == PayloadModo.HORARIO else PayloadModo.HORARIO
+    # o modo não é guardado aqui: cada download guarda o seu em um `ContextoDownload`
 
     @classmethod
-    def get_modo(cls):
-        return cls.MODO
+    def intermediario(cls,
+                      modo: PayloadModo = PayloadModo.MICROHORARIO,
+                      filtros: Optional[FiltrosConsulta] = None) -> dict:
+        """Retorna uma cópia do payload da consulta intermediaria para o modo, com os filtros"""
+        return cls._monta(cls._INTERMEDIARIO, modo, filtros)
 
     @classmethod
-    def intermediario(cls) -> dict:
-        if cls.MODO == PayloadModo.MICROHORARIO:
-            return cls._INTERMEDIARIO
-        else:
-            # removendo as opções que não existem no payload para o Horarios e Salas
-            return cls._remove(cls._INTERMEDIARIO)
+    def final(cls,
+              modo: PayloadModo = PayloadModo.MICROHORARIO,
+              filtros: Optional[FiltrosConsulta] = None) -> dict:
+        """Retorna uma cópia do payload da consulta final para o modo, com os filtros"""
+        return cls._monta(cls._FINAL, modo, filtros)
 
     @classmethod
-    def final(cls) -> dict:
-        if cls.MODO == PayloadModo.MICROHORARIO:
-            return cls._FINAL
+    def _monta(cls, payload: dict, modo: PayloadModo, filtros: Optional[FiltrosConsulta]) -> dict:
+        if modo == PayloadModo.MICROHORARIO:
+            ret = payload.copy()
         else:
             # removendo as opções que não existem no payload para o Horarios e Salas
-            return cls._remove(cls._FINAL)
+            ret = cls._remove(payload)
+        if filtros is not None:
+            ret.update(filtros.como_payload(modo))
+        return ret
 
     @classmethod
     def _remove(cls, payload: dict):
         ret = payload.copy()
-        del ret["txtQtdCreditos"]
-        del ret["ddlBloqueio"]
-        del ret["ddlTurno"]
+        for x in _CAMPOS_SEM_FALLBACK:
+            del ret[x]
         return ret
@@ -0,0 +1,208 @@
+"""Perfil de memória das etapas do download, com `tracemalloc`
+
+O perfil é opcional: ele é ativado passando um `PerfilMemoria` para `Microhorario.download`
+e `Microhorario.coletar_extra`, ou definindo a variável de ambiente `MICROHORARIO_PERFIL`
+com o caminho do relatório. Para cada etapa são medidos o pico de memória, a memória que
+continuou alocada no final da etapa, e os locais do código que mais alocaram.
+
+O mesmo perfil pode ser usado por downloads em threads diferentes: cada thread tem a sua
+própria pilha de etapas. Mas o `tracemalloc` mede o processo inteiro, e o seu pico é um só,
+então os números só são exatos quando uma thread mede etapas de cada vez. Com etapas
+simultâneas em threads diferentes, a memória inclui as alocações das outras threads, e o pico
+não é reiniciado no início das etapas: ele fica maior que o real (desde a última etapa
+iniciada sem outras threads), mas nunca menor.
+
+O relatório é um JSON, para poder ser comparado entre versões:
+
+    {
+        "versao": "...", "python": "...", "data": "...",
+        "etapas": [
+            {"nome": "download/consultas", "pico": ..., "retido": ..., "duracao": ..., "locais": [...]},
+            ...
+        ]
+    }
+"""
+
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+# typing stuff
+from typing import ContextManager, Iterator, List, Optional
+
+
+VARIAVEL_AMBIENTE = 'MICROHORARIO_PERFIL'
+
+
+class _Etapa:
+    def __init__(self, nome: str, inicial: int, snapshot: tracemalloc.Snapshot, sobrecarga: float):
+        self.nome = nome
+        self.inicial = inicial
+        self.snapshot = snapshot
+        self.pico = inicial
+        self.sobrecarga = sobrecarga
+        self.inicio = time.perf_counter()
+
+
+class PerfilMemoria:
+    """Mede a memória de cada etapa, e guarda os resultados para o relatório"""
+
+    def __init__(self, caminho: Optional[str] = None, quantidade_locais: int = 10, quadros: int = 1):
+        """
+        Cria o perfil. O `tracemalloc` só é iniciado durante as etapas medidas.
+
+        :param caminho: arquivo do relatório, escrito sempre que uma etapa de primeiro nível
+        termina. Se None, o relatório só é escrito com `salva`
+
+        :param quantidade_locais: quantidade de locais do código listados em cada etapa
+
+        :param quadros: quantidade de quadros da pilha guardados para cada alocação
+        """
+        self.caminho = caminho
+        self._quantidade_locais = quantidade_locais
+        self._quadros = quadros
+        self._local = threading.local()     # pilha de etapas e sobrecarga de cada thread
+        self._trava = threading.RLock()     # protege `_ativas`, `_iniciou_tracemalloc`, `etapas` e o arquivo
+        self._ativas = 0                    # etapas de primeiro nível em andamento, em todas as threads
+        self._iniciou_tracemalloc = False
+        self.etapas: List[dict] = []
+
+    def __repr__(self):
+        return f'<PerfilMemoria [{len(self.etapas)} etapas]>'
+
+    @property
+    def _pilha(self) -> List[_Etapa]:
+        """Etapas em andamento na thread atual"""
+        pilha = getattr(self._local, 'pilha', None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+            self._local.sobrecarga = 0.0    # tempo gasto tirando snapshots, descontado das durações
+        return pilha
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        inicio = time.perf_counter()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        self._local.sobrecarga += time.perf_counter() - inicio
+        return snapshot
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        """
+        Mede a memória do bloco. Etapas podem ser aninhadas, e o nome de uma etapa interna
+        é prefixado pelo nome da externa (por exemplo, "download/parsing").
+
+        :param nome: nome da etapa
+        """
+        pilha = self._pilha
+        if not pilha:
+            with self._trava:
+                self._ativas += 1
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(self._quadros)
+                    self._iniciou_tracemalloc = True
+
+        atual, pico = tracemalloc.get_traced_memory()
+        if pilha:
+            # o pico é reiniciado para a etapa interna, então a externa guarda o pico até aqui
+            pilha[-1].pico = max(pilha[-1].pico, pico)
+            nome = f'{pilha[-1].nome}/{nome}'
+        etapa = _Etapa(nome, atual, self._snapshot(), self._local.sobrecarga)
+        pilha.append(etapa)
+        with self._trava:
+            # o pico é do processo: reiniciá-lo com etapas de outras threads em andamento
+            # apagaria o pico delas. python 3.9+, antes disso o pico é desde o início
+            if self._ativas == 1 and hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+
+        try:
+            yield
+        finally:
+            final, pico = tracemalloc.get_traced_memory()
+            etapa.pico = max(etapa.pico, pico)
+            duracao = time.perf_counter() - etapa.inicio - (self._local.sobrecarga - etapa.sobrecarga)
+            snapshot = self._snapshot()
+            inicio_comparacao = time.perf_counter()
+            diferencas = snapshot.compare_to(etapa.snapshot, 'lineno')
+            self._local.sobrecarga += time.perf_counter() - inicio_comparacao
+            pilha.pop()
+            del etapa.snapshot, snapshot
+
+            resultado = {
+                'nome': etapa.nome,
+                'pico': etapa.pico - etapa.inicial,
+                'retido': final - etapa.inicial,
+                'duracao': round(duracao, 6),
+                'locais': [
+                    {
+                        'arquivo': x.traceback[0].filename,
+                        'linha': x.traceback[0].lineno,
+                        'retido': x.size_diff,
+                        'alocacoes': x.count_diff,
+                    }
+                    for x in diferencas[:self._quantidade_locais]
+                ],
+            }
+            with self._trava:
+                self.etapas.append(resultado)
+
+            if pilha:
+                pilha[-1].pico = max(pilha[-1].pico, etapa.pico)
+            else:
+                with self._trava:
+                    # o tracemalloc só é parado quando nenhuma thread tem etapas em andamento
+                    self._ativas -= 1
+                    if self._ativas == 0 and self._iniciou_tracemalloc:
+                        tracemalloc.stop()
+                        self._iniciou_tracemalloc = False
+                if self.caminho is not None:
+                    self.salva(self.caminho)
+
+    def relatorio(self) -> dict:
+        """Retorna o relatório com todas as etapas medidas até agora"""
+        from . import __version__
+        with self._trava:
+            etapas = list(self.etapas)
+        return {
+            'versao': __version__,
+            'python': platform.python_version(),
+            'data': datetime.now(timezone.utc).isoformat(),
+            'etapas': etapas,
+        }
+
+    def salva(self, caminho: str):
+        """Escreve o relatório em JSON"""
+        with self._trava:
+            with open(caminho, 'w', encoding='utf-8') as f:
+                json.dump(self.relatorio(), f, indent=2)
+
+
+_perfil_ambiente: Optional[PerfilMemoria] = None
+_trava_ambiente = threading.Lock()
+
+
+def perfil_do_ambiente() -> Optional[PerfilMemoria]:
+    """
+    Retorna o perfil definido pela variável de ambiente `MICROHORARIO_PERFIL`, ou None.
+    O mesmo perfil é usado por todas as chamadas, acumulando as etapas no mesmo relatório.
+    """
+    global _perfil_ambiente
+    caminho = os.environ.get(VARIAVEL_AMBIENTE)
+    if not caminho:
+        return None
+    with _trava_ambiente:
+        if _perfil_ambiente is None or _perfil_ambiente.caminho != caminho:
+            _perfil_ambiente = PerfilMemoria(caminho)
+        return _perfil_ambiente
+
+
+def etapa(perfil: Optional[PerfilMemoria], nome: str) -> ContextManager:
+    """Mede a etapa se houver um perfil, ou não faz nada"""
+    return perfil.etapa(nome) if perfil is not None else nullcontext()
@@ -0,0 +1,120 @@
+"""Coleta das ementas em pipeline: download em threads, parsing em processos
+
+O download das páginas é limitado pela rede, e o parsing com o BeautifulSoup é limitado
+pela CPU (e pelo GIL). Por isso, as páginas são baixadas por um pool de threads, e o html
+é enviado assim que chega para um pool de processos. Os resultados são retornados na mesma
+ordem dos códigos, e no máximo `tamanho_fila` disciplinas ficam em andamento ao mesmo tempo,
+limitando a memória usada pelas páginas baixadas.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from time import sleep
+from warnings import warn
+
+# typing stuff
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+# local imports
+from .ementa import baixa_pagina_ementa, processa_pagina_ementa
+from .latencia import MetricasLatencia
+
+
+Extra = Tuple[str, List[List[str]], Optional[int]]
+
+
+def coleta_em_pipeline(codigos: Iterable[str],
+                       concorrencia: int = 8,
+                       processos: Optional[int] = None,
+                       tamanho_fila: int = 64,
+                       cliente=None,
+                       espera: float = 0.2,
+                       atraso_hedge: Optional[float] = None,
+                       metricas: Optional[MetricasLatencia] = None) -> Iterator[Tuple[str, Optional[Extra]]]:
+    """
+    Coleta a ementa, pré-requisitos e créditos de cada disciplina.
+
+    Erros no download ou no parsing de uma disciplina são avisados, e o resultado
+    dessa disciplina é None.
+
+    :param codigos: códigos das disciplinas
+
+    :param concorrencia: quantidade de downloads simultâneos
+
+    :param processos: quantidade de processos para o parsing. Se None, um por CPU
+
+    :param tamanho_fila: quantidade máxima de disciplinas em andamento (baixando, esperando
+    o parsing ou esperando para serem retornadas)
+
+    :param cliente: sessão do `requests` usada para os downloads. Se None, usa o próprio `requests`
+
+    :param espera: tempo, em segundos, que cada thread espera depois de um download, com ou sem erro
+
+    :param atraso_hedge: ver `ementa.baixa_pagina_ementa`
+
+    :param metricas: registra a latência dos downloads, ver `ementa.baixa_pagina_ementa`
+
+    :return: um gerador de pares (codigo, (ementa, prerequisitos, creditos) ou None), na ordem de `codigos`
+    """
+    if tamanho_fila < 1:
+        raise ValueError("O tamanho da fila deve ser pelo menos 1")
+
+    def baixa(cod: str) -> Optional[str]:
+        try:
+            return baixa_pagina_ementa(cod, cliente, atraso_hedge=atraso_hedge, metricas=metricas)
+        finally:
+            # espera também depois de um erro, para não repetir as requisições sem pausa
+            if espera > 0:
+                sleep(espera)
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as io, ProcessPoolExecutor(max_workers=processos) as cpu:
+
+        def envia_para_parsing(download: Future, resultado: Future):
+            """Chamado na thread do download assim que ele termina"""
+            if download.cancelled():
+                resultado.cancel()
+                return
+            try:
+                parsing = cpu.submit(processa_pagina_ementa, download.result())
+            except Exception as e:
+                resultado.set_exception(e)
+                return
+            parsing.add_done_callback(lambda f: _copia_resultado(f, resultado))
+
+        pendentes: Deque[Tuple[str, Future, Future]] = deque()
+        restantes = iter(codigos)
+
+        def enche_fila():
+            while len(pendentes) < tamanho_fila:
+                cod = next(restantes, None)
+                if cod is None:
+                    return
+                resultado = Future()
+                download = io.submit(baixa, cod)
+                download.add_done_callback(lambda f, r=resultado: envia_para_parsing(f, r))
+                pendentes.append((cod, download, resultado))
+
+        try:
+            enche_fila()
+            while pendentes:
+                cod, _, resultado = pendentes.popleft()
+                try:
+                    extra = resultado.result()
+                except Exception as e:
+                    warn(f"Erro ao coletar ementa da disciplina {cod}: {e}")
+                    extra = None
+                enche_fila()
+                yield cod, extra
+        finally:
+            # caso o gerador seja interrompido, não começa os downloads que faltam
+            for _, download, _ in pendentes:
+                download.cancel()
+
+
+def _copia_resultado(origem: Future, destino: Future):
+    if origem.cancelled():
+        destino.cancel()
+    elif origem.exception() is not None:
+        destino.set_exception(origem.exception())
+    else:
+        destino.set_result(origem.result())
@@ -0,0 +1,115 @@
+"""Planejamento da coleta das ementas, baixando somente as páginas necessárias
+
+A página da ementa de uma disciplina traz a ementa, os pré-requisitos e os créditos. Nem
+sempre todos são necessários, e o CSV já responde parte deles:
+
+    - disciplinas com `pre_req` falso não têm pré-requisitos, então a lista vazia é
+      preenchida sem baixar a página;
+    - os créditos só são desconhecidos (-1) no modo fallback;
+    - campos já coletados, ou disciplinas no cache, também não precisam da página.
+
+O plano lista as disciplinas que precisam da página e o motivo de cada disciplina ignorada,
+e depois de executado guarda a quantidade real de requisições, para comparar com a estimativa:
+
+    plano = micro.planejar_coleta(campos=['creditos'])
+    micro.executar_plano(plano)
+    print(plano.estimativa, plano.requisicoes)
+"""
+
+from dataclasses import dataclass, field
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from . import Microhorario
+    from .cache import CacheEmentas
+
+
+CAMPOS = ('ementa', 'prerequisitos', 'creditos')
+
+
+@dataclass
+class PlanoColeta:
+    """Resultado de `planeja_coleta`
+
+    Attributes:
+        campos -- campos pedidos, entre `CAMPOS`
+        codigos -- disciplinas cuja página será baixada
+        sem_prerequisitos -- disciplinas que recebem a lista vazia de pré-requisitos sem baixar a página
+        do_cache -- disciplinas preenchidas pelo cache, sem baixar a página
+        ignoradas -- motivo de cada disciplina filtrada que não precisa da página
+        requisicoes -- requisições feitas na execução, ou None se o plano não foi executado
+    """
+    campos: List[str]
+    codigos: List[str] = field(default_factory=list)
+    sem_prerequisitos: List[str] = field(default_factory=list)
+    do_cache: List[str] = field(default_factory=list)
+    ignoradas: Dict[str, str] = field(default_factory=dict)
+    requisicoes: Optional[int] = None
+
+    def __repr__(self):
+        return f'<PlanoColeta [{self.estimativa} requisições, {len(self.ignoradas)} ignoradas]>'
+
+    @property
+    def estimativa(self) -> int:
+        """Quantidade estimada de requisições (uma por página, sem contar hedges e erros)"""
+        return len(self.codigos)
+
+
+def planeja_coleta(micro: "Microhorario",
+                   campos: Iterable[str] = CAMPOS,
+                   codigos: Optional[Iterable[str]] = None,
+                   departamentos: Optional[Iterable[str]] = None,
+                   cache: Optional["CacheEmentas"] = None) -> PlanoColeta:
+    """
+    Calcula o menor conjunto de páginas que precisam ser baixadas para preencher os campos.
+
+    Não faz nenhuma requisição, e não altera as disciplinas.
+
+    :param micro: o microhorario
+
+    :param campos: campos necessários, entre 'ementa', 'prerequisitos' e 'creditos'
+
+    :param codigos: se não for None, considera somente essas disciplinas
+
+    :param departamentos: se não for None, considera somente as disciplinas desses departamentos
+
+    :param cache: cache das ementas. Disciplinas presentes nele não precisam da página
+    """
+    campos = list(dict.fromkeys(campos))
+    desconhecidos = set(campos) - set(CAMPOS)
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    disciplinas = micro.disciplinas
+    if codigos is not None:
+        codigos = {x.upper() for x in codigos}
+        disciplinas = [x for x in disciplinas if x.codigo in codigos]
+    if departamentos is not None:
+        departamentos = {x.upper() for x in departamentos}
+        disciplinas = [x for x in disciplinas if x.departamento.codigo in departamentos]
+
+    plano = PlanoColeta(campos=campos)
+    for d in disciplinas:
+        # os campos coletados são lidos sem disparar uma coleta sob demanda
+        faltando = []
+        sem_prerequisitos = False
+        if 'ementa' in campos and d.ementa_coletada is None:
+            faltando.append('ementa')
+        if 'prerequisitos' in campos and d.prerequisitos_coletados is None:
+            if d.pre_req:
+                faltando.append('prerequisitos')
+            else:
+                sem_prerequisitos = True
+                plano.sem_prerequisitos.append(d.codigo)
+        if 'creditos' in campos and d.creditos <= 0:
+            faltando.append('creditos')
+
+        if not faltando:
+            plano.ignoradas[d.codigo] = 'sem pré-requisitos' if sem_prerequisitos else 'já conhecida'
+        elif cache is not None and cache.get(d.codigo) is not None:
+            plano.do_cache.append(d.codigo)
+        else:
+            plano.codigos.append(d.codigo)
+    return plano
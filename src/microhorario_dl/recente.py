@@ -0,0 +1,190 @@
+"""Acesso a um `Microhorario` sempre disponível, atualizado em segundo plano
+
+O `MicrohorarioRecente` guarda o último microhorario baixado. Quando ele fica mais velho que
+a `validade`, o próximo acesso ainda retorna o microhorario atual, sem esperar, e começa o
+download do novo em uma thread. Somente um download acontece por vez, e o novo microhorario
+substitui o anterior de uma só vez, então quem está usando o anterior não é afetado:
+
+    recente = MicrohorarioRecente(validade=600, caminho='microhorario.json')
+    micro = recente.get()
+
+Com `caminho`, o último microhorario é salvo em disco, e carregado na criação do próximo
+`MicrohorarioRecente`, evitando o download inicial.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from warnings import warn
+
+# typing stuff
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+# local imports
+from .contexto import ContextoDownload
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+class MicrohorarioRecente:
+    """Microhorario em memória, baixado de novo em segundo plano quando fica velho"""
+
+    def __init__(self,
+                 validade: float = 600,
+                 caminho: Optional[str] = None,
+                 contexto: Optional[ContextoDownload] = None,
+                 baixa: Optional[Callable[[], "Microhorario"]] = None,
+                 espera_erro: float = 60):
+        """
+        Cria o acesso. Se `caminho` existir, o microhorario salvo nele é carregado, com a idade
+        do arquivo. Senão, o primeiro `get` faz o download.
+
+        :param validade: idade máxima, em segundos, antes de começar um novo download
+
+        :param caminho: arquivo json onde o último microhorario é salvo. Se None, nada é salvo
+
+        :param contexto: contexto reutilizado em todos os downloads, reaproveitando a sessão
+        (ver `Microhorario.download`). Se None, é criado um novo contexto
+
+        :param baixa: função que retorna um novo microhorario. Se None, usa
+        `Microhorario.download(contexto, manter_crus=False)`
+
+        :param espera_erro: tempo, em segundos, antes de tentar de novo depois de um download com erro
+        """
+        self.validade = validade
+        self.caminho = caminho
+        self.espera_erro = espera_erro
+        self._contexto = contexto if contexto is not None else ContextoDownload()
+        self._baixa = baixa if baixa is not None else self._baixa_padrao
+
+        # o par é sempre substituído por inteiro, então uma leitura nunca vê metade da troca
+        self._atual: Optional[Tuple["Microhorario", float]] = None
+        self._trava = threading.Lock()              # protege `_thread` e `_proxima_tentativa`
+        self._trava_download = threading.Lock()     # somente um download por vez
+        self._thread: Optional[threading.Thread] = None
+        self._proxima_tentativa = 0.0
+        self.ultimo_erro: Optional[BaseException] = None
+
+        if caminho is not None and os.path.exists(caminho):
+            self._carrega(caminho)
+
+    def __repr__(self):
+        idade = self.idade
+        return f'<MicrohorarioRecente [{"vazio" if idade is None else f"{idade:.0f}s"}]>'
+
+    def _baixa_padrao(self) -> "Microhorario":
+        from . import Microhorario
+        return Microhorario.download(self._contexto, manter_crus=False)
+
+    def _carrega(self, caminho: str):
+        from . import Microhorario
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                micro = Microhorario.from_json(json.load(f), manter_crus=False)
+            idade = max(0.0, time.time() - os.path.getmtime(caminho))
+        except (OSError, ValueError, KeyError) as e:
+            warn(f"Não foi possível carregar o microhorario salvo em {caminho}: {e}")
+            return
+        self._atual = (micro, time.monotonic() - idade)
+
+    def _salva(self, micro: "Microhorario"):
+        """Escreve o arquivo por completo antes de substituir o anterior, como em `CacheEmentas`"""
+        diretorio = os.path.dirname(os.path.abspath(self.caminho))
+        fd, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(micro.as_json(), f, ensure_ascii=False)
+            os.replace(temporario, self.caminho)
+        except BaseException:
+            os.remove(temporario)
+            raise
+
+    @property
+    def idade(self) -> Optional[float]:
+        """Idade, em segundos, do microhorario atual, ou None se ainda não existe"""
+        atual = self._atual
+        return time.monotonic() - atual[1] if atual is not None else None
+
+    @property
+    def atualizando(self) -> bool:
+        """Se um download em segundo plano está acontecendo"""
+        with self._trava:
+            return self._thread is not None
+
+    def atualiza(self) -> "Microhorario":
+        """
+        Baixa um novo microhorario agora, esperando o download. Se outro download estiver
+        acontecendo, espera ele terminar e faz um novo.
+
+        :return: o novo microhorario
+        """
+        with self._trava_download:
+            return self._baixa_e_troca()
+
+    def _baixa_e_troca(self) -> "Microhorario":
+        """Faz o download e substitui o microhorario atual. Deve ser chamada com `_trava_download`"""
+        micro = self._baixa()
+        self._atual = (micro, time.monotonic())
+        if self.caminho is not None:
+            try:
+                self._salva(micro)
+            except OSError as e:
+                warn(f"Não foi possível salvar o microhorario em {self.caminho}: {e}")
+        return micro
+
+    def _atualiza_em_segundo_plano(self):
+        try:
+            self.atualiza()
+            self.ultimo_erro = None
+        except Exception as e:
+            self.ultimo_erro = e
+            with self._trava:
+                self._proxima_tentativa = time.monotonic() + self.espera_erro
+            warn(f"Erro ao atualizar o microhorario: {e}")
+        finally:
+            with self._trava:
+                self._thread = None
+
+    def _inicia_atualizacao(self):
+        with self._trava:
+            if self._thread is not None or time.monotonic() < self._proxima_tentativa:
+                return
+            self._thread = threading.Thread(
+                target=self._atualiza_em_segundo_plano, name='microhorario-recente', daemon=True
+            )
+            self._thread.start()
+
+    def get(self) -> "Microhorario":
+        """
+        Retorna o microhorario atual, sem esperar. Se ele for mais velho que a `validade`,
+        começa um download em segundo plano (se nenhum estiver acontecendo).
+
+        Somente o primeiro acesso, sem microhorario salvo, espera o download. Acessos
+        simultâneos nesse caso esperam o mesmo download.
+        """
+        atual = self._atual
+        if atual is None:
+            with self._trava_download:
+                atual = self._atual
+                if atual is None:
+                    return self._baixa_e_troca()
+
+        if time.monotonic() - atual[1] > self.validade:
+            self._inicia_atualizacao()
+        return atual[0]
+
+    def aguarda(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera o download em segundo plano terminar, se houver um
+
+        :return: False se o `timeout` terminou antes do download
+        """
+        with self._trava:
+            thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
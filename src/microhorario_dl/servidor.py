@@ -0,0 +1,192 @@
+"""Servidor HTTP somente leitura sobre um `Microhorario` em memória
+
+O microhorario é carregado uma única vez. Na criação do servidor, cada disciplina é
+serializada para JSON e indexada por departamento, professor, destino e horário, então
+as consultas só juntam respostas já serializadas. As respostas de cada caminho também
+são guardadas junto com o seu ETag, permitindo respostas 304 para clientes com cache.
+
+Rotas (todas GET):
+
+    /                               informações do microhorario
+    /disciplinas/<codigo>           uma disciplina
+    /departamentos/<codigo>         disciplinas do departamento
+    /professores/<nome>             disciplinas com alguma turma do professor
+    /destinos/<codigo>              disciplinas com alguma alocação para o destino
+    /horarios/<dia>/<hora>          disciplinas com aula no dia (SEG, TER...) e hora (0 à 23)
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+class IndicesConsulta:
+    """Disciplinas serializadas e indexadas para as consultas do servidor"""
+
+    def __init__(self, micro: "Microhorario", tamanho_cache: int = 4096):
+        """
+        Serializa e indexa todas as disciplinas do microhorario, em uma única passada.
+
+        :param micro: o microhorario servido
+
+        :param tamanho_cache: quantidade máxima de respostas guardadas
+        """
+        self._disciplinas: Dict[str, bytes] = {}
+        self._indices: Dict[str, Dict[str, List[str]]] = {
+            'departamentos': {}, 'professores': {}, 'destinos': {}, 'horarios': {}
+        }
+
+        def indexa(indice: str, chave: str, codigo: str):
+            codigos = self._indices[indice].setdefault(chave, [])
+            if not codigos or codigos[-1] != codigo:
+                codigos.append(codigo)
+
+        for d in micro.disciplinas:
+            self._disciplinas[d.codigo] = json.dumps(d.as_dict(), ensure_ascii=False).encode('utf-8')
+            indexa('departamentos', d.departamento.codigo.upper(), d.codigo)
+            for t in d.turmas:
+                indexa('professores', t.professor.strip().upper(), d.codigo)
+                for a in t.alocacoes:
+                    indexa('destinos', a.destino.codigo.upper(), d.codigo)
+                for h in t.horarios:
+                    if h is None:
+                        continue
+                    for hora in range(int(h.inicio), int(h.fim)):
+                        indexa('horarios', f'{h.dia}/{hora}', d.codigo)
+
+        self._info = json.dumps({
+            'periodo': micro.periodo,
+            'emissao': micro.emissao,
+            'atualizacao': micro.atualizacao,
+            'disciplinas': len(self._disciplinas),
+        }, ensure_ascii=False).encode('utf-8')
+
+        self._tamanho_cache = tamanho_cache
+        self._cache: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def _separa(caminho: str) -> Optional[Tuple[str, str]]:
+        """Separa o caminho em (recurso, chave normalizada), ou None se ele não tiver esse formato"""
+        partes = [unquote(x) for x in caminho.strip('/').split('/', 1)]
+        if partes == ['']:
+            return '', ''
+        if len(partes) != 2:
+            return None
+        return partes[0], partes[1].strip().upper()
+
+    def _monta(self, recurso: str, chave: str) -> Optional[bytes]:
+        """Monta o corpo da resposta, ou None se o recurso ou a chave não existirem"""
+        if not recurso:
+            return self._info
+        if recurso == 'disciplinas':
+            return self._disciplinas.get(chave)
+        if recurso not in self._indices:
+            return None
+
+        codigos = self._indices[recurso].get(chave)
+        if codigos is None:
+            return None
+        return b'[' + b','.join(self._disciplinas[x] for x in codigos) + b']'
+
+    def resposta(self, caminho: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Retorna o corpo e o ETag da resposta de um caminho, ou None se não existir.
+
+        As respostas são guardadas pelo recurso e a chave normalizada, então cada resposta só
+        é montada uma vez. Os caminhos que não existem não são guardados, para que chaves
+        inválidas não ocupem o cache.
+        """
+        separado = self._separa(caminho)
+        if separado is None:
+            return None
+        recurso, chave = separado
+        chave_cache = f'{recurso}/{chave}'
+
+        with self._trava:
+            salvo = self._cache.get(chave_cache)
+            if salvo is not None:
+                self._cache.move_to_end(chave_cache)
+                return salvo
+
+        corpo = self._monta(recurso, chave)
+        if corpo is None:
+            return None
+
+        salvo = (corpo, f'"{hashlib.sha1(corpo).hexdigest()}"')
+        with self._trava:
+            self._cache[chave_cache] = salvo
+            if len(self._cache) > self._tamanho_cache:
+                self._cache.popitem(last=False)
+        return salvo
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'       # mantém a conexão aberta entre requisições
+    server: "ServidorMicrohorario"
+
+    def do_GET(self):
+        resposta = self.server.indices.resposta(urlsplit(self.path).path)
+        if resposta is None:
+            corpo = b'{"erro": "nao encontrado"}'
+            self.send_response(404)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+            return
+
+        corpo, etag = resposta
+        if etag in (x.strip() for x in self.headers.get('If-None-Match', '').split(',')):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'public, max-age=60')
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ServidorMicrohorario(ThreadingHTTPServer):
+    """Servidor HTTP com uma thread por conexão, servindo um `IndicesConsulta`"""
+
+    daemon_threads = True
+
+    def __init__(self, micro: "Microhorario", host: str = '127.0.0.1', porta: int = 8000, verbose: bool = False):
+        """
+        Indexa o microhorario e abre o servidor. Para começar a responder, use `serve_forever`.
+
+        :param micro: o microhorario servido
+
+        :param host: endereço onde o servidor escuta
+
+        :param porta: porta onde o servidor escuta. Com 0, uma porta livre é escolhida,
+        e pode ser consultada em `server_address`
+
+        :param verbose: imprime cada requisição na saída de erro
+        """
+        self.indices = IndicesConsulta(micro)
+        self.verbose = verbose
+        super().__init__((host, porta), _Handler)
+
+    def __repr__(self):
+        return f'<ServidorMicrohorario [{self.server_address[0]}:{self.server_address[1]}]>'
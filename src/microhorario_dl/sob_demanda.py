@@ -0,0 +1,175 @@
+"""Coleta das ementas sob demanda, no primeiro acesso de cada disciplina
+
+Em vez de coletar as ementas de todas as disciplinas com `coletar_extra`, um coletor é
+associado a cada disciplina, e a ementa e os pré-requisitos só são baixados quando
+`Disciplina.ementa` ou `Disciplina.prerequisitos` são acessados pela primeira vez.
+
+Cada disciplina é baixada no máximo uma vez: os resultados são memorizados, e acessos
+simultâneos à mesma disciplina esperam pela mesma consulta. Os erros também são memorizados
+por `espera_erro` segundos, então uma disciplina com erro não é pedida novamente a cada acesso.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import sleep
+from warnings import warn
+
+# typing stuff
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+# local imports
+from .cache import CacheEmentas
+from .models import Disciplina
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+Extra = Tuple[str, List[List[str]], Optional[int]]
+
+
+class ColetorSobDemanda:
+    """Coleta, memoriza e aplica a ementa de uma disciplina quando ela é acessada"""
+
+    def __init__(self,
+                 micro: "Microhorario",
+                 cache: Optional[CacheEmentas] = None,
+                 concorrencia: int = 4,
+                 cliente=None,
+                 espera: float = 0.2,
+                 espera_erro: float = 60):
+        """
+        Cria o coletor. Para associá-lo às disciplinas, use `Microhorario.coletar_sob_demanda`.
+
+        :param micro: o microhorario das disciplinas
+
+        :param cache: cache opcional das ementas, consultado antes de cada download
+
+        :param concorrencia: quantidade de downloads simultâneos em `pre_carrega`
+
+        :param cliente: sessão do `requests` usada para os downloads. Se None, usa o próprio `requests`
+
+        :param espera: tempo, em segundos, que cada thread de `pre_carrega` espera depois de um download
+
+        :param espera_erro: tempo, em segundos, antes de tentar de novo uma disciplina cujo download
+        teve erro. Até lá, os acessos a ela retornam None sem fazer nenhuma requisição
+        """
+        self._micro = micro
+        self._cache = cache
+        self._concorrencia = concorrencia
+        self._cliente = cliente
+        self._espera = espera
+        self.espera_erro = espera_erro
+        self._resultados: Dict[str, Extra] = {}
+        self._falhas: Dict[str, Tuple[Exception, float]] = {}     # código -> (erro, próxima tentativa)
+        self._em_andamento: Dict[str, Future] = {}
+        self._trava = threading.Lock()
+
+    def __repr__(self):
+        return f'<ColetorSobDemanda [{len(self._resultados)} coletadas]>'
+
+    @property
+    def falhas(self) -> Dict[str, Exception]:
+        """Erro de cada disciplina cujo último download falhou e ainda não foi tentada de novo"""
+        with self._trava:
+            return {k: v[0] for k, v in self._falhas.items()}
+
+    def _memorizado(self, codigo: str) -> bool:
+        """Se a disciplina tem um resultado ou um erro memorizado. Deve ser chamada com `_trava`"""
+        if codigo in self._resultados:
+            return True
+        falha = self._falhas.get(codigo)
+        return falha is not None and time.monotonic() < falha[1]
+
+    def __call__(self, disciplina: Disciplina):
+        """Chamado pela disciplina no primeiro acesso à ementa ou aos pré-requisitos"""
+        self.coleta(disciplina.codigo)
+
+    def _baixa(self, codigo: str) -> Extra:
+        from .ementa import consulta_extra
+
+        if self._cache is not None:
+            salvo = self._cache.get(codigo)
+            if salvo is not None:
+                return salvo
+
+        extra = consulta_extra(codigo, self._cliente)
+        if self._cache is not None:
+            self._cache.set(codigo, *extra)
+        return extra
+
+    def coleta(self, codigo: str) -> Optional[Extra]:
+        """
+        Coleta e aplica a ementa, pré-requisitos e créditos de uma disciplina.
+
+        Se a disciplina já foi coletada, retorna o resultado memorizado. Se ela já está sendo
+        coletada em outra thread, espera por essa consulta em vez de fazer outra. Em caso de
+        erro, o erro é avisado e memorizado em `falhas`, e os acessos seguintes retornam None
+        sem fazer requisições, até passar `espera_erro`.
+
+        :param codigo: código da disciplina
+
+        :return: a tupla (ementa, prerequisitos, creditos), ou None em caso de erro
+        """
+        with self._trava:
+            extra = self._resultados.get(codigo)
+            if extra is not None:
+                return extra
+            if self._memorizado(codigo):
+                return None
+            futuro = self._em_andamento.get(codigo)
+            responsavel = futuro is None
+            if responsavel:
+                futuro = self._em_andamento[codigo] = Future()
+
+        if not responsavel:
+            try:
+                return futuro.result()
+            except Exception:
+                return None
+
+        try:
+            extra = self._baixa(codigo)
+        except Exception as e:
+            warn(f"Erro ao coletar ementa da disciplina {codigo}: {e}")
+            with self._trava:
+                self._falhas[codigo] = (e, time.monotonic() + self.espera_erro)
+                del self._em_andamento[codigo]
+            futuro.set_exception(e)
+            return None
+
+        disc = self._micro._disciplinas.get(codigo)
+        if disc is not None:
+            self._micro._aplica_extra(disc, *extra)
+        with self._trava:
+            self._resultados[codigo] = extra
+            self._falhas.pop(codigo, None)
+            del self._em_andamento[codigo]
+        futuro.set_result(extra)
+        return extra
+
+    def pre_carrega(self, codigos: Iterable[str]) -> List[Disciplina]:
+        """
+        Coleta várias disciplinas em paralelo, antes de serem acessadas.
+
+        As disciplinas já coletadas, ou com um erro memorizado, não são baixadas novamente.
+
+        :param codigos: códigos das disciplinas
+
+        :return: as disciplinas coletadas com sucesso, na ordem de `codigos`
+        """
+        codigos = [x for x in dict.fromkeys(codigos) if x in self._micro._disciplinas]
+
+        def coleta_e_espera(cod: str) -> Optional[Extra]:
+            with self._trava:
+                memorizado = self._memorizado(cod)
+            extra = self.coleta(cod)
+            if not memorizado and self._espera > 0:
+                sleep(self._espera)
+            return extra
+
+        with ThreadPoolExecutor(max_workers=max(1, self._concorrencia)) as executor:
+            resultados = list(executor.map(coleta_e_espera, codigos))
+
+        return [self._micro._disciplinas[x] for x, extra in zip(codigos, resultados) if extra is not None]
@@ -0,0 +1,276 @@
+"""Exportação do microhorario para um banco SQLite normalizado
+
+Cada período é guardado separadamente, permitindo que um único arquivo
+contenha o histórico de vários períodos. Exportar novamente um período
+substitui os dados anteriores desse período.
+"""
+
+import sqlite3
+
+# typing stuff
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from . import Microhorario
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS periodos (
+    periodo TEXT PRIMARY KEY,
+    emissao TEXT NOT NULL,
+    atualizacao TEXT NOT NULL,
+    modo_fallback INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS departamentos (
+    periodo TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    PRIMARY KEY (periodo, codigo)
+);
+
+CREATE TABLE IF NOT EXISTS destinos (
+    periodo TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    PRIMARY KEY (periodo, codigo)
+);
+
+CREATE TABLE IF NOT EXISTS disciplinas (
+    id INTEGER PRIMARY KEY,
+    periodo TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    creditos INTEGER NOT NULL,
+    pre_req INTEGER NOT NULL,
+    departamento TEXT NOT NULL,
+    ementa TEXT,
+    grupos_prerequisitos INTEGER,   -- quantidade de grupos, inclusive os vazios. NULL se não coletados
+    UNIQUE (periodo, codigo)
+);
+
+CREATE TABLE IF NOT EXISTS turmas (
+    id INTEGER PRIMARY KEY,
+    disciplina_id INTEGER NOT NULL REFERENCES disciplinas (id),
+    codigo TEXT NOT NULL,
+    professor TEXT NOT NULL,
+    turno TEXT NOT NULL,
+    horario_distancia INTEGER NOT NULL,
+    shf INTEGER NOT NULL,
+    localizacao TEXT NOT NULL,
+    horario_local TEXT NOT NULL,
+    UNIQUE (disciplina_id, codigo)
+);
+
+CREATE TABLE IF NOT EXISTS horarios (
+    turma_id INTEGER NOT NULL REFERENCES turmas (id),
+    dia TEXT NOT NULL,
+    inicio INTEGER NOT NULL,
+    fim INTEGER NOT NULL,
+    local TEXT
+);
+
+CREATE TABLE IF NOT EXISTS alocacoes (
+    turma_id INTEGER NOT NULL REFERENCES turmas (id),
+    destino TEXT NOT NULL,
+    vagas INTEGER NOT NULL,
+    PRIMARY KEY (turma_id, destino)
+);
+
+CREATE TABLE IF NOT EXISTS prerequisitos (
+    disciplina_id INTEGER NOT NULL REFERENCES disciplinas (id),
+    grupo INTEGER NOT NULL,
+    requisito TEXT NOT NULL,
+    PRIMARY KEY (disciplina_id, grupo, requisito)
+);
+
+CREATE INDEX IF NOT EXISTS idx_disciplinas_departamento ON disciplinas (periodo, departamento);
+CREATE INDEX IF NOT EXISTS idx_disciplinas_codigo ON disciplinas (codigo);
+CREATE INDEX IF NOT EXISTS idx_turmas_disciplina ON turmas (disciplina_id);
+CREATE INDEX IF NOT EXISTS idx_turmas_professor ON turmas (professor);
+CREATE INDEX IF NOT EXISTS idx_horarios_turma ON horarios (turma_id);
+CREATE INDEX IF NOT EXISTS idx_horarios_dia ON horarios (dia, inicio, fim);
+CREATE INDEX IF NOT EXISTS idx_alocacoes_destino ON alocacoes (destino);
+CREATE INDEX IF NOT EXISTS idx_prerequisitos_requisito ON prerequisitos (requisito);
+"""
+
+
+def _remove_periodo(conexao: sqlite3.Connection, periodo: str):
+    """Remove todos os dados de um período, para que ele possa ser exportado novamente"""
+    disciplinas = "SELECT id FROM disciplinas WHERE periodo = ?"
+    turmas = f"SELECT id FROM turmas WHERE disciplina_id IN ({disciplinas})"
+
+    conexao.execute(f"DELETE FROM horarios WHERE turma_id IN ({turmas})", (periodo,))
+    conexao.execute(f"DELETE FROM alocacoes WHERE turma_id IN ({turmas})", (periodo,))
+    conexao.execute(f"DELETE FROM turmas WHERE disciplina_id IN ({disciplinas})", (periodo,))
+    conexao.execute(f"DELETE FROM prerequisitos WHERE disciplina_id IN ({disciplinas})", (periodo,))
+    for tabela in ('disciplinas', 'departamentos', 'destinos', 'periodos'):
+        conexao.execute(f"DELETE FROM {tabela} WHERE periodo = ?", (periodo,))
+
+
+def exporta_sqlite(micro: "Microhorario", caminho: str):
+    """
+    Exporta o microhorario para um banco SQLite.
+
+    Todas as inserções são feitas em lote (`executemany`) dentro de uma única transação,
+    então o banco nunca fica com um período exportado pela metade.
+
+    :param micro: o microhorario a ser exportado
+
+    :param caminho: caminho do arquivo do banco. Será criado se não existir.
+    """
+    periodo = micro.periodo
+
+    periodos = [(periodo, micro.emissao, micro.atualizacao, int(micro.is_modo_fallback))]
+    departamentos = [(periodo, x.codigo, x.nome) for x in micro.departamentos]
+    destinos = [(periodo, k, v) for k, v in micro.destinos.items()]
+    disciplinas, turmas, horarios, alocacoes, prerequisitos = [], [], [], [], []
+
+    conexao = sqlite3.connect(caminho)
+    try:
+        conexao.executescript(ESQUEMA)
+        with conexao:
+            _remove_periodo(conexao, periodo)
+
+            # os ids são gerados aqui para que as tabelas possam ser inseridas em lote
+            id_disciplina = conexao.execute("SELECT COALESCE(MAX(id), 0) FROM disciplinas").fetchone()[0]
+            id_turma = conexao.execute("SELECT COALESCE(MAX(id), 0) FROM turmas").fetchone()[0]
+
+            for d in micro.disciplinas:
+                id_disciplina += 1
+                # somente o que já foi coletado, sem disparar coletas sob demanda
+                grupos = d.prerequisitos_coletados
+                disciplinas.append((
+                    id_disciplina, periodo, d.codigo, d.nome, d.creditos, int(d.pre_req),
+                    d.departamento.codigo, d.ementa_coletada, len(grupos) if grupos is not None else None
+                ))
+
+                for grupo, requisitos in enumerate(grupos or []):
+                    prerequisitos.extend(
+                        (id_disciplina, grupo, codigo) for codigo in dict.fromkeys(x.codigo for x in requisitos)
+                    )
+
+                for t in d.turmas:
+                    id_turma += 1
+                    turmas.append((
+                        id_turma, id_disciplina, t.codigo, t.professor, t.turno, t.horario_distancia,
+                        t.shf, t.localizacao if t.localizacao is not None else '', t.horario_local
+                    ))
+                    horarios.extend(
+                        (id_turma, h.dia, int(h.inicio), int(h.fim), h.local) for h in t.horarios if h is not None
+                    )
+                    for a in t.alocacoes:
+                        alocacoes.append((id_turma, a.destino.codigo, a.vagas))
+
+            conexao.executemany("INSERT INTO periodos VALUES (?, ?, ?, ?)", periodos)
+            conexao.executemany("INSERT INTO departamentos VALUES (?, ?, ?)", departamentos)
+            conexao.executemany("INSERT INTO destinos VALUES (?, ?, ?)", destinos)
+            conexao.executemany("INSERT INTO disciplinas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", disciplinas)
+            conexao.executemany("INSERT INTO turmas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", turmas)
+            conexao.executemany("INSERT INTO horarios VALUES (?, ?, ?, ?, ?)", horarios)
+            conexao.executemany("INSERT INTO alocacoes VALUES (?, ?, ?)", alocacoes)
+            conexao.executemany("INSERT INTO prerequisitos VALUES (?, ?, ?)", prerequisitos)
+    finally:
+        conexao.close()
+
+
+def lista_periodos(caminho: str) -> List[str]:
+    """Retorna os períodos exportados no banco, em ordem crescente"""
+    conexao = sqlite3.connect(caminho)
+    try:
+        return [x[0] for x in conexao.execute("SELECT periodo FROM periodos ORDER BY periodo")]
+    finally:
+        conexao.close()
+
+
+def carrega_sqlite(caminho: str, periodo: Optional[str] = None) -> dict:
+    """
+    Lê um período do banco, no mesmo formato retornado por `Microhorario.as_json`.
+
+    :param caminho: caminho do arquivo do banco
+
+    :param periodo: o período a ser lido. Se None, é lido o período mais recente.
+
+    :return: um dicionario no formato de `as_json`, pronto para `Microhorario.from_json`
+    """
+    conexao = sqlite3.connect(caminho)
+    try:
+        if periodo is None:
+            linha = conexao.execute("SELECT MAX(periodo) FROM periodos").fetchone()
+        else:
+            linha = conexao.execute("SELECT periodo FROM periodos WHERE periodo = ?", (periodo,)).fetchone()
+        if linha is None or linha[0] is None:
+            raise KeyError(f"Período {periodo} não encontrado em {caminho}")
+        periodo = linha[0]
+
+        emissao, atualizacao, modo_fallback = conexao.execute(
+            "SELECT emissao, atualizacao, modo_fallback FROM periodos WHERE periodo = ?", (periodo,)
+        ).fetchone()
+
+        disciplinas = {}
+        for id_d, codigo, nome, creditos, pre_req, departamento, ementa, quantidade_grupos in conexao.execute(
+                "SELECT id, codigo, nome, creditos, pre_req, departamento, ementa, grupos_prerequisitos "
+                "FROM disciplinas WHERE periodo = ? ORDER BY id", (periodo,)):
+            disciplinas[id_d] = {
+                'nome': nome,
+                'codigo': codigo,
+                'pre_req': bool(pre_req),
+                'creditos': creditos,
+                'departamento': departamento,
+                'ementa': ementa,
+                'prerequisitos': [[] for _ in range(quantidade_grupos)] if quantidade_grupos is not None else None,
+                'turmas': []
+            }
+
+        turmas = {}
+        for id_t, id_d, codigo, professor, turno, distancia, shf, localizacao, horario_local in conexao.execute(
+                "SELECT t.id, t.disciplina_id, t.codigo, t.professor, t.turno, t.horario_distancia, t.shf, "
+                "t.localizacao, t.horario_local FROM turmas t JOIN disciplinas d ON d.id = t.disciplina_id "
+                "WHERE d.periodo = ? ORDER BY t.id", (periodo,)):
+            turma = {
+                'professor': professor,
+                'codigo': codigo,
+                'turno': turno,
+                'horario_distancia': distancia,
+                'shf': shf,
+                'horarios': [],
+                'localizacao': localizacao,
+                'horario_local': horario_local,
+                'alocacoes': []
+            }
+            turmas[id_t] = turma
+            disciplinas[id_d]['turmas'].append(turma)
+
+        for id_t, dia, inicio, fim, local in conexao.execute(
+                "SELECT h.turma_id, h.dia, h.inicio, h.fim, h.local FROM horarios h JOIN turmas t ON t.id = h.turma_id "
+                "JOIN disciplinas d ON d.id = t.disciplina_id WHERE d.periodo = ? ORDER BY h.rowid", (periodo,)):
+            turmas[id_t]['horarios'].append({'dia': dia, 'inicio': inicio, 'fim': fim, 'local': local})
+
+        for id_t, destino, vagas in conexao.execute(
+                "SELECT a.turma_id, a.destino, a.vagas FROM alocacoes a JOIN turmas t ON t.id = a.turma_id "
+                "JOIN disciplinas d ON d.id = t.disciplina_id WHERE d.periodo = ? ORDER BY a.rowid", (periodo,)):
+            turmas[id_t]['alocacoes'].append({'destino': destino, 'vagas': vagas})
+
+        for id_d, grupo, requisito in conexao.execute(
+                "SELECT p.disciplina_id, p.grupo, p.requisito FROM prerequisitos p "
+                "JOIN disciplinas d ON d.id = p.disciplina_id WHERE d.periodo = ? "
+                "ORDER BY p.rowid", (periodo,)):
+            disciplinas[id_d]['prerequisitos'][grupo].append(requisito)
+
+        return {
+            'periodo': periodo,
+            'emissao': emissao,
+            'atualizacao': atualizacao,
+            'departamentos': [
+                {'nome': nome, 'codigo': codigo} for codigo, nome in conexao.execute(
+                    "SELECT codigo, nome FROM departamentos WHERE periodo = ? ORDER BY rowid", (periodo,))
+            ],
+            'destinos': [
+                {'nome': nome, 'codigo': codigo} for codigo, nome in conexao.execute(
+                    "SELECT codigo, nome FROM destinos WHERE periodo = ? ORDER BY rowid", (periodo,))
+            ],
+            'modo_fallback': bool(modo_fallback),
+            'disciplinas': list(disciplinas.values())
+        }
+    finally:
+        conexao.close()
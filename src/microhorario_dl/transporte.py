@@ -0,0 +1,165 @@
+"""Gravação e reprodução das requisições HTTP, para downloads sem acesso à rede
+
+O `ClienteGravador` envolve uma sessão do `requests` e grava cada troca (requisição e
+resposta, incluindo os redirecionamentos). O `ClienteReprodutor` lê a gravação e responde
+às mesmas requisições com objetos `requests.Response`, sem acessar a rede. Os dois podem ser
+usados em qualquer lugar que aceite um cliente, como `ContextoDownload(cliente=...)` e o
+`cliente` da coleta das ementas:
+
+    gravador = ClienteGravador()
+    micro = Microhorario.download(ContextoDownload(cliente=gravador))
+    micro.coletar_extra(cliente=gravador)
+    gravador.salva('gravacao.json')
+
+    reprodutor = ClienteReprodutor('gravacao.json')
+    micro = Microhorario.download(ContextoDownload(cliente=reprodutor))
+
+As requisições são identificadas pelo método, url, parâmetros e dados do formulário. Se a
+mesma requisição foi gravada várias vezes, as respostas são reproduzidas na mesma ordem, e a
+última continua sendo usada depois disso.
+"""
+
+import base64
+import json
+import threading
+from collections import deque
+
+# typing stuff
+from typing import Any, Deque, Dict, List, Optional
+
+# local imports
+from .exceptions import RecordingNotFoundError
+
+
+VERSAO = 1
+
+
+def _chave(metodo: str, url: str, params: Optional[dict], data: Optional[dict]) -> str:
+    """Identifica uma requisição, independente da ordem dos parâmetros e dos dados"""
+    return json.dumps([
+        metodo.upper(),
+        url,
+        sorted((params or {}).items()),
+        sorted((data or {}).items()) if isinstance(data, dict) else data
+    ], ensure_ascii=False)
+
+
+def _grava_resposta(r) -> Dict[str, Any]:
+    return {
+        'status': r.status_code,
+        'url': r.url,
+        'razao': r.reason,
+        'headers': dict(r.headers),
+        'cookies': r.cookies.get_dict(),
+        'encoding': r.encoding,
+        'conteudo': base64.b64encode(r.content).decode('ascii'),
+        'historico': [_grava_resposta(x) for x in r.history],
+    }
+
+
+def _cria_resposta(gravada: Dict[str, Any], conteudo: bytes):
+    """Cria um `requests.Response` novo a partir de uma resposta gravada"""
+    from requests import Response
+    from requests.cookies import cookiejar_from_dict
+    from requests.structures import CaseInsensitiveDict
+
+    r = Response()
+    r.status_code = gravada['status']
+    r.url = gravada['url']
+    r.reason = gravada['razao']
+    r.headers = CaseInsensitiveDict(gravada['headers'])
+    r.cookies = cookiejar_from_dict(gravada['cookies'])
+    r.encoding = gravada['encoding']
+    r._content = conteudo
+    r.history = [_cria_resposta(x, base64.b64decode(x['conteudo'])) for x in gravada['historico']]
+    return r
+
+
+class ClienteGravador:
+    """Cliente HTTP que repassa as requisições para uma sessão real e grava as trocas"""
+
+    def __init__(self, cliente=None):
+        """
+        :param cliente: sessão do `requests` usada nas requisições. Se None, cria uma nova sessão
+        """
+        if cliente is None:
+            import requests
+            cliente = requests.Session()
+        self._cliente = cliente
+        self._trocas: List[Dict[str, Any]] = []
+        self._trava = threading.Lock()
+
+    def __repr__(self):
+        return f'<ClienteGravador [{len(self._trocas)} trocas]>'
+
+    def _grava(self, metodo: str, url: str, params, data, r):
+        troca = {
+            'metodo': metodo,
+            'url': url,
+            'params': params,
+            'data': data,
+            'resposta': _grava_resposta(r),
+        }
+        with self._trava:
+            self._trocas.append(troca)
+
+    def get(self, url: str, params=None, **kwargs):
+        r = self._cliente.get(url, params=params, **kwargs)
+        self._grava('GET', url, params, None, r)
+        return r
+
+    def post(self, url: str, data=None, params=None, **kwargs):
+        r = self._cliente.post(url, data=data, params=params, **kwargs)
+        self._grava('POST', url, params, data, r)
+        return r
+
+    def salva(self, caminho: str):
+        """Escreve todas as trocas gravadas até agora em um arquivo JSON"""
+        with self._trava:
+            dados = {'versao': VERSAO, 'trocas': list(self._trocas)}
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+
+
+class ClienteReprodutor:
+    """Cliente HTTP que responde às requisições com as respostas de uma gravação"""
+
+    def __init__(self, caminho: str):
+        """
+        Carrega a gravação. O conteúdo das respostas é decodificado uma única vez, aqui.
+
+        :param caminho: arquivo gerado por `ClienteGravador.salva`
+        """
+        with open(caminho, encoding='utf-8') as f:
+            dados = json.load(f)
+        if dados.get('versao') != VERSAO:
+            raise ValueError(f"Versão da gravação não suportada: {dados.get('versao')}")
+
+        self._respostas: Dict[str, Deque] = {}
+        for troca in dados['trocas']:
+            chave = _chave(troca['metodo'], troca['url'], troca['params'], troca['data'])
+            resposta = troca['resposta']
+            self._respostas.setdefault(chave, deque()).append(
+                (resposta, base64.b64decode(resposta['conteudo']))
+            )
+        self._trava = threading.Lock()
+        self.requisicoes = 0
+
+    def __repr__(self):
+        return f'<ClienteReprodutor [{len(self._respostas)} requisições gravadas]>'
+
+    def _responde(self, metodo: str, url: str, params, data):
+        chave = _chave(metodo, url, params, data)
+        with self._trava:
+            self.requisicoes += 1
+            respostas = self._respostas.get(chave)
+            if respostas is None:
+                raise RecordingNotFoundError(metodo, url)
+            gravada, conteudo = respostas.popleft() if len(respostas) > 1 else respostas[0]
+        return _cria_resposta(gravada, conteudo)
+
+    def get(self, url: str, params=None, **kwargs):
+        return self._responde('GET', url, params, None)
+
+    def post(self, url: str, data=None, params=None, **kwargs):
+        return self._responde('POST', url, params, data)
@@ -5,6 +5,15 @@ URL_INICIAL = 'https://www.puc-rio.br/microhorario'
 URL_CONSULTA = 'http://microhorario.rdc.puc-rio.br/WebMicroHorarioConsulta/MicroHorarioConsulta.aspx'
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:98.0) Gecko/20100101 Firefox/98.0'
 
+# tempos limite, em segundos, de cada requisição: (conexão, leitura)
+TEMPO_CONEXAO = 10.0
+TEMPOS_LEITURA = {
+    'inicial': 30.0,
+    'intermediaria': 30.0,
+    'final': 120.0,     # o servidor demora para gerar o csv completo
+    'ementa': 30.0,
+}
+
 
 def pegar_sessao_da_url(url: str) -> str:
     """
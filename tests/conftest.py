@@ -0,0 +1,102 @@
+"""Fixtures compartilhadas: um csv pequeno do microhorario e um cliente HTTP falso
+
+O cliente responde às três consultas do microhorario e às páginas das ementas sem
+acessar a rede, então os testes rodam offline.
+"""
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.contexto import ContextoDownload
+
+
+CABECALHO = [
+    "Período: 20231;Emitido em: 05/04/2023 16:24 h; Data da última atualização: 05/04/2023 13:50h;",
+    "Código;Nome;Professor;Créditos;Turma;Destino;Vagas;Turno;Horário;Distância;SHF;Pré;Depto;",
+]
+
+# (codigo, nome, professor, creditos, turma, destino, vagas, turno, horario, distancia, shf, pre_req, depto)
+LINHAS = [
+    ("INF1005", "PROGRAMACAO I", "ANA SILVA", "4", "3WA", "QQC", "40", "M", "SEG 07-09 L520  QUA 07-09 L520", "0", "0", "NÃO", "INF"),
+    ("INF1005", "PROGRAMACAO I", "BRUNO COSTA", "4", "3WB", "CIC", "30", "M", "TER 07-09 L521  QUI 07-09 L521", "0", "0", "NÃO", "INF"),
+    ("INF1005", "PROGRAMACAO I", "BRUNO COSTA", "4", "3WB", "ENG", "10", "M", "TER 07-09 L521  QUI 07-09 L521", "0", "0", "NÃO", "INF"),
+    ("INF1007", "PROGRAMACAO II", "ANA SILVA", "4", "3WA", "QQC", "35", "T", "SEG 13-15 L522  QUA 13-15 L522", "0", "0", "SIM", "INF"),
+    ("INF1010", "ESTRUTURAS DE DADOS", "CARLA SOUZA", "4", "3WA", "CIC", "0", "T", "SEG 13-15 L522  QUA 15-17 L523", "0", "0", "SIM", "INF"),
+    ("MAT1161", "CALCULO A UMA VARIAVEL", "DANIEL LIMA", "4", "2VA", "QQC", "60", "M", "SEG 07-09 L101  QUA 09-11 L101", "0", "0", "NÃO", "MAT"),
+    ("MAT1200", "ALGEBRA LINEAR", "ANA SILVA", "4", "2VA", "QQC", "50", "M", "SEG 08-10 L102", "2", "0", "SIM", "MAT"),
+]
+
+EMENTA = (
+    '<p id="pEmenta">Ementa de {codigo}</p>'
+    '<div id="prerequisito">{grupos}</div>'
+    '<h2 id="hCreditos">4 créditos</h2>'
+)
+
+HTML_INICIAL = '''<html><body><form>
+<input id="__VIEWSTATEGENERATOR" value="GEN1"/><input id="__EVENTVALIDATION" value="EV1"/><input id="__VIEWSTATE" value="VS1"/>
+<select id="ddlBloqueio"><option value="1">QQC - Qualquer curso</option><option value="2">CIC - Ciencia da Computacao</option></select>
+<select id="ddlDeptoSolicitante"><option value="INF">INF - Informatica</option><option value="MAT">MAT - Matematica</option></select>
+</form></body></html>'''
+
+
+def gera_ementa(codigo: str, grupos=(('INF1005',),)) -> str:
+    """Monta a página da ementa, com um <span> por grupo de pré-requisitos"""
+    return EMENTA.format(
+        codigo=codigo,
+        grupos=''.join('<span>' + ''.join(f'<a>{x}</a>' for x in grupo) + '</span>' for grupo in grupos)
+    )
+
+
+def gera_csv(linhas=LINHAS, emissao: str = "05/04/2023 16:24 h") -> str:
+    """Monta o texto do csv no formato do microhorario, com os campos separados por ' ; '"""
+    cabecalho = [CABECALHO[0].replace("05/04/2023 16:24 h", emissao), CABECALHO[1]]
+    return "\r\n".join(cabecalho + [" ; ".join(x) + " ;" for x in linhas])
+
+
+def resposta(url: str, texto: str, tipo: str = 'text/html', encoding: str = 'utf-8', status: int = 200):
+    r = requests.Response()
+    r.status_code = status
+    r.url = url
+    r._content = texto.encode(encoding)
+    r.encoding = encoding
+    r.headers = CaseInsensitiveDict({'Content-Type': tipo})
+    r.cookies.set('ASP.NET_SessionId', 'abc')
+    return r
+
+
+class ClienteFalso:
+    """Cliente HTTP que responde como o microhorario e o site das ementas"""
+
+    def __init__(self, csv: str = None):
+        self.csv = csv if csv is not None else gera_csv()
+        self.requisicoes = []
+        self.falhar_ementas = False
+        self.prerequisitos = {}     # código -> grupos de pré-requisitos. As demais têm [['INF1005']]
+
+    def get(self, url, **kwargs):
+        self.requisicoes.append(('GET', url))
+        if 'ementa' in url:
+            if self.falhar_ementas:
+                raise requests.ConnectionError("sem rede")
+            codigo = url.rsplit('=', 1)[-1]
+            return resposta(url, gera_ementa(codigo, self.prerequisitos.get(codigo, (('INF1005',),))))
+        return resposta(url + ('' if 'sessao' in url else '?sessao=ABC'), HTML_INICIAL)
+
+    def post(self, url, data=None, **kwargs):
+        self.requisicoes.append(('POST', url))
+        if 'btnDownload' in (data or {}):
+            return resposta(url, self.csv, tipo='text/csv', encoding='utf-16')
+        return resposta(url, '|__VIEWSTATEGENERATOR|GEN2|__EVENTVALIDATION|EV2|__VIEWSTATE|VS2|')
+
+
+@pytest.fixture
+def cliente():
+    return ClienteFalso()
+
+
+@pytest.fixture
+def micro(cliente) -> Microhorario:
+    return Microhorario.download(ContextoDownload(cliente=cliente))
@@ -0,0 +1,51 @@
+import pytest
+
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.arquivo import ArquivoSnapshots
+from microhorario_dl.contexto import ContextoDownload
+from conftest import LINHAS, ClienteFalso, gera_csv
+
+
+@pytest.fixture
+def arquivo(tmp_path):
+    return ArquivoSnapshots(str(tmp_path / 'arquivo'))
+
+
+def test_salva_e_carrega(micro, arquivo):
+    ident = arquivo.salva(micro, salvar_indice=True)
+    assert arquivo.snapshots() == [ident]
+    assert arquivo.snapshots('20231') == [ident] and arquivo.snapshots('20222') == []
+
+    carregado = arquivo.carrega(ident)
+    assert carregado.as_json() == micro.as_json()
+    assert [x.codigo for x in carregado.buscar('estruturas')] == ['INF1010']
+
+
+def test_carrega_le_o_manifesto_uma_vez(micro, arquivo, monkeypatch):
+    ident = arquivo.salva(micro, salvar_indice=True)
+    lidos = []
+    original = arquivo._le_manifesto
+    monkeypatch.setattr(arquivo, '_le_manifesto', lambda x: lidos.append(x) or original(x))
+
+    arquivo.carrega(ident)
+    assert lidos == [ident]
+
+
+def test_deduplicacao_e_historico(micro, arquivo, tmp_path):
+    primeiro = arquivo.salva(micro)
+    objetos = sorted((tmp_path / 'arquivo' / 'objetos').rglob('*'))
+
+    # somente a INF1010 muda no segundo snapshot
+    linhas = list(LINHAS)
+    linhas[4] = linhas[4][:6] + ("5",) + linhas[4][7:]
+    segundo = arquivo.salva(Microhorario.download(ContextoDownload(cliente=ClienteFalso(gera_csv(linhas)))))
+    novos = set((tmp_path / 'arquivo' / 'objetos').rglob('*')) - set(objetos)
+    assert len([x for x in novos if x.is_file()]) == 1
+
+    historico = arquivo.historico('INF1010')
+    assert [x['snapshot'] for x in historico] == [primeiro, segundo]
+    assert arquivo.versao(historico[1]['objeto'])['turmas'][0]['alocacoes'][0]['vagas'] == 5
+    assert [x['snapshot'] for x in arquivo.historico('INF1005')] == [primeiro]
+    assert len(arquivo.historico('INF1005', somente_alteracoes=False)) == 2
+
@@ -0,0 +1,33 @@
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.auditoria import GrupoConflito
+from microhorario_dl.contexto import ContextoDownload
+from conftest import ClienteFalso, gera_csv
+
+
+def test_conflitos_de_sala_e_professor(micro):
+    # a turma 3WB de INF1005 aparece em duas linhas (CIC e ENG), o que não é conflito
+    assert micro.auditar_conflitos() == [
+        GrupoConflito('sala', 'L522', 'SEG', 13, 15, [('INF1007', '3WA'), ('INF1010', '3WA')]),
+        GrupoConflito('professor', 'ANA SILVA', 'SEG', 7, 10, [('INF1005', '3WA'), ('MAT1200', '2VA')]),
+    ]
+
+
+def test_conflitos_em_cadeia():
+    def linha(codigo, professor, horario):
+        return (codigo, "DISCIPLINA", professor, "4", "1AA", "QQC", "10", "M", horario, "0", "0", "NÃO", "FIS")
+
+    linhas = [
+        linha("FIS1001", "A", "TER 07-09 L200"),
+        linha("FIS1002", "B", "TER 08-10 L200"),
+        linha("FIS1003", "C", "TER 09-11 L200"),
+        # começa no fim do grupo anterior, então não se sobrepõe
+        linha("FIS1004", "D", "TER 11-13 L200"),
+        linha("FIS1005", "d", "TER 12-14 L201"),
+    ]
+    micro = Microhorario.download(ContextoDownload(cliente=ClienteFalso(gera_csv(linhas))))
+    assert micro.auditar_conflitos() == [
+        GrupoConflito('sala', 'L200', 'TER', 7, 11, [('FIS1001', '1AA'), ('FIS1002', '1AA'), ('FIS1003', '1AA')]),
+        # o nome do professor não diferencia maiúsculas
+        GrupoConflito('professor', 'D', 'TER', 11, 14, [('FIS1004', '1AA'), ('FIS1005', '1AA')]),
+    ]
@@ -0,0 +1,49 @@
+# local imports
+from microhorario_dl.busca import IndiceBusca, normaliza
+
+
+def _codigos(disciplinas):
+    return [x.codigo for x in disciplinas]
+
+
+def test_normaliza():
+    assert normaliza('Cálculo a Uma Variável (INF-1007)') == ['calculo', 'a', 'uma', 'variavel', 'inf', '1007']
+
+
+def test_busca_por_campo_e_trechos(micro):
+    # sem diferenciar acentos, e o código pesa mais que o nome
+    assert _codigos(micro.buscar('programação')) == ['INF1005', 'INF1007']
+    assert _codigos(micro.buscar('inf1007')) == ['INF1007']
+    # professores, com empate resolvido pelo código
+    assert _codigos(micro.buscar('silva')) == ['INF1005', 'INF1007', 'MAT1200']
+    # começo e trecho de palavras
+    assert _codigos(micro.buscar('estrut')) == ['INF1010']
+    assert _codigos(micro.buscar('gramac')) == ['INF1005', 'INF1007']
+    assert _codigos(micro.buscar('ca')) == ['MAT1161', 'INF1010']
+
+
+def test_todos_os_termos_precisam_ser_encontrados(micro):
+    assert _codigos(micro.buscar('programacao ii')) == ['INF1007']
+    assert micro.buscar('programacao calculo') == []
+    assert micro.buscar('') == []
+    assert len(micro.buscar('a', limite=2)) == 2
+
+
+def test_indice_atualizado_com_a_ementa(micro, cliente):
+    indice = micro.indice_busca()
+    assert micro.buscar('ementa') == []
+
+    for _ in micro.iter_coletar_extra(cliente=cliente, espera=0):
+        pass
+    assert micro.indice_busca() is indice
+    assert sorted(_codigos(micro.buscar('ementa', limite=None))) == sorted(_codigos(micro.disciplinas))
+
+
+def test_como_dados(micro):
+    indice = micro.indice_busca()
+    copia = IndiceBusca.de_dados(indice.como_dados())
+    assert copia.busca('programacao') == indice.busca('programacao')
+
+    copia.remove('INF1005')
+    assert [x for x, _ in copia.busca('programacao')] == ['INF1007']
+    assert len(copia) == len(indice) - 1
@@ -0,0 +1,49 @@
+import json
+import re
+
+# local imports
+from microhorario_dl import Microhorario, cli
+from microhorario_dl.contexto import ContextoDownload
+from conftest import ClienteFalso, resposta
+
+
+def test_json_igual_a_as_json(monkeypatch, tmp_path):
+    # a linha de comando usa o cliente falso no lugar da rede
+    monkeypatch.setattr(cli, 'ContextoDownload', lambda **kw: ContextoDownload(**dict(kw, cliente=ClienteFalso())))
+    saida = tmp_path / 'micro.json'
+
+    assert cli.main(['-f', 'json', '-o', str(saida)]) == 0
+
+    esperado = Microhorario.download(ContextoDownload(cliente=ClienteFalso())).as_json()
+    assert esperado['destinos']
+    assert json.loads(saida.read_text(encoding='utf-8')) == esperado
+
+
+class ClienteFiltrado(ClienteFalso):
+    """Cliente falso que, como o servidor, só retorna o departamento filtrado no csv"""
+
+    def post(self, url, data=None, **kwargs):
+        resp = super().post(url, data, **kwargs)
+        departamento = (data or {}).get('txtCodigoDptDcp')
+        if 'btnDownload' in (data or {}) and departamento:
+            # remove as linhas de disciplinas de outros departamentos
+            linhas = [x for x in resp.text.splitlines()
+                      if re.match('[A-Z]{3}[0-9]{4}', x) is None or x.startswith(departamento)]
+            resp = resposta(url, '\r\n'.join(linhas), tipo='text/csv', encoding='utf-16')
+        return resp
+
+
+def test_ementas_com_departamento_mantem_prerequisitos_de_outros(monkeypatch, tmp_path):
+    cliente = ClienteFiltrado()
+    cliente.prerequisitos = {'INF1007': [['MAT1161'], ['INF1005']]}
+    # o cliente é usado tanto no download quanto na coleta das ementas
+    executa = cli._executa
+    monkeypatch.setattr(cli, '_executa', lambda args, saida, progresso, perfil, _: executa(
+        args, saida, progresso, perfil, cliente))
+    saida = tmp_path / 'micro.ndjson'
+
+    assert cli.main(['-d', 'INF', '--ementas', '--concorrencia', '1', '-o', str(saida)]) == 0
+
+    disciplinas = {x['codigo']: x for x in map(json.loads, saida.read_text(encoding='utf-8').splitlines())}
+    assert set(disciplinas) == {'INF1005', 'INF1007', 'INF1010'}
+    assert disciplinas['INF1007']['prerequisitos'] == [['MAT1161'], ['INF1005']]
@@ -0,0 +1,46 @@
+import pytest
+
+# local imports
+import microhorario_dl
+from microhorario_dl import pipeline
+
+
+def _esperas(monkeypatch, modulo):
+    esperas = []
+    monkeypatch.setattr(modulo, 'sleep', esperas.append)
+    return esperas
+
+
+def test_coleta_sequencial(micro, cliente):
+    coletadas = [x.codigo for x in micro.iter_coletar_extra(cliente=cliente, espera=0)]
+    assert coletadas == [x.codigo for x in micro.disciplinas]
+    disc = micro.disciplinas[1]
+    assert disc.ementa == f'Ementa de {disc.codigo}'
+    assert [[x.codigo for x in g] for g in disc.prerequisitos] == [['INF1005']]
+
+
+def test_espera_tambem_depois_de_erros(micro, cliente, monkeypatch):
+    esperas = _esperas(monkeypatch, microhorario_dl)
+    cliente.falhar_ementas = True
+    with pytest.warns(UserWarning):
+        coletadas = list(micro.iter_coletar_extra(cliente=cliente, espera=0.5))
+    assert len(coletadas) == len(micro.disciplinas)
+    assert esperas == [0.5] * len(micro.disciplinas)
+
+
+def test_pipeline_com_processos_na_ordem(micro, cliente):
+    codigos = [x.codigo for x in micro.disciplinas][::-1]
+    coletadas = [x.codigo for x in micro.iter_coletar_extra(codigos, concorrencia=3, processos=2,
+                                                             tamanho_fila=2, cliente=cliente, espera=0)]
+    assert coletadas == codigos
+    assert all(x.ementa_coletada == f'Ementa de {x.codigo}' for x in micro.disciplinas)
+
+
+def test_pipeline_espera_depois_de_erros(cliente, monkeypatch):
+    esperas = _esperas(monkeypatch, pipeline)
+    cliente.falhar_ementas = True
+    with pytest.warns(UserWarning):
+        resultado = list(pipeline.coleta_em_pipeline(['INF1005', 'INF1007'], processos=1, cliente=cliente,
+                                                     espera=0.5))
+    assert resultado == [('INF1005', None), ('INF1007', None)]
+    assert esperas == [0.5, 0.5]
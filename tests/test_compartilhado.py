@@ -0,0 +1,49 @@
+import pytest
+
+# local imports
+from microhorario_dl.compartilhado import MicrohorarioCompartilhado, publica_snapshot
+
+
+@pytest.fixture
+def caminho(micro, cliente, tmp_path):
+    for _ in micro.iter_coletar_extra(cliente=cliente, espera=0):
+        pass
+    caminho = str(tmp_path / 'micro.snapshot')
+    publica_snapshot(micro, caminho)
+    return caminho
+
+
+def test_as_json_igual_ao_microhorario(micro, caminho):
+    with MicrohorarioCompartilhado(caminho) as visao:
+        assert visao.as_json() == micro.as_json()
+        assert [x.as_dict() for x in visao.disciplinas] == [x.as_dict() for x in micro.disciplinas]
+
+
+def test_prerequisitos_sao_os_mesmos_objetos_depois_do_cache(caminho):
+    with MicrohorarioCompartilhado(caminho, tamanho_cache=1) as visao:
+        disc = visao.disciplina('INF1007')
+        requisito = disc.prerequisitos[0][0]
+        assert requisito.codigo == 'INF1005'
+        # somente a disciplina pedida entra no cache, não os seus pré-requisitos
+        assert list(visao._cache) == ['INF1007']
+
+        visao.disciplina('MAT1161')
+        assert list(visao._cache) == ['MAT1161']
+        assert visao.disciplina('INF1005') is requisito
+        assert visao.disciplina('MAT1200').prerequisitos[0][0] is requisito
+
+
+def test_consultas_iguais_ao_microhorario(micro, caminho, tmp_path):
+    from microhorario_dl import Microhorario
+    from microhorario_dl.matricula import PlanoMatricula
+
+    planos = [PlanoMatricula(destino='CIC', turmas=[('INF1005', '3WB'), ('INF1007', '3WA')], concluidas=['INF1005'])]
+    with MicrohorarioCompartilhado(caminho) as visao:
+        assert visao.destinos == micro.destinos
+        assert visao.estatisticas().como_dict() == micro.estatisticas().como_dict()
+        assert visao.auditar_conflitos() == micro.auditar_conflitos()
+        assert visao.validar_matriculas(planos) == micro.validar_matriculas(planos)
+
+        banco = str(tmp_path / 'visao.db')
+        visao.exportar_sqlite(banco)
+        assert Microhorario.from_sqlite(banco).as_json() == micro.as_json()
@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+import requests
+
+# local imports
+from microhorario_dl.ementa import baixa_pagina_ementa
+from microhorario_dl.latencia import MetricasLatencia
+from conftest import ClienteFalso
+
+
+class ClienteLento(ClienteFalso):
+    """Cliente falso em que a primeira requisição de cada ementa só termina quando liberada"""
+
+    def __init__(self, falhar_primeira: bool = False, falhar_segunda: bool = False):
+        super().__init__()
+        self.liberada = threading.Event()
+        self.falhar_primeira = falhar_primeira
+        self.falhar_segunda = falhar_segunda
+        self._trava = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._trava:
+            primeira = not any(x == ('GET', url) for x in self.requisicoes)
+        if primeira:
+            resp = super().get(url, **kwargs)
+            self.liberada.wait(5)
+            if self.falhar_primeira:
+                raise requests.Timeout("lenta")
+            return resp
+        if self.falhar_segunda:
+            self.requisicoes.append(('GET', url))
+            raise requests.ConnectionError("sem rede")
+        return super().get(url, **kwargs)
+
+
+def test_hedge_usa_a_primeira_resposta():
+    cliente, metricas = ClienteLento(), MetricasLatencia()
+    try:
+        html = baixa_pagina_ementa('INF1007', cliente, atraso_hedge=0.05, metricas=metricas)
+    finally:
+        cliente.liberada.set()
+
+    assert 'Ementa de INF1007' in html
+    assert len(cliente.requisicoes) == 2
+    resumo = metricas.resumo()
+    assert resumo['ementa']['quantidade'] == 1
+    assert resumo['ementa_hedge']['quantidade'] == 1
+    assert resumo['ementa']['maximo'] < 5
+
+
+def test_sem_hedge_se_a_resposta_chega_a_tempo():
+    cliente, metricas = ClienteFalso(), MetricasLatencia()
+    html = baixa_pagina_ementa('INF1007', cliente, atraso_hedge=5, metricas=metricas)
+    assert 'Ementa de INF1007' in html
+    assert len(cliente.requisicoes) == 1
+    assert 'ementa_hedge' not in metricas.resumo()
+
+
+def test_hedge_espera_a_outra_se_uma_falhar():
+    cliente = ClienteLento(falhar_segunda=True)
+    threading.Timer(0.2, cliente.liberada.set).start()
+    html = baixa_pagina_ementa('INF1007', cliente, atraso_hedge=0.05)
+    assert 'Ementa de INF1007' in html
+    assert len(cliente.requisicoes) == 2
+
+
+def test_hedge_falha_se_as_duas_falharem():
+    cliente = ClienteLento(falhar_primeira=True, falhar_segunda=True)
+    threading.Timer(0.2, cliente.liberada.set).start()
+    with pytest.raises((requests.ConnectionError, requests.Timeout)):
+        baixa_pagina_ementa('INF1007', cliente, atraso_hedge=0.05)
+    assert len(cliente.requisicoes) == 2
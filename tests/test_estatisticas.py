@@ -0,0 +1,48 @@
+import pytest
+
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.contexto import ContextoDownload
+from microhorario_dl.estatisticas import EstatisticasMicrohorario
+from conftest import LINHAS, ClienteFalso, gera_csv
+
+
+def test_agregacoes(micro):
+    estatisticas = micro.estatisticas()
+    assert micro.estatisticas() is estatisticas
+    assert estatisticas.como_dict() == {
+        'totais': {'alocacoes': 7, 'disciplinas': 5, 'turmas': 6, 'vagas': 225},
+        'vagas_por_departamento': {'INF': 115, 'MAT': 110},
+        'vagas_por_destino': {'CIC': 30, 'ENG': 10, 'QQC': 185},
+        'turmas_por_turno': {'M': 4, 'T': 2},
+        'disciplinas_por_creditos': {4: 5},
+        'horas_distancia_por_departamento': {'MAT': 2},
+        'shf_por_departamento': {},
+    }
+    assert estatisticas.tabela('vagas_por_destino') == (['CIC', 'ENG', 'QQC'], [30, 10, 185])
+    with pytest.raises(KeyError):
+        estatisticas.metrica('vagas_por_sala')
+
+
+def test_atualizadas_com_os_creditos_coletados():
+    # créditos e vagas desconhecidos, como no csv do 'Horarios e Salas'
+    linhas = [x[:3] + ('-',) + x[4:6] + ('-',) + x[7:] if x[0] == 'MAT1161' else x for x in LINHAS]
+    cliente = ClienteFalso(gera_csv(linhas))
+    micro = Microhorario.download(ContextoDownload(cliente=cliente))
+
+    estatisticas = micro.estatisticas()
+    assert estatisticas.metrica('disciplinas_por_creditos') == {-1: 1, 4: 4}
+    assert estatisticas.metrica('totais')['vagas'] == 165
+
+    for _ in micro.iter_coletar_extra(cliente=cliente, espera=0):
+        pass
+    assert estatisticas.metrica('disciplinas_por_creditos') == {4: 5}
+    assert estatisticas.como_dict() == EstatisticasMicrohorario(micro.disciplinas).como_dict()
+
+
+def test_remove(micro):
+    estatisticas = EstatisticasMicrohorario(micro.disciplinas)
+    estatisticas.remove('MAT1200')
+    estatisticas.remove('MAT9999')
+    assert estatisticas.metrica('horas_distancia_por_departamento') == {}
+    assert estatisticas.metrica('vagas_por_departamento') == {'INF': 115, 'MAT': 60}
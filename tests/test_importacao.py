@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+# local imports
+import microhorario_dl
+
+
+def _executa(codigo: str) -> str:
+    # o subprocesso importa o mesmo pacote que os testes, sem os módulos já importados por eles
+    ambiente = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(microhorario_dl.__file__)))
+    resultado = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True, env=ambiente)
+    return resultado.stdout.strip()
+
+
+def test_importar_nao_carrega_modulos_pesados():
+    assert _executa(
+        "import microhorario_dl, sys; "
+        "print(','.join(x for x in ('requests', 'bs4', 'tracemalloc', 'concurrent.futures') if x in sys.modules))"
+    ) == ''
+
+
+def test_submodulos_do_all_disponiveis():
+    assert _executa(
+        "import microhorario_dl; "
+        "print(','.join(x for x in microhorario_dl.__all__ if not hasattr(microhorario_dl, x)))"
+    ) == ''
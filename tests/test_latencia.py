@@ -0,0 +1,57 @@
+import pytest
+
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.contexto import ContextoDownload
+from microhorario_dl.exceptions import DeadlineExceededError
+from microhorario_dl.latencia import MetricasLatencia
+from conftest import ClienteFalso
+
+
+def test_percentis():
+    metricas = MetricasLatencia()
+    for i in range(1, 101):
+        metricas.registra('final', i / 100)
+
+    assert metricas.percentil('final', 50) == 0.5
+    assert metricas.percentil('final', 99) == 0.99
+    assert metricas.resumo() == {'final': {'quantidade': 100, 'p50': 0.5, 'p99': 0.99, 'maximo': 1.0}}
+    with pytest.raises(KeyError):
+        metricas.percentil('inicial', 50)
+
+
+def test_erro_tambem_e_medido():
+    metricas = MetricasLatencia()
+    with pytest.raises(ValueError):
+        with metricas.mede('ementa'):
+            raise ValueError
+    assert metricas.resumo()['ementa']['quantidade'] == 1
+
+
+def test_download_mede_cada_consulta():
+    contexto = ContextoDownload(cliente=ClienteFalso())
+    Microhorario.download(contexto)
+    assert {x: y['quantidade'] for x, y in contexto.metricas.resumo().items()} == {
+        'inicial': 1, 'intermediaria': 1, 'final': 1
+    }
+
+    # reaproveitando a sessão, somente a consulta final é feita
+    Microhorario.download(contexto)
+    assert contexto.metricas.resumo()['final']['quantidade'] == 2
+    assert contexto.metricas.resumo()['inicial']['quantidade'] == 1
+
+
+def test_prazo():
+    contexto = ContextoDownload(cliente=ClienteFalso(), tempos_leitura={'final': 60})
+    contexto.inicia_prazo(5)
+    conexao, leitura = contexto.timeout('final')
+    assert conexao <= 5 and leitura <= 5
+
+    contexto.inicia_prazo(None)
+    assert contexto.timeout('final') == (contexto.tempo_conexao, 60)
+
+    # depois do prazo, nenhuma consulta começa
+    with pytest.raises(DeadlineExceededError) as erro:
+        Microhorario.download(contexto, prazo=0)
+    assert erro.value.etapa == 'inicial'
+    assert contexto.cliente.requisicoes == []
@@ -0,0 +1,90 @@
+import pytest
+
+# local imports
+from microhorario_dl.matricula import PlanoMatricula, ValidadorMatriculas, Violacao
+
+
+@pytest.fixture
+def validador(micro, cliente) -> ValidadorMatriculas:
+    for _ in micro.iter_coletar_extra(cliente=cliente, espera=0):
+        pass
+    return ValidadorMatriculas(micro)
+
+
+def test_violacoes_das_turmas(validador):
+    valido = validador.valida(PlanoMatricula('CIC', [('INF1005', '3WB'), ('INF1007', '3WA')], ['INF1005']))
+    assert valido.valido and not valido.avisos
+
+    relatorio = validador.valida(PlanoMatricula('CIC', [
+        ('INF9999', '3WA'),
+        ('INF1005', '3WA'),
+        ('inf1005', '3WB'),
+        ('INF1007', '3WA'),
+        ('INF1010', '3WA'),
+    ], ['INF1005']))
+    assert relatorio.violacoes == [
+        Violacao('turma_inexistente', 'INF9999', '3WA'),
+        Violacao('disciplina_repetida', 'INF1005', '3WB'),
+        Violacao('conflito_horario', 'INF1010', '3WA', 'INF1007-3WA'),
+        Violacao('sem_vagas', 'INF1010', '3WA', 'CIC'),
+    ]
+
+    # sem alocação para ENG nem para QQC
+    relatorio = validador.valida(PlanoMatricula('ENG', [('INF1010', '3WA')], ['INF1005']))
+    assert relatorio.violacoes == [Violacao('destino', 'INF1010', '3WA', 'ENG')]
+
+
+def test_prerequisitos(micro, cliente):
+    plano = PlanoMatricula('CIC', [('INF1007', '3WA')])
+
+    # sem a coleta, os pré-requisitos só geram um aviso
+    relatorio = ValidadorMatriculas(micro).valida(plano)
+    assert relatorio.valido
+    assert relatorio.avisos == ['Pré-requisitos de INF1007 não coletados']
+
+    for _ in micro.iter_coletar_extra(cliente=cliente, espera=0):
+        pass
+    relatorio = ValidadorMatriculas(micro).valida(plano)
+    assert relatorio.violacoes == [Violacao('prerequisito', 'INF1007', '3WA', 'INF1005')]
+    assert not relatorio.avisos
+
+
+def test_grupo_com_disciplina_fora_do_microhorario(micro, cliente):
+    cliente.prerequisitos = {'INF1007': [['XYZ1234'], ['INF1005']]}
+    for _ in micro.iter_coletar_extra(cliente=cliente, espera=0):
+        pass
+    validador = ValidadorMatriculas(micro)
+
+    # o grupo de XYZ1234 não pode ser verificado, então não vira uma violação
+    relatorio = validador.valida(PlanoMatricula('CIC', [('INF1007', '3WA')], ['XYZ1234']))
+    assert relatorio.valido
+    assert relatorio.avisos == ['Pré-requisitos de INF1007 fora do microhorario não verificados']
+
+    relatorio = validador.valida(PlanoMatricula('CIC', [('INF1007', '3WA')], ['INF1005']))
+    assert relatorio.valido and not relatorio.avisos
+
+
+def test_disputar_vagas(validador):
+    # a turma 3WB de INF1005 tem 10 vagas para ENG
+    planos = [PlanoMatricula('ENG', [('INF1005', '3WB')], identificador=str(i)) for i in range(11)]
+    planos.insert(0, PlanoMatricula('ENG', [('INF1005', '3WB'), ('INF9999', '3WA')]))
+
+    relatorios = validador.valida_lote(planos, disputar_vagas=True)
+    # o plano inválido não ocupa vaga
+    assert [x.valido for x in relatorios] == [False] + [True] * 10 + [False]
+    assert relatorios[-1].identificador == '10'
+    assert relatorios[-1].violacoes == [Violacao('vagas_esgotadas', 'INF1005', '3WB', 'ENG')]
+
+    assert all(x.valido for x in validador.valida_lote(planos[1:]))
+
+
+def test_valida_lote_em_processos(validador):
+    planos = [
+        PlanoMatricula('CIC', [('INF1005', '3WB'), ('INF1007', '3WA')], ['INF1005'], '1'),
+        PlanoMatricula('CIC', [('INF1007', '3WA'), ('INF1010', '3WA')], [], '2'),
+        PlanoMatricula('ENG', [('INF1010', '3WA')], ['INF1005'], '3'),
+    ] * 3
+
+    esperado = validador.valida_lote(planos)
+    assert validador.valida_lote(planos, processos=2, tamanho_bloco=2) == esperado
+    assert [x.identificador for x in esperado] == ['1', '2', '3'] * 3
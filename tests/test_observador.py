@@ -0,0 +1,38 @@
+# local imports
+from microhorario_dl import observador
+from microhorario_dl.observador import VAGAS, ObservadorVagas
+from conftest import LINHAS, ClienteFalso, gera_csv
+
+
+def test_csv_com_outra_emissao_nao_e_convertido(monkeypatch):
+    conversoes = []
+    original = observador.converte_para_json
+
+    def converte(texto):
+        conversoes.append(texto)
+        return original(texto)
+
+    monkeypatch.setattr(observador, 'converte_para_json', converte)
+
+    cliente = ClienteFalso()
+    obs = ObservadorVagas(cliente=cliente)
+    assert obs.verifica() == []
+    assert len(conversoes) == 1
+
+    cliente.csv = gera_csv(emissao="05/04/2023 16:25 h")
+    assert obs.verifica() == []
+    assert len(conversoes) == 1
+
+
+def test_mudanca_de_vagas_gera_evento():
+    cliente = ClienteFalso()
+    obs = ObservadorVagas(cliente=cliente)
+    obs.verifica()
+
+    linhas = list(LINHAS)
+    linhas[0] = linhas[0][:6] + ("39",) + linhas[0][7:]
+    cliente.csv = gera_csv(linhas, emissao="05/04/2023 16:25 h")
+    eventos = obs.verifica()
+    assert [(x.tipo, x.disciplina, x.turma, x.vagas_antes, x.vagas_depois) for x in eventos] == [
+        (VAGAS, "INF1005", "3WA", 40, 39)
+    ]
@@ -0,0 +1,37 @@
+import pytest
+
+# local imports
+from microhorario_dl.ocupacao import Aula
+
+
+def test_salas_livres(micro):
+    ocupacao = micro.ocupacao_salas()
+    assert micro.ocupacao_salas() is ocupacao
+    assert ocupacao.salas == ['L101', 'L102', 'L520', 'L521', 'L522', 'L523']
+
+    assert not ocupacao.livre('L522', 'SEG', 14, 16)
+    assert ocupacao.livre('L522', 'SEG', 15, 17)
+    assert ocupacao.livre('L999', 'SEG', 7, 22)
+    assert ocupacao.salas_livres('QUA', 13, 15) == ['L101', 'L102', 'L520', 'L521', 'L523']
+    assert ocupacao.salas_livres('SEG', 7, 22) == ['L521', 'L523']
+
+
+def test_aulas_da_sala(micro):
+    ocupacao = micro.ocupacao_salas()
+    inf1007 = Aula('L522', 'SEG', 13, 15, 'INF1007', '3WA', 'ANA SILVA')
+    inf1010 = Aula('L522', 'SEG', 13, 15, 'INF1010', '3WA', 'CARLA SOUZA')
+
+    assert ocupacao.agenda('L522') == [inf1007, inf1010, Aula('L522', 'QUA', 13, 15, 'INF1007', '3WA', 'ANA SILVA')]
+    assert ocupacao.agenda('L999') == []
+    assert ocupacao.aulas_na_hora('L522', 'SEG', 14) == [inf1007, inf1010]
+    assert ocupacao.aulas_na_hora('L522', 'SEG', 15) == []
+
+
+def test_intervalos_invalidos(micro):
+    ocupacao = micro.ocupacao_salas()
+    with pytest.raises(ValueError):
+        ocupacao.livre('L522', 'XYZ', 13, 15)
+    with pytest.raises(ValueError):
+        ocupacao.salas_livres('SEG', 15, 13)
+    with pytest.raises(ValueError):
+        ocupacao.aulas_na_hora('L522', 'XYZ', 13)
@@ -0,0 +1,52 @@
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+# local imports
+from microhorario_dl.parquet import COLUNAS_ALOCACOES, COLUNAS_TURMAS  # noqa: E402
+
+
+def _le(caminho: str, formato: str):
+    if formato == 'parquet':
+        import pyarrow.parquet
+        return pyarrow.parquet.read_table(caminho)
+    import pyarrow.ipc
+    with pyarrow.ipc.open_stream(caminho) as leitor:
+        return leitor.read_all()
+
+
+@pytest.mark.parametrize('formato', ['parquet', 'arrow'])
+def test_tabelas_iguais_aos_modelos(micro, tmp_path, formato):
+    turmas, alocacoes = str(tmp_path / 'turmas'), str(tmp_path / 'alocacoes')
+    # grupos pequenos, para o arquivo ter vários grupos (e vários dicionarios no arrow)
+    micro.exportar_parquet(turmas, alocacoes, formato=formato, tamanho_grupo=2)
+
+    tabela = _le(turmas, formato)
+    assert tabela.column_names == [x[0] for x in COLUNAS_TURMAS]
+    assert pa.types.is_dictionary(tabela.schema.field('professor').type)
+    linhas = [tuple(x.values()) for x in tabela.to_pylist()]
+    assert linhas == [
+        ('20231', d.codigo, d.nome, d.departamento.codigo, d.creditos, d.pre_req, t.codigo, t.professor,
+         t.turno, t.horario_distancia, t.shf, t.localizacao or '', t.horario_local)
+        for d in micro.disciplinas for t in d.turmas
+    ]
+
+    tabela = _le(alocacoes, formato)
+    assert tabela.column_names == [x[0] for x in COLUNAS_ALOCACOES]
+    assert [tuple(x.values()) for x in tabela.to_pylist()] == [
+        ('20231', 'INF1005', '3WA', 'QQC', 40),
+        ('20231', 'INF1005', '3WB', 'CIC', 30),
+        ('20231', 'INF1005', '3WB', 'ENG', 10),
+        ('20231', 'INF1007', '3WA', 'QQC', 35),
+        ('20231', 'INF1010', '3WA', 'CIC', 0),
+        ('20231', 'MAT1161', '2VA', 'QQC', 60),
+        ('20231', 'MAT1200', '2VA', 'QQC', 50),
+    ]
+
+
+def test_argumentos_invalidos(micro, tmp_path):
+    turmas, alocacoes = str(tmp_path / 'turmas'), str(tmp_path / 'alocacoes')
+    with pytest.raises(ValueError):
+        micro.exportar_parquet(turmas, alocacoes, formato='csv')
+    with pytest.raises(ValueError):
+        micro.exportar_parquet(turmas, alocacoes, tamanho_grupo=0)
@@ -0,0 +1,51 @@
+import warnings
+
+# local imports
+from microhorario_dl.parser import _converte_linhas, converte_para_json
+from conftest import LINHAS, gera_csv
+
+
+def _linhas_de_dados(texto: str):
+    return [x.rstrip(' \r;') for x in texto.splitlines()[2:]]
+
+
+def test_converte_colunas_igual_linha_a_linha():
+    texto = gera_csv()
+    assert converte_para_json(texto)['disciplinas'] == _converte_linhas(_linhas_de_dados(texto))
+
+
+def test_informacoes_e_campos():
+    dados = converte_para_json(gera_csv())
+    assert dados['periodo'] == '20231'
+    assert dados['emissao'] == '05/04/2023 16:24 h'
+
+    primeira = dados['disciplinas'][0]
+    assert (primeira.codigo, primeira.professor, primeira.creditos, primeira.vaga) == ('INF1005', 'ANA SILVA', 4, 40)
+    assert primeira.pre_req is False
+    assert dados['disciplinas'][3].pre_req is True
+
+
+def test_horarios_e_salas_11_colunas():
+    # sem créditos, destino e vagas, e com as horas de extensão
+    linhas = [x[:3] + x[4:5] + x[7:11] + ('0',) + x[11:] for x in LINHAS]
+    texto = gera_csv(linhas)
+    disciplinas = converte_para_json(texto)['disciplinas']
+
+    assert len(disciplinas) == len(LINHAS)
+    assert disciplinas == _converte_linhas(_linhas_de_dados(texto))
+    assert all(x.creditos == -1 and x.vaga == -1 and x.destino == '--' for x in disciplinas)
+
+
+def test_horas_de_extensao_14_colunas():
+    linhas = [x[:11] + ('5',) + x[11:] for x in LINHAS]
+    assert converte_para_json(gera_csv(linhas)) == converte_para_json(gera_csv())
+
+
+def test_linha_invalida_avisa_e_e_ignorada():
+    linhas = list(LINHAS) + [("INF9999", "QUEBRADA", "X")]
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter('always')
+        disciplinas = converte_para_json(gera_csv(linhas))['disciplinas']
+
+    assert len(disciplinas) == len(LINHAS)
+    assert any('INF9999' in str(x.message) for x in avisos)
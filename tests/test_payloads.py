@@ -0,0 +1,57 @@
+import warnings
+
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.contexto import ContextoDownload
+from microhorario_dl.payloads import FiltrosConsulta, PayloadMicrohorario, PayloadModo
+from conftest import ClienteFalso, resposta
+
+
+EXCECAO = (
+    '<html><body><span id="lblMensagem">Indisponível. '
+    '<a href="https://www.puc-rio.br/WebMicroHorarioConsulta/?sessao=XYZ">Horarios e Salas</a>'
+    '</span></body></html>'
+)
+
+
+class ClienteFallback(ClienteFalso):
+    """Redireciona a primeira consulta para a página de exceção, como no modo fallback"""
+
+    def get(self, url, **kwargs):
+        if 'WebMicroHorarioConsulta' not in url and 'ementa' not in url:
+            self.requisicoes.append(('GET', url))
+            return resposta('https://www.puc-rio.br/WebExcecao', EXCECAO)
+        return super().get(url, **kwargs)
+
+
+def test_filtros_sem_fallback_removidos():
+    filtros = FiltrosConsulta(departamento='INF', creditos=4, turno='M')
+    assert filtros.ignorados_no_fallback() == ['txtQtdCreditos', 'ddlTurno']
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        payload = PayloadMicrohorario.final(PayloadModo.HORARIO, filtros)
+    assert payload['txtCodigoDptDcp'] == 'INF'
+    assert 'txtQtdCreditos' not in payload and 'ddlTurno' not in payload
+
+
+def test_um_aviso_por_download_no_fallback():
+    contexto = ContextoDownload(cliente=ClienteFallback())
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter('always')
+        micro = Microhorario.download(contexto, filtros=FiltrosConsulta(creditos=4, turno='M'))
+
+    assert micro.is_modo_fallback
+    filtros = [str(x.message) for x in avisos if 'Filtros' in str(x.message)]
+    assert filtros == ["Filtros não suportados pelo 'Horarios e Salas' foram ignorados: txtQtdCreditos, ddlTurno"]
+
+
+def test_consulta_do_fallback_medida_separadamente():
+    contexto = ContextoDownload(cliente=ClienteFallback())
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        Microhorario.download(contexto)
+
+    resumo = contexto.metricas.resumo()
+    assert resumo['inicial']['quantidade'] == 1
+    assert resumo['excecao']['quantidade'] == 1
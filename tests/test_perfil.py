@@ -0,0 +1,65 @@
+import threading
+import tracemalloc
+
+# local imports
+from microhorario_dl.perfil import PerfilMemoria
+
+
+def test_etapas_aninhadas():
+    perfil = PerfilMemoria()
+    with perfil.etapa('download'):
+        with perfil.etapa('parsing'):
+            dados = [str(x) for x in range(1000)]
+    del dados
+    assert [x['nome'] for x in perfil.etapas] == ['download/parsing', 'download']
+    assert not tracemalloc.is_tracing()
+
+
+def test_threads_simultaneas_tem_pilhas_separadas():
+    perfil = PerfilMemoria()
+    barreira = threading.Barrier(2)
+    erros = []
+
+    def baixa(nome: str):
+        try:
+            with perfil.etapa(nome):
+                barreira.wait(5)
+                with perfil.etapa('consultas'):
+                    barreira.wait(5)
+                barreira.wait(5)
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=baixa, args=(x,)) for x in ('a', 'b')]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert erros == []
+    assert sorted(x['nome'] for x in perfil.etapas) == ['a', 'a/consultas', 'b', 'b/consultas']
+    assert not tracemalloc.is_tracing()
+
+
+def test_etapa_de_outra_thread_nao_apaga_o_pico():
+    perfil = PerfilMemoria()
+    alocou, terminou = threading.Event(), threading.Event()
+
+    def mede_b():
+        alocou.wait(5)
+        with perfil.etapa('b'):
+            pass
+        terminou.set()
+
+    thread = threading.Thread(target=mede_b)
+    thread.start()
+    with perfil.etapa('a'):
+        dados = bytearray(10 * 1024 * 1024)
+        del dados
+        # a etapa de b começa depois do pico de a
+        alocou.set()
+        terminou.wait(5)
+    thread.join()
+
+    etapa_a = next(x for x in perfil.etapas if x['nome'] == 'a')
+    assert etapa_a['pico'] >= 10 * 1024 * 1024
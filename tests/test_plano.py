@@ -0,0 +1,63 @@
+import pytest
+
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.cache import CacheEmentas
+from microhorario_dl.contexto import ContextoDownload
+from conftest import LINHAS, ClienteFalso, gera_csv
+
+
+def _ementas(cliente):
+    return [x[1].rsplit('=', 1)[-1] for x in cliente.requisicoes if 'ementa' in x[1]]
+
+
+def test_somente_prerequisitos(micro, cliente):
+    plano = micro.planejar_coleta(campos=['prerequisitos'])
+    assert plano.codigos == ['INF1007', 'INF1010', 'MAT1200']
+    assert plano.sem_prerequisitos == ['INF1005', 'MAT1161']
+    assert plano.ignoradas == {'INF1005': 'sem pré-requisitos', 'MAT1161': 'sem pré-requisitos'}
+    assert plano.requisicoes is None
+
+    assert micro.executar_plano(plano, cliente=cliente, espera=0) is plano
+    assert plano.requisicoes == plano.estimativa == 3
+    assert _ementas(cliente) == ['INF1007', 'INF1010', 'MAT1200']
+    disciplinas = {x.codigo: x for x in micro.disciplinas}
+    assert disciplinas['INF1005'].prerequisitos_coletados == []
+    assert disciplinas['INF1005'].ementa_coletada is None
+    assert [x.codigo for x in disciplinas['INF1007'].prerequisitos_coletados[0]] == ['INF1005']
+
+    # depois da execução, nada mais precisa ser baixado
+    plano = micro.planejar_coleta(campos=['prerequisitos'])
+    assert plano.estimativa == 0
+    assert set(plano.ignoradas.values()) == {'já conhecida'}
+
+
+def test_somente_creditos_desconhecidos():
+    linhas = [x[:3] + ('-',) + x[4:] if x[0] == 'MAT1161' else x for x in LINHAS]
+    micro = Microhorario.download(ContextoDownload(cliente=ClienteFalso(gera_csv(linhas))))
+
+    plano = micro.planejar_coleta(campos=['creditos', 'creditos'])
+    assert plano.campos == ['creditos']
+    assert plano.codigos == ['MAT1161']
+    assert micro.planejar_coleta(campos=['creditos'], departamentos=['inf']).codigos == []
+
+
+def test_filtros_e_cache(micro, cliente, tmp_path):
+    cache = CacheEmentas(str(tmp_path / 'cache'))
+    for _ in micro.iter_coletar_extra(codigos=['INF1007'], cliente=cliente, cache=cache, espera=0):
+        pass
+
+    novo = Microhorario.download(ContextoDownload(cliente=cliente))
+    plano = novo.planejar_coleta(codigos=['inf1007', 'INF1010'], cache=cache)
+    assert plano.do_cache == ['INF1007']
+    assert plano.codigos == ['INF1010']
+
+    cliente.requisicoes.clear()
+    novo.executar_plano(plano, cliente=cliente, cache=cache, espera=0)
+    assert _ementas(cliente) == ['INF1010']
+    assert plano.requisicoes == 1
+
+
+def test_campo_desconhecido(micro):
+    with pytest.raises(ValueError):
+        micro.planejar_coleta(campos=['vagas'])
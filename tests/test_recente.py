@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.contexto import ContextoDownload
+from microhorario_dl.recente import MicrohorarioRecente
+from conftest import ClienteFalso
+
+
+class Downloads:
+    """Função `baixa` que conta os downloads, e pode ser bloqueada ou falhar"""
+
+    def __init__(self):
+        self.quantidade = 0
+        self.liberado = threading.Event()
+        self.liberado.set()
+        self.erro = None
+
+    def __call__(self) -> Microhorario:
+        self.quantidade += 1
+        self.liberado.wait(5)
+        if self.erro is not None:
+            raise self.erro
+        return Microhorario.download(ContextoDownload(cliente=ClienteFalso()))
+
+
+def test_primeiro_acesso_baixa_e_os_outros_reaproveitam():
+    cliente = ClienteFalso()
+    recente = MicrohorarioRecente(validade=600, contexto=ContextoDownload(cliente=cliente))
+    assert recente.idade is None
+
+    micro = recente.get()
+    assert recente.get() is micro
+    assert not recente.atualizando
+    # o contexto é reaproveitado nos downloads seguintes
+    assert recente.atualiza() is not micro
+    assert [x[0] for x in cliente.requisicoes] == ['GET', 'POST', 'POST', 'POST']
+
+
+def test_velho_atualiza_em_segundo_plano():
+    baixa = Downloads()
+    recente = MicrohorarioRecente(validade=0, baixa=baixa)
+    antigo = recente.get()
+
+    baixa.liberado.clear()
+    # os acessos não esperam o download, e somente um acontece por vez
+    assert recente.get() is antigo
+    assert recente.get() is antigo
+    assert recente.atualizando
+    baixa.liberado.set()
+
+    assert recente.aguarda(5)
+    assert baixa.quantidade == 2
+    assert recente.get() is not antigo
+    recente.aguarda(5)
+
+
+def test_erro_mantem_o_anterior():
+    baixa = Downloads()
+    recente = MicrohorarioRecente(validade=0, baixa=baixa, espera_erro=600)
+    antigo = recente.get()
+
+    baixa.erro = ConnectionError("sem rede")
+    with pytest.warns(UserWarning, match="Erro ao atualizar"):
+        assert recente.get() is antigo
+        recente.aguarda(5)
+    assert recente.ultimo_erro is baixa.erro
+
+    # antes da `espera_erro`, nenhum download novo começa
+    assert recente.get() is antigo
+    assert not recente.atualizando
+    assert baixa.quantidade == 2
+
+
+def test_carrega_o_salvo(tmp_path):
+    caminho = str(tmp_path / 'micro.json')
+    micro = MicrohorarioRecente(caminho=caminho, baixa=Downloads()).get()
+
+    baixa = Downloads()
+    recente = MicrohorarioRecente(caminho=caminho, baixa=baixa)
+    assert recente.idade is not None
+    assert recente.get().as_json() == micro.as_json()
+    assert baixa.quantidade == 0
@@ -0,0 +1,58 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+# local imports
+from microhorario_dl.servidor import ServidorMicrohorario
+
+
+@pytest.fixture
+def servidor(micro):
+    servidor = ServidorMicrohorario(micro, porta=0)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+    thread.join()
+
+
+def _get(servidor, caminho: str, **cabecalhos):
+    conexao = http.client.HTTPConnection(*servidor.server_address, timeout=5)
+    try:
+        conexao.request('GET', caminho, headers=cabecalhos)
+        resposta = conexao.getresponse()
+        return resposta.status, dict(resposta.getheaders()), resposta.read()
+    finally:
+        conexao.close()
+
+
+def test_etag_e_304(servidor):
+    status, cabecalhos, corpo = _get(servidor, '/departamentos/inf')
+    assert status == 200
+    assert [x['codigo'] for x in json.loads(corpo)] == ['INF1005', 'INF1007', 'INF1010']
+    etag = cabecalhos['ETag']
+
+    status, cabecalhos, corpo = _get(servidor, '/departamentos/inf', **{'If-None-Match': etag})
+    assert status == 304
+    assert cabecalhos['ETag'] == etag
+    assert corpo == b''
+
+
+def test_nao_encontrado(servidor):
+    status, _, _ = _get(servidor, '/disciplinas/XYZ9999')
+    assert status == 404
+
+
+def test_chave_desconhecida_nao_e_guardada(servidor):
+    for caminho in ('/disciplinas/XXX0000', '/horarios/FOO/99', '/professores/NINGUEM', '/salas/L520'):
+        status, _, _ = _get(servidor, caminho)
+        assert status == 404
+    assert len(servidor.indices._cache) == 0
+
+    # o mesmo recurso com outra grafia usa a mesma resposta guardada
+    assert _get(servidor, '/departamentos/inf')[0] == 200
+    assert _get(servidor, '/departamentos/INF')[0] == 200
+    assert list(servidor.indices._cache) == ['departamentos/INF']
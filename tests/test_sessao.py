@@ -0,0 +1,59 @@
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.contexto import ContextoDownload
+from microhorario_dl.payloads import FiltrosConsulta
+from conftest import ClienteFalso, resposta
+
+
+class ClienteExpirado(ClienteFalso):
+    """Cliente falso em que a sessão expira: a próxima consulta final volta para o formulário"""
+
+    def __init__(self):
+        super().__init__()
+        self.expirar = False
+
+    def post(self, url, data=None, **kwargs):
+        if self.expirar and 'btnDownload' in (data or {}):
+            self.expirar = False
+            self.requisicoes.append(('POST', url))
+            return resposta(url, '<html></html>')
+        return super().post(url, data, **kwargs)
+
+
+def test_segundo_download_so_faz_a_consulta_final():
+    cliente = ClienteFalso()
+    contexto = ContextoDownload(cliente=cliente)
+    micro = Microhorario.download(contexto)
+    assert [x[0] for x in cliente.requisicoes] == ['GET', 'POST', 'POST']
+    assert contexto.tem_sessao
+
+    cliente.requisicoes.clear()
+    assert Microhorario.download(contexto).as_json() == micro.as_json()
+    assert [x[0] for x in cliente.requisicoes] == ['POST']
+
+    cliente.requisicoes.clear()
+    Microhorario.download(contexto, reaproveitar_sessao=False)
+    assert [x[0] for x in cliente.requisicoes] == ['GET', 'POST', 'POST']
+
+
+def test_filtros_diferentes_criam_outra_sessao():
+    cliente = ClienteFalso()
+    contexto = ContextoDownload(cliente=cliente)
+    Microhorario.download(contexto)
+
+    cliente.requisicoes.clear()
+    Microhorario.download(contexto, filtros=FiltrosConsulta(departamento='INF'))
+    assert [x[0] for x in cliente.requisicoes] == ['GET', 'POST', 'POST']
+    assert contexto.filtros_da_sessao == FiltrosConsulta(departamento='INF')
+
+
+def test_sessao_expirada_refaz_as_consultas():
+    cliente = ClienteExpirado()
+    contexto = ContextoDownload(cliente=cliente)
+    micro = Microhorario.download(contexto)
+
+    cliente.requisicoes.clear()
+    cliente.expirar = True
+    assert Microhorario.download(contexto).as_json() == micro.as_json()
+    assert [x[0] for x in cliente.requisicoes] == ['POST', 'GET', 'POST', 'POST']
+    assert contexto.tem_sessao
@@ -0,0 +1,45 @@
+import pytest
+import requests
+
+
+def _ementas(cliente):
+    return [x for x in cliente.requisicoes if 'ementa' in x[1]]
+
+
+def test_coleta_no_primeiro_acesso(micro, cliente):
+    micro.coletar_sob_demanda(cliente=cliente)
+    disc = micro.disciplinas[1]
+    assert disc.ementa_coletada is None and disc.prerequisitos_coletados is None
+    assert _ementas(cliente) == []
+
+    assert disc.ementa == f'Ementa de {disc.codigo}'
+    assert disc.ementa_coletada == disc.ementa
+    assert [[x.codigo for x in g] for g in disc.prerequisitos_coletados] == [['INF1005']]
+    disc.prerequisitos
+    assert len(_ementas(cliente)) == 1
+
+
+def test_erro_memorizado(micro, cliente):
+    coletor = micro.coletar_sob_demanda(cliente=cliente)
+    cliente.falhar_ementas = True
+    disc = micro.disciplinas[1]
+
+    with pytest.warns(UserWarning):
+        assert disc.ementa is None
+    assert disc.prerequisitos is None
+    assert coletor.coleta(disc.codigo) is None
+    assert len(_ementas(cliente)) == 1
+    assert isinstance(coletor.falhas[disc.codigo], requests.ConnectionError)
+
+
+def test_erro_tentado_de_novo_depois_da_espera(micro, cliente):
+    coletor = micro.coletar_sob_demanda(cliente=cliente, espera_erro=0)
+    cliente.falhar_ementas = True
+    disc = micro.disciplinas[1]
+    with pytest.warns(UserWarning):
+        assert disc.ementa is None
+
+    cliente.falhar_ementas = False
+    assert disc.ementa == f'Ementa de {disc.codigo}'
+    assert len(_ementas(cliente)) == 2
+    assert coletor.falhas == {}
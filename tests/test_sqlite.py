@@ -0,0 +1,32 @@
+# local imports
+from microhorario_dl import Microhorario
+
+
+def test_ida_e_volta(micro, tmp_path):
+    caminho = str(tmp_path / 'micro.db')
+    micro.exportar_sqlite(caminho)
+    assert micro.destinos
+    assert Microhorario.from_sqlite(caminho).as_json() == micro.as_json()
+
+
+def test_ida_e_volta_com_ementas(micro, cliente, tmp_path):
+    for _ in micro.iter_coletar_extra(cliente=cliente, espera=0):
+        pass
+    caminho = str(tmp_path / 'micro.db')
+    micro.exportar_sqlite(caminho)
+    assert Microhorario.from_sqlite(caminho).as_json() == micro.as_json()
+
+
+def test_ida_e_volta_com_grupos_vazios(micro, cliente, tmp_path):
+    # XYZ1234 não é oferecida, então o primeiro grupo de INF1007 fica vazio
+    cliente.prerequisitos = {'INF1007': [['XYZ1234'], ['INF1005']], 'INF1010': []}
+    for _ in micro.iter_coletar_extra(cliente=cliente, espera=0):
+        pass
+    caminho = str(tmp_path / 'micro.db')
+    micro.exportar_sqlite(caminho)
+
+    carregado = Microhorario.from_sqlite(caminho)
+    assert carregado.as_json() == micro.as_json()
+    por_codigo = {x['codigo']: x for x in carregado.as_json()['disciplinas']}
+    assert por_codigo['INF1007']['prerequisitos'] == [[], ['INF1005']]
+    assert por_codigo['INF1010']['prerequisitos'] == []
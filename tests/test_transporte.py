@@ -0,0 +1,52 @@
+import pytest
+
+# local imports
+from microhorario_dl import Microhorario
+from microhorario_dl.contexto import ContextoDownload
+from microhorario_dl.exceptions import RecordingNotFoundError
+from microhorario_dl.transporte import ClienteGravador, ClienteReprodutor
+from conftest import LINHAS, ClienteFalso, gera_csv
+
+
+def test_reproduz_download_e_ementas(tmp_path):
+    gravador = ClienteGravador(ClienteFalso())
+    micro = Microhorario.download(ContextoDownload(cliente=gravador))
+    for _ in micro.iter_coletar_extra(cliente=gravador, espera=0):
+        pass
+    caminho = str(tmp_path / 'gravacao.json')
+    gravador.salva(caminho)
+
+    reprodutor = ClienteReprodutor(caminho)
+    reproduzido = Microhorario.download(ContextoDownload(cliente=reprodutor))
+    for _ in reproduzido.iter_coletar_extra(cliente=reprodutor, espera=0):
+        pass
+    assert reproduzido.as_json() == micro.as_json()
+    assert reprodutor.requisicoes == len(gravador._cliente.requisicoes)
+
+    with pytest.raises(RecordingNotFoundError):
+        reprodutor.get('https://www.puc-rio.br/outra')
+
+
+def test_respostas_repetidas_na_ordem(tmp_path):
+    cliente = ClienteFalso()
+    gravador = ClienteGravador(cliente)
+    contexto = ContextoDownload(cliente=gravador)
+    Microhorario.download(contexto)
+    # a sessão é reaproveitada, então a mesma consulta final é gravada de novo
+    cliente.csv = gera_csv(LINHAS[:2])
+    Microhorario.download(contexto)
+    caminho = str(tmp_path / 'gravacao.json')
+    gravador.salva(caminho)
+
+    contexto = ContextoDownload(cliente=ClienteReprodutor(caminho))
+    assert len(Microhorario.download(contexto).disciplinas) == 5
+    assert len(Microhorario.download(contexto).disciplinas) == 1
+    # a última resposta continua sendo usada
+    assert len(Microhorario.download(contexto).disciplinas) == 1
+
+
+def test_versao_invalida(tmp_path):
+    caminho = tmp_path / 'gravacao.json'
+    caminho.write_text('{"versao": 99, "trocas": []}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        ClienteReprodutor(str(caminho))